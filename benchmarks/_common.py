@@ -0,0 +1,35 @@
+"""
+Общие помощники бенчмарков: временная база данных и замер времени.
+
+Базы создаются во временном каталоге; BENCH_DIR задает другой каталог,
+например на диске вместо tmpfs, чтобы учесть стоимость fsync.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from database.db_handler import DatabaseHandler
+
+@contextmanager
+def scratch_dir():
+    """Временный каталог для баз бенчмарка (удаляется по выходе)"""
+    with tempfile.TemporaryDirectory(dir=os.getenv('BENCH_DIR')) as tmp:
+        yield tmp
+
+@contextmanager
+def scratch_db(name: str = 'bench.db', **kwargs):
+    """DatabaseHandler на новой базе во временном каталоге (закрывается по выходе)"""
+    with scratch_dir() as tmp:
+        db = DatabaseHandler(os.path.join(tmp, name), **kwargs)
+        try:
+            yield db
+        finally:
+            db.close()
+
+def timed(name: str, func, repeats: int = 1, scale: float = 1):
+    """Среднее время вызова func в мс (scale - множитель для замера на части данных)"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    print(f"{name:40} {(time.perf_counter() - start) / repeats * scale * 1000:9.1f} ms")
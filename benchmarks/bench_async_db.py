@@ -0,0 +1,81 @@
+"""
+Задержка обработчиков при 200 одновременных пользователях: синхронные запросы
+в цикле событий против AsyncDatabaseHandler.
+
+Каждый пользователь открывает экран турнира (те же запросы, что и
+all_tournament_detail_callback) и ждет ответа Telegram. Параллельно работает
+проверка истекших матчей (полный проход по таблице matches).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_async_db
+"""
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks._common import scratch_db
+from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
+
+USERS = 200
+MATCHES = 3000
+TELEGRAM_RTT = 0.02
+
+def seed(db: DatabaseHandler):
+    db.add_tournament("Bench Cup", "benchmark", 1)
+    tournament_id = db.get_all_tournaments()[0][0]
+    with db.pool.connection() as conn:
+        conn.executemany(
+            'INSERT INTO matches (tournament_id, match_date, match_time, team1, team2) VALUES (?, ?, ?, ?, ?)',
+            [(tournament_id, f"{1 + i % 28:02d}.{1 + i % 12:02d}.2030", "18:00", f"T{i}", f"T{i + 1}") for i in range(MATCHES)]
+        )
+    return tournament_id
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+async def simulate(call, tournament_id):
+    latencies = []
+
+    async def user(user_id):
+        await asyncio.sleep(random.random() * 0.2)
+        start = time.perf_counter()
+        await call('get_tournament', tournament_id)
+        await call('get_user_bet', user_id, 1)
+        await asyncio.sleep(TELEGRAM_RTT)
+        latencies.append(time.perf_counter() - start)
+
+    async def match_checker():
+        for _ in range(5):
+            await asyncio.sleep(0.03)
+            await call('get_expired_matches')
+
+    await asyncio.gather(match_checker(), *(user(i) for i in range(USERS)))
+    return latencies
+
+def report(name, latencies):
+    ms = [x * 1000 for x in latencies]
+    print(f"{name:8} p50 {statistics.median(ms):7.1f} ms   p99 {percentile(ms, 99):7.1f} ms   max {max(ms):7.1f} ms")
+
+def main():
+    with scratch_db() as sync_db:
+        tournament_id = seed(sync_db)
+        async_db = AsyncDatabaseHandler(sync_db)
+
+        async def call_sync(name, *args):
+            return getattr(sync_db, name)(*args)
+
+        async def call_async(name, *args):
+            return await getattr(async_db, name)(*args)
+
+        random.seed(1)
+        report("sync", asyncio.run(simulate(call_sync, tournament_id)))
+        random.seed(1)
+        report("async", asyncio.run(simulate(call_async, tournament_id)))
+
+        asyncio.run(async_db.close())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Пропускная способность приема ставок перед началом матча: отдельная
+транзакция на каждую ставку против задачи-писателя с групповой фиксацией.
+
+USERS пользователей одновременно ставят на MATCHES матчей. Считается число
+принятых ставок в секунду и число ставок, которые не удалось записать.
+База создается во временном каталоге (BENCH_DIR задает другой каталог,
+например на диске вместо tmpfs, чтобы учесть стоимость fsync).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_bet_burst
+"""
+import asyncio
+import os
+import random
+import time
+
+from benchmarks._common import scratch_dir
+from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
+
+USERS = 500
+MATCHES = 4
+
+def seed(db: DatabaseHandler):
+    db.add_tournament("Bench Cup", "benchmark", 1)
+    tournament_id = db.get_all_tournaments()[0][0]
+    for i in range(MATCHES):
+        db.add_match(tournament_id, "01.01.2030", f"{18 + i}:00", f"Team {i}", f"Team {i + 1}", 1)
+    return [match[0] for match in db.get_tournament_matches(tournament_id)]
+
+async def burst(place_bet, match_ids):
+    """Все пользователи ставят на все матчи в течение ~100 мс"""
+    async def user(user_id):
+        await asyncio.sleep(random.random() * 0.1)
+        results = []
+        for match_id in match_ids:
+            results.append(await place_bet(user_id, match_id, f"{random.randint(0, 4)}-{random.randint(0, 4)}"))
+        return results
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(user(i) for i in range(1, USERS + 1)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    accepted = sum(1 for r in results if not isinstance(r, Exception) for ok in r if ok)
+    return accepted, USERS * len(match_ids) - accepted, elapsed
+
+def report(name, accepted, failed, elapsed):
+    print(f"{name:14} {accepted / elapsed:8.0f} bets/s   accepted {accepted:5}   failed {failed:4}   {elapsed:6.2f} s")
+
+def run(tmp, name, batch_size):
+    db = DatabaseHandler(os.path.join(tmp, f"{name}.db"))
+    match_ids = seed(db)
+    async_db = AsyncDatabaseHandler(db, write_batch_size=batch_size)
+
+    async def place_bet(user_id, match_id, score):
+        if batch_size is None:
+            # Старое поведение: каждая ставка в своем потоке и своей транзакции
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(async_db._executor, db.add_user_bet, user_id, match_id, score)
+        return await async_db.add_user_bet(user_id, match_id, score)
+
+    async def session():
+        try:
+            return await burst(place_bet, match_ids)
+        finally:
+            await async_db.close()
+
+    random.seed(1)
+    report(name, *asyncio.run(session()))
+
+def main():
+    with scratch_dir() as tmp:
+        run(tmp, "per-write", None)
+        run(tmp, "writer x1", 1)
+        run(tmp, "writer x64", 64)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Выбор обработчика колбэка для всех кнопок бота: прежний перебор фильтров
+(lambda c: c.data.startswith(...) в порядке регистрации) и разбор
+callback_data маршрутизатором (CallbackRouter) с поиском действия в словаре -
+отдельно и полным путем колбэка в aiogram (обработчики - заглушки).
+Проверяется, что маршрутизатор выбирает те же обработчики, что и фильтры.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_callback_router
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from handlers import admin, callbacks, login, profile, registration, start
+from handlers.admin import register_admin_handlers
+from handlers.callbacks import register_callback_handlers
+from handlers.login import register_login_handlers
+from handlers.profile import register_profile_handlers
+from handlers.registration import register_registration_handlers
+from handlers.start import register_start_handlers
+from states.user_states import AuthStates, ProfileStates
+from utils.callback_data import PageCursor, pack
+from utils.callback_router import CallbackRouter, get_callback_router, state_names
+
+REPEATS = 20000
+
+# Обработчики колбэков до введения маршрутизатора: фильтр и состояние FSM,
+# в порядке регистрации
+LEGACY_FILTERS = [
+    (start.back_to_start, lambda c: c.data == "start", None),
+    (registration.register_start, lambda c: c.data == "register", "*"),
+    (registration.cancel_registration, lambda c: c.data == "start", AuthStates.all_states),
+    (login.login_start, lambda c: c.data == "login", "*"),
+    (login.login_retry, lambda c: c.data == "login_retry", "*"),
+    (login.cancel_login, lambda c: c.data == "start", AuthStates.all_states),
+    (profile.cancel_username, lambda c: c.data == "main_menu", ProfileStates.waiting_for_username),
+    (callbacks.handle_navigation, lambda c: c.data in callbacks.STATIC_SCREENS or c.data in callbacks.DYNAMIC_SCREENS, "*"),
+    (callbacks.my_profile_callback, lambda c: c.data == "my_profile", "*"),
+    (callbacks.change_username_callback, lambda c: c.data == "change_username", "*"),
+    (callbacks.change_password_callback, lambda c: c.data == "change_password", "*"),
+    (callbacks.all_tournament_detail_callback, lambda c: c.data.startswith("all_tournament_"), "*"),
+    (callbacks.my_tournament_detail_callback, lambda c: c.data.startswith("my_tournament_detail_"), "*"),
+    (callbacks.tournament_my_bets_callback, lambda c: c.data.startswith("tournament_my_bets_"), "*"),
+    (callbacks.tournament_players_callback, lambda c: c.data.startswith("tournament_players_"), "*"),
+    (callbacks.tournament_leaderboard_callback, lambda c: c.data.startswith("tournament_leaderboard_"), "*"),
+    (callbacks.tournament_rules_callback, lambda c: c.data.startswith("tournament_rules_"), "*"),
+    (callbacks.user_match_detail_callback, lambda c: c.data.startswith("user_match_"), "*"),
+    (callbacks.edit_bet_callback, lambda c: c.data.startswith("edit_bet_"), "*"),
+    (callbacks.cancel_operation, lambda c: c.data == "main_menu", [ProfileStates.waiting_for_username, ProfileStates.waiting_for_password]),
+    (callbacks.no_action_callback, lambda c: c.data == "no_action", None),
+    (admin.admin_main_callback, lambda c: c.data == "admin_main", "*"),
+    (admin.admin_back_to_main, lambda c: c.data == "admin_main", "*"),
+    (admin.admin_tournaments_callback, lambda c: c.data == "admin_tournaments", "*"),
+    (admin.admin_users_callback, lambda c: c.data == "admin_users" or c.data.startswith("admin_users_"), "*"),
+    (admin.admin_user_search_callback, lambda c: c.data == "admin_user_search", "*"),
+    (admin.admin_search_page_callback, lambda c: c.data.startswith("admin_search_"), "*"),
+    (admin.admin_stats_callback, lambda c: c.data == "admin_stats", "*"),
+    (admin.add_tournament_callback, lambda c: c.data == "add_tournament", "*"),
+    (admin.tournament_detail_callback, lambda c: c.data.startswith("tournament_") and not c.data.startswith("tournament_matches_"), "*"),
+    (admin.tournament_matches_callback, lambda c: c.data.startswith("tournament_matches_"), "*"),
+    (admin.activate_tournament_callback, lambda c: c.data.startswith("activate_tournament_"), None),
+    (admin.deactivate_tournament_callback, lambda c: c.data.startswith("deactivate_tournament_"), None),
+    (admin.delete_tournament_callback, lambda c: c.data.startswith("delete_tournament_"), None),
+    (admin.edit_rules_callback, lambda c: c.data.startswith("edit_rules_"), "*"),
+    (admin.rescore_tournament_callback, lambda c: c.data.startswith("rescore_tournament_"), None),
+    (admin.add_match_callback, lambda c: c.data.startswith("add_match_"), "*"),
+    (admin.admin_match_detail_callback, lambda c: c.data.startswith("admin_match_"), "*"),
+    (admin.enter_result_callback, lambda c: c.data.startswith("enter_result_"), "*"),
+    (admin.delete_match_callback, lambda c: c.data.startswith("delete_match_"), None),
+    (admin.match_multiplier_callback, lambda c: c.data.startswith("match_multiplier_"), None),
+]
+
+# Кнопки: прежняя callback_data и новая
+BUTTONS = [
+    ("start", pack("start")),
+    ("register", pack("register")),
+    ("login", pack("login")),
+    ("main_menu", pack("main_menu")),
+    ("help", pack("help")),
+    ("all_tournaments", pack("all_tournaments")),
+    ("my_profile", pack("my_profile")),
+    ("change_password", pack("change_password")),
+    ("all_tournament_12", pack("all_tournament", 12)),
+    ("my_tournament_detail_12", pack("my_tournament_detail", 12)),
+    ("tournament_my_bets_12", pack("tournament_my_bets", 12)),
+    ("tournament_players_12_3_a4711", pack("tournament_players", 12, 3, PageCursor(after=4711))),
+    ("tournament_leaderboard_12_me", pack("tournament_leaderboard", 12, "me")),
+    ("tournament_rules_12", pack("tournament_rules", 12)),
+    ("user_match_345", pack("user_match", 345)),
+    ("edit_bet_345", pack("edit_bet", 345)),
+    ("no_action", pack("no_action")),
+    ("admin_main", pack("admin_main")),
+    ("admin_users_2_b981", pack("admin_users", 2, PageCursor(before=981))),
+    ("admin_search_1_a77", pack("admin_search", 1, PageCursor(after=77))),
+    ("admin_stats", pack("admin_stats")),
+    ("tournament_12", pack("tournament", 12)),
+    ("tournament_matches_12", pack("tournament_matches", 12)),
+    ("deactivate_tournament_12", pack("deactivate_tournament", 12)),
+    ("rescore_tournament_12", pack("rescore_tournament", 12)),
+    ("add_match_12", pack("add_match", 12)),
+    ("admin_match_345", pack("admin_match", 345)),
+    ("enter_result_345", pack("enter_result", 345)),
+    ("delete_match_345", pack("delete_match", 345)),
+    ("match_multiplier_345_2", pack("match_multiplier", 345, 2)),
+]
+
+USER = {'id': 1, 'is_bot': False, 'first_name': 'Bench'}
+CHAT = {'id': 1, 'type': 'private'}
+
+def make_callback(data: str) -> types.CallbackQuery:
+    return types.CallbackQuery(
+        id='1', data=data, chat_instance='1', **{'from': USER},
+        message={'message_id': 1, 'date': 0, 'chat': CHAT},
+    )
+
+async def noop(callback, **kwargs):
+    pass
+
+def build_router() -> CallbackRouter:
+    """Маршрутизатор со всеми обработчиками бота, как при запуске"""
+    dp = Dispatcher(Bot(token='123:abc'))
+    register_start_handlers(dp)
+    register_registration_handlers(dp)
+    register_login_handlers(dp)
+    register_profile_handlers(dp)
+    register_callback_handlers(dp)
+    register_admin_handlers(dp)
+    return get_callback_router(dp)
+
+def stub_dispatchers(router: CallbackRouter):
+    """
+    Диспетчеры aiogram с заглушками вместо обработчиков: с прежними фильтрами
+    и с маршрутизатором (те же действия и параметры).
+    """
+    bot = Bot(token='123:abc')
+    legacy = Dispatcher(bot, storage=MemoryStorage())
+    for _, check, state in LEGACY_FILTERS:
+        legacy.register_callback_query_handler(noop, check, state=state)
+
+    routed = Dispatcher(bot, storage=MemoryStorage())
+    stub = get_callback_router(routed)
+    for action, routes in router._routes.items():
+        for route in routes:
+            stub.register(noop, action, state='*' if route.states is None else route.states, **dict(route.params))
+    return legacy, routed
+
+# Фильтры обработчиков, срабатывающих вне состояния FSM
+STATELESS_FILTERS = [
+    (handler, check) for handler, check, state in LEGACY_FILTERS
+    if state_names(state) is None or None in state_names(state)
+]
+
+def legacy_handler(data: str):
+    """Первый обработчик, чей фильтр пропускает колбэк"""
+    callback = SimpleNamespace(data=data)
+    for handler, check in STATELESS_FILTERS:
+        if check(callback):
+            return handler
+
+def router_handler(router: CallbackRouter, data: str):
+    action, _ = router.parse(data)
+    return next(route.handler for route in router._routes[action] if route.states is None or None in route.states)
+
+def timed(name, call, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for old_data, new_data in BUTTONS:
+            call(old_data, new_data)
+    print(f"{name:40} {(time.perf_counter() - start) / repeats / len(BUTTONS) * 1e6:8.2f} us per callback")
+
+async def timed_notify(name, dp: Dispatcher, use_new: bool, repeats=REPEATS // 100):
+    """Полный путь колбэка в aiogram: фильтры, состояние FSM, обработчик"""
+    Dispatcher.set_current(dp)
+    callbacks_data = [make_callback(new_data if use_new else old_data) for old_data, new_data in BUTTONS]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for callback in callbacks_data:
+            types.User.set_current(callback.from_user)
+            types.Chat.set_current(callback.message.chat)
+            await dp.callback_query_handlers.notify(callback)
+    print(f"{name:40} {(time.perf_counter() - start) / repeats / len(BUTTONS) * 1e6:8.2f} us per callback")
+
+def main():
+    router = build_router()
+
+    for old_data, new_data in BUTTONS:
+        assert legacy_handler(old_data) is router_handler(router, new_data), old_data
+        assert router.parse(old_data)[0] == router.parse(new_data)[0], old_data
+
+    print(f"{len(LEGACY_FILTERS)} callback handlers, {len(BUTTONS)} buttons")
+    timed("filters in registration order", lambda old_data, new_data: legacy_handler(old_data))
+    timed("router: parse + lookup", lambda old_data, new_data: router_handler(router, new_data))
+    timed("router: parse + lookup, legacy data", lambda old_data, new_data: router_handler(router, old_data))
+
+    async def notify():
+        legacy, routed = stub_dispatchers(router)
+        await timed_notify("aiogram: filters", legacy, False)
+        await timed_notify("aiogram: router", routed, True)
+        await timed_notify("aiogram: router, legacy data", routed, False)
+    asyncio.run(notify())
+
+if __name__ == '__main__':
+    main()
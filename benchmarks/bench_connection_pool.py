@@ -0,0 +1,78 @@
+"""
+Замер задержки одного обращения к базе: новое соединение на каждый вызов
+против пула долгоживущих соединений.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_connection_pool
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from benchmarks._common import scratch_dir
+from database.db_handler import DatabaseHandler
+
+ITERATIONS = 2000
+
+class ConnectPerCall:
+    """Старое поведение: соединение открывается и закрывается на каждый запрос"""
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.db_name)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+def seed(db: DatabaseHandler):
+    """Тестовые данные: турнир с матчами и ставками"""
+    db.add_tournament("Bench Cup", "benchmark", 1)
+    tournament_id = db.get_all_tournaments()[0][0]
+    for i in range(50):
+        db.add_match(tournament_id, "01.01.2030", f"{i % 24:02d}:00", f"Team {i}", f"Team {i + 1}", 1)
+    for match in db.get_tournament_matches(tournament_id)[:25]:
+        db.add_user_bet(1, match[0], "1-0")
+    return tournament_id
+
+def measure(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+def run(db: DatabaseHandler, tournament_id: int):
+    def detail_screen():
+        # Те же запросы, что выполняет all_tournament_detail_callback
+        db.get_tournament(tournament_id)
+        db.get_available_tournament_matches(tournament_id, 1)
+        db.get_tournament_matches(tournament_id)
+
+    return measure(lambda: db.get_tournament(tournament_id)), measure(detail_screen)
+
+def main():
+    with scratch_dir() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        db = DatabaseHandler(db_name)
+        tournament_id = seed(db)
+
+        pooled = run(db, tournament_id)
+
+        pool = db.pool
+        db.pool = ConnectPerCall(db_name)
+        unpooled = run(db, tournament_id)
+        db.pool = pool
+
+        print(f"{'':24}{'connect per call':>18}{'pooled':>12}{'speedup':>10}")
+        for name, before, after in zip(("get_tournament", "tournament detail"), unpooled, pooled):
+            print(f"{name:24}{before:15.1f} us{after:9.1f} us{before / after:9.1f}x")
+
+        db.close()
+
+if __name__ == '__main__':
+    main()
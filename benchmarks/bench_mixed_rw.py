@@ -0,0 +1,89 @@
+"""
+Одновременные чтение и запись: журнал отката SQLite по умолчанию против
+настроек из Config (WAL, synchronous=NORMAL, кэш, mmap).
+
+READERS потоков открывают экран турнира (get_tournament_matches,
+get_user_bets), один поток в это время записывает ставки, каждую в своей
+транзакции. Считаются операции в секунду, задержка чтения и ошибки
+"database is locked". BENCH_DIR задает каталог для базы.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_mixed_rw
+"""
+import os
+import sqlite3
+import statistics
+import threading
+import time
+
+from benchmarks._common import scratch_dir
+from config import config
+from database.db_handler import DatabaseHandler
+
+READERS = 4
+DURATION = 3.0
+MATCHES = 200
+
+def seed(db: DatabaseHandler):
+    db.add_tournament("Bench Cup", "benchmark", 1)
+    tournament_id = db.get_all_tournaments()[0][0]
+    with db.pool.connection() as conn:
+        conn.executemany(
+            'INSERT INTO matches (tournament_id, match_date, match_time, team1, team2, kickoff_ts) VALUES (?, ?, ?, ?, ?, ?)',
+            [(tournament_id, "01.01.2030", "18:00", f"T{i}", f"T{i + 1}", 1893506400 + i) for i in range(MATCHES)]
+        )
+    return tournament_id
+
+def run(tmp, name, pragmas):
+    # Короткий таймаут ожидания блокировки, чтобы конфликты были видны
+    pragmas = dict(pragmas, busy_timeout=100)
+    db = DatabaseHandler(os.path.join(tmp, f"{name}.db"), pool_size=READERS + 1, pragmas=pragmas)
+    tournament_id = seed(db)
+    stop = threading.Event()
+    read_latencies = []
+    counters = {'writes': 0, 'write_errors': 0, 'read_errors': 0}
+    lock = threading.Lock()
+
+    def reader(user_id):
+        latencies = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.get_tournament_matches(tournament_id)
+                db.get_user_bets(user_id)
+                latencies.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                with lock:
+                    counters['read_errors'] += 1
+        with lock:
+            read_latencies.extend(latencies)
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            ok = db.add_user_bet(1 + i % 1000, 1 + i % MATCHES, f"{i % 5}-{i % 3}")
+            counters['writes' if ok else 'write_errors'] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(READERS)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+
+    ms = sorted(x * 1000 for x in read_latencies)
+    p99 = ms[int(len(ms) * 0.99)] if ms else 0
+    print(f"{name:9} reads {len(ms) / DURATION:7.0f}/s (p50 {statistics.median(ms) if ms else 0:5.2f} ms, p99 {p99:6.2f} ms, "
+          f"errors {counters['read_errors']})   writes {counters['writes'] / DURATION:6.0f}/s (errors {counters['write_errors']})")
+
+def main():
+    with scratch_dir() as tmp:
+        run(tmp, "default", {'journal_mode': 'DELETE', 'synchronous': 'FULL'})
+        run(tmp, "config", config.get_db_pragmas())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Полный пересчет турнира с BETS ставками после изменения правил: векторный
+расчет на NumPy (rescore_tournament), пересчет одним SQL-запросом
+(rebuild_standings) и цикл по ставкам на Python (для сравнения, на части
+ставок с пересчетом на весь турнир).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_rescore
+"""
+import random
+from collections import defaultdict
+
+from benchmarks._common import scratch_db, timed
+from database.db_handler import DatabaseHandler
+from database.standings import rebuild_standings, rescore_tournament
+
+BETS = 1000000
+MATCHES = 50
+LOOP_SAMPLE = 100000
+
+def seed(db: DatabaseHandler):
+    db.add_tournament("Bench Cup", "benchmark", 1)
+    tournament_id = db.get_all_tournaments()[0].id
+    for i in range(MATCHES):
+        db.add_match(tournament_id, "01.01.2030", f"{i // 60:02d}:{i % 60:02d}", f"Team {i}", f"Team {i + 1}", 1)
+    match_ids = [match.id for match in db.get_tournament_matches(tournament_id)]
+
+    random.seed(1)
+    with db.pool.connection() as conn:
+        conn.executemany(
+            'INSERT INTO user_bets (user_id, match_id, score, score_home, score_away) VALUES (?, ?, ?, ?, ?)',
+            [(user_id, match_id, f"{home}-{away}", home, away)
+             for user_id in range(1, BETS // MATCHES + 1) for match_id in match_ids
+             for home, away in [(random.randint(0, 4), random.randint(0, 4))]]
+        )
+        conn.executemany(
+            'UPDATE matches SET result = ?, result_home = ?, result_away = ?, points_multiplier = ? WHERE id = ?',
+            [(f"{home}-{away}", home, away, 2 if i >= MATCHES - 5 else 1, match_id)
+             for i, match_id in enumerate(match_ids)
+             for home, away in [(random.randint(0, 4), random.randint(0, 4))]]
+        )
+    return tournament_id
+
+def python_loop(conn, tournament_id, limit):
+    """Пересчет очков ставок построчно на Python (без записи)"""
+    rules = conn.execute(
+        'SELECT exact_points, diff_points, outcome_points FROM tournaments WHERE id = ?', (tournament_id,)
+    ).fetchone()
+    totals = defaultdict(int)
+    rows = conn.execute('''
+        SELECT ub.user_id, ub.score_home, ub.score_away, m.result_home, m.result_away, m.points_multiplier
+        FROM user_bets ub JOIN matches m ON m.id = ub.match_id
+        WHERE m.tournament_id = ? LIMIT ?
+    ''', (tournament_id, limit))
+    for user_id, bet_home, bet_away, home, away, multiplier in rows:
+        if (bet_home, bet_away) == (home, away):
+            points = rules[0]
+        elif bet_home - bet_away == home - away:
+            points = rules[1]
+        elif (bet_home > bet_away) - (bet_home < bet_away) == (home > away) - (home < away):
+            points = rules[2]
+        else:
+            points = 0
+        totals[user_id] += points * multiplier
+    return totals
+
+def main():
+    with scratch_db() as db:
+        tournament_id = seed(db)
+
+        with db.pool.connection() as conn:
+            timed("first scoring, SQL", lambda: rebuild_standings(conn, tournament_id))
+        print(f"{BETS} bets, {db.get_tournament_standings_count(tournament_id)} participants")
+
+        with db.pool.connection() as conn:
+            conn.execute('UPDATE tournaments SET exact_points = 5 WHERE id = ?', (tournament_id,))
+            timed("rules changed, rescore NumPy", lambda: rescore_tournament(conn, tournament_id))
+            conn.execute('UPDATE tournaments SET exact_points = 4 WHERE id = ?', (tournament_id,))
+            timed("rules changed, rebuild SQL", lambda: rebuild_standings(conn, tournament_id))
+            timed("unchanged rules, rescore NumPy", lambda: rescore_tournament(conn, tournament_id))
+            timed(f"Python loop (x{BETS // LOOP_SAMPLE}, scoring only)",
+                  lambda: python_loop(conn, tournament_id, LOOP_SAMPLE), scale=BETS // LOOP_SAMPLE)
+
+        leader = db.get_tournament_standings(tournament_id, 1)[0]
+        print(f"leader: user {leader.user_id}, {leader.points} points")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Время расчета матча со BETS ставками: начисление очков при вводе результата,
+исправление результата (с откатом ранее начисленных очков) и, для сравнения,
+полный пересчет таблицы турнира.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_settlement
+"""
+import random
+
+from benchmarks._common import scratch_db, timed
+from database.db_handler import DatabaseHandler
+
+BETS = 100000
+
+def seed(db: DatabaseHandler):
+    db.add_tournament("Bench Cup", "benchmark", 1)
+    tournament_id = db.get_all_tournaments()[0].id
+    db.add_match(tournament_id, "01.01.2030", "18:00", "Team A", "Team B", 1)
+    match_id = db.get_tournament_matches(tournament_id)[0].id
+
+    random.seed(1)
+    with db.pool.connection() as conn:
+        conn.executemany(
+            'INSERT INTO user_bets (user_id, match_id, score, score_home, score_away) VALUES (?, ?, ?, ?, ?)',
+            [(user_id, match_id, f"{home}-{away}", home, away)
+             for user_id in range(1, BETS + 1)
+             for home, away in [(random.randint(0, 4), random.randint(0, 4))]]
+        )
+    return tournament_id, match_id
+
+def main():
+    with scratch_db() as db:
+        tournament_id, match_id = seed(db)
+        print(f"{db.get_match_bets_count(match_id)} bets, {db.get_tournament_standings_count(tournament_id)} participants")
+
+        timed("settle result 2-1", lambda: db.update_match_result(match_id, "2-1"))
+        timed("correct result to 1-1", lambda: db.update_match_result(match_id, "1-1"))
+        timed("re-enter same result 1-1", lambda: db.update_match_result(match_id, "1-1"))
+        timed("full tournament rebuild", lambda: db.rebuild_tournament_standings(tournament_id))
+
+        leader = db.get_tournament_standings(tournament_id, 1)[0]
+        print(f"leader: user {leader.user_id}, {leader.points} points")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Проверка числа обращений к базе в обработчиках экранов.
+
+Каждый обработчик вызывается дважды: на маленьком турнире (SMALL_MATCHES
+матчей, у пользователя по ставке на каждый) и на большом (LARGE_MATCHES
+матчей). Обращение к базе - вызов метода AsyncDatabaseHandler (отдельное
+соединение и запрос), не найденный в кэше чтения; кэш перед каждым вызовом
+обработчика пуст. Ошибка, если число обращений растет вместе с числом
+ставок или матчей (запрос на каждую строку, N+1) или превышает бюджет
+обработчика. Обработчики вызываются через маршрутизатор колбэков, как в боте.
+
+Кэш чтения проверяется по счетчикам QueryCache.stats(): повторное открытие
+экрана не дает промахов, а изменение турнира сбрасывает кэш.
+
+Ответы индекса матчей (MatchIndex) сверяются с запросами к базе до, во
+время и после матчей каждого турнира, включая матч без времени начала.
+
+Запуск из корня репозитория:
+    python -m benchmarks.check_handler_queries
+"""
+import asyncio
+import sys
+from types import SimpleNamespace
+
+from aiogram import Bot, Dispatcher
+
+from benchmarks._common import scratch_db
+from config import config
+from database.async_handler import AsyncDatabaseHandler
+from database.db_handler import DatabaseHandler
+from handlers.admin import register_admin_handlers
+from handlers.callbacks import register_callback_handlers
+from utils.callback_data import pack
+from utils.callback_router import CallbackRouter, get_callback_router
+from utils.match_index import MatchIndex
+
+SMALL_MATCHES = 2
+LARGE_MATCHES = 30
+OTHER_PLAYERS = 20
+ADMIN_ID = config.ADMIN_IDS[0]
+
+# callback_data ({tournament_id}, {match_id}), от админа ли вызов, бюджет
+# обращений к базе
+HANDLERS = [
+    (pack('my_profile'), False, 1),
+    (pack('main_menu'), False, 0),
+    (pack('help'), False, 0),
+    (pack('all_tournaments'), False, 1),
+    (pack('my_tournaments'), False, 1),
+    (pack('all_tournament', '{tournament_id}'), False, 1),
+    (pack('my_tournament_detail', '{tournament_id}'), False, 3),
+    (pack('tournament_my_bets', '{tournament_id}'), False, 2),
+    (pack('tournament_players', '{tournament_id}', 0), False, 3),
+    (pack('tournament_leaderboard', '{tournament_id}'), False, 4),
+    (pack('tournament_rules', '{tournament_id}'), False, 1),
+    (pack('user_match', '{match_id}'), False, 3),
+    (pack('tournament', '{tournament_id}'), True, 2),
+    (pack('tournament_matches', '{tournament_id}'), True, 2),
+    (pack('admin_match', '{match_id}'), True, 1),
+    (pack('admin_stats'), True, 1),
+    (pack('admin_users'), True, 2),
+]
+
+class CountingDatabase(AsyncDatabaseHandler):
+    """AsyncDatabaseHandler, записывающий имена методов, выполнивших запрос к базе"""
+
+    def __init__(self, db: DatabaseHandler):
+        super().__init__(db)
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = super().__getattr__(name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def counted(*args, **kwargs):
+            hits = self.cache.hits
+            result = await attr(*args, **kwargs)
+            if self.cache.hits == hits:
+                self.calls.append(name)
+            return result
+        # Родитель кэширует метод в экземпляре - заменяем его счетчиком
+        setattr(self, name, counted)
+        return counted
+
+class FakeState:
+    """Состояние FSM без хранилища"""
+
+    async def finish(self):
+        pass
+
+    async def get_data(self):
+        return {}
+
+    async def get_state(self):
+        return None
+
+async def reply(*args, **kwargs):
+    pass
+
+def fake_callback(data: str, user_id: int):
+    return SimpleNamespace(
+        data=data,
+        from_user=SimpleNamespace(id=user_id),
+        message=SimpleNamespace(chat=SimpleNamespace(id=user_id), message_id=1, edit_text=reply, answer=reply),
+        answer=reply,
+    )
+
+def seed_tournament(db: DatabaseHandler, name: str, matches: int, user_id: int):
+    """Турнир: ставки пользователя на все матчи и игроков-соперников, результаты у половины матчей"""
+    db.add_tournament(name, 'queries', ADMIN_ID)
+    tournament_id = max(tournament.id for tournament in db.get_all_tournaments())
+    for i in range(matches):
+        db.add_match(tournament_id, '01.01.2030', f"{i // 60:02d}:{i % 60:02d}", f"Team {i}", f"Team {i + 1}", ADMIN_ID)
+    match_ids = [match.id for match in db.get_tournament_matches(tournament_id)]
+    for match_id in match_ids:
+        db.add_user_bet(user_id, match_id, '1-0')
+        for player_id in range(100, 100 + OTHER_PLAYERS):
+            db.add_user_bet(player_id, match_id, '2-2')
+    for match_id in match_ids[::2]:
+        db.update_match_result(match_id, '1-0')
+    return {'tournament_id': tournament_id, 'match_id': match_ids[-1]}
+
+def seed(db: DatabaseHandler):
+    for user_id in [1, 2] + list(range(100, 100 + OTHER_PLAYERS)):
+        db.register_user(user_id, f"+7{user_id:010d}", f"player{user_id}", 'hash', f"Player {user_id}")
+    small = seed_tournament(db, 'Small Cup', SMALL_MATCHES, 1)
+    large = seed_tournament(db, 'Large Cup', LARGE_MATCHES, 2)
+    with db.pool.connection() as conn:
+        conn.execute(
+            "INSERT INTO matches (tournament_id, match_date, match_time, team1, team2) VALUES (?, '', '', 'TBD', 'TBD')",
+            (large['tournament_id'],)
+        )
+    return (1, small), (2, large)
+
+def build_router() -> CallbackRouter:
+    """Маршрутизатор с обработчиками экранов пользователя и админа"""
+    dp = Dispatcher(Bot(token='123:abc'))
+    register_callback_handlers(dp)
+    register_admin_handlers(dp)
+    return get_callback_router(dp)
+
+async def count_calls(db: CountingDatabase, router: CallbackRouter, match_index: MatchIndex, data: str, user_id: int) -> list:
+    db.cache.invalidate()
+    db.calls = []
+    await router.dispatch(fake_callback(data, user_id), state=FakeState(), db=db, match_index=match_index)
+    return db.calls
+
+async def run(db: CountingDatabase, fixtures) -> int:
+    failures = 0
+    router = build_router()
+    # Индекс матчей прогрет: считаются обращения повторного открытия экрана
+    match_index = MatchIndex(db)
+    for user_id, ids in fixtures:
+        await match_index.get_available_matches(ids['tournament_id'], user_id)
+    for template, as_admin, budget in HANDLERS:
+        counts = []
+        for user_id, ids in fixtures:
+            calls = await count_calls(db, router, match_index, template.format(**ids), ADMIN_ID if as_admin else user_id)
+            counts.append(calls)
+        action, _ = router.parse(template)
+        small, large = (len(calls) for calls in counts)
+        ok = small == large and large <= budget
+        print(f"[{'ok' if ok else 'FAIL':4}] {action}: {small} -> {large} (budget {budget})")
+        if not ok:
+            failures += 1
+            print('       ' + ', '.join(counts[-1]))
+    return failures
+
+async def check_read_cache(db: CountingDatabase, fixtures) -> int:
+    """Проверка кэша чтения по его счетчикам"""
+    failures = 0
+    router = build_router()
+    match_index = MatchIndex(db)
+    for template, as_admin, _ in HANDLERS:
+        hits = 0
+        ok = True
+        for user_id, ids in fixtures:
+            data, user_id = template.format(**ids), ADMIN_ID if as_admin else user_id
+            await count_calls(db, router, match_index, data, user_id)
+            before = db.cache.stats()
+            await router.dispatch(fake_callback(data, user_id), state=FakeState(), db=db, match_index=match_index)
+            after = db.cache.stats()
+            hits += after['hits'] - before['hits']
+            ok = ok and after['misses'] == before['misses'] and after['version'] == before['version']
+        action, _ = router.parse(template)
+        print(f"[{'ok' if ok else 'FAIL':4}] read cache, repeated {action}: {hits} hit(s), no misses")
+        failures += not ok
+
+    tournament_id = fixtures[0][1]['tournament_id']
+    await db.get_all_tournaments()
+    before = db.cache.stats()
+    await db.update_tournament_status(tournament_id, 'active')
+    await db.get_all_tournaments()
+    after = db.cache.stats()
+    ok = after['version'] > before['version'] and after['misses'] == before['misses'] + 1
+    print(f"[{'ok' if ok else 'FAIL':4}] read cache, get_all_tournaments after update_tournament_status: miss")
+    return failures + (not ok)
+
+async def check_match_index(db: CountingDatabase, fixtures) -> int:
+    """Сверка индекса матчей с запросами к базе для каждого турнира и пользователя"""
+    failures = 0
+    match_index = MatchIndex(db)
+    user_ids = [user_id for user_id, _ in fixtures]
+    for _, ids in fixtures:
+        tournament_id = ids['tournament_id']
+        kickoffs = sorted(match.kickoff_ts for match in db.db.get_tournament_matches(tournament_id) if match.kickoff_ts)
+        moments = {'before': kickoffs[0] - 1, 'during': kickoffs[len(kickoffs) // 2], 'after': kickoffs[-1]}
+        for user_id in user_ids:
+            for moment, now_ts in moments.items():
+                db.db.get_current_timestamp = lambda: now_ts
+                expected = ([match.id for match in await db.get_available_tournament_matches(tournament_id, user_id)],
+                            await db.has_expired_matches_without_bet(tournament_id, user_id))
+                indexed = ([match.id for match in await match_index.get_available_matches(tournament_id, user_id, now_ts)],
+                           await match_index.has_expired_without_bet(tournament_id, user_id, now_ts))
+                ok = expected == indexed
+                print(f"[{'ok' if ok else 'FAIL':4}] match index: tournament {tournament_id}, user {user_id}, {moment}")
+                if not ok:
+                    failures += 1
+                    print(f"       database {expected}, index {indexed}")
+    del db.db.get_current_timestamp
+    return failures
+
+def main() -> int:
+    with scratch_db('queries.db') as sync_db:
+        fixtures = seed(sync_db)
+        db = CountingDatabase(sync_db)
+        failures = asyncio.run(run(db, fixtures))
+        cache_failures = asyncio.run(check_read_cache(db, fixtures))
+        mismatches = asyncio.run(check_match_index(db, fixtures))
+
+    print(f"\n{failures} handler(s) with per-row or over-budget queries")
+    print(f"{cache_failures} read cache check(s) failed")
+    print(f"{mismatches} match index answer(s) different from the database")
+    return 1 if failures or cache_failures or mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Проверка планов запросов горячих методов DatabaseHandler.
+
+Каждый метод выполняется на тестовой базе, все его SELECT-запросы
+перехватываются и прогоняются через EXPLAIN QUERY PLAN. Полное сканирование
+таблицы (SCAN без индекса) считается ошибкой; полнотекстовый поиск (MATCH по
+индексу FTS5) сканированием не считается.
+
+Запуск из корня репозитория:
+    python -m benchmarks.check_query_plans
+"""
+import re
+import sys
+
+from benchmarks._common import scratch_db
+from database.db_handler import DatabaseHandler
+
+FULL_SCAN = re.compile(r'\bSCAN (?!CONSTANT ROW)(\w+)\b(?! USING| VIRTUAL TABLE INDEX \d+:M)')
+
+def hot_paths(tournament_id, match_id, user_id):
+    """Методы, вызываемые на каждом действии пользователя"""
+    return [
+        ('get_tournament', (tournament_id,)),
+        ('get_all_tournaments', ()),
+        ('get_tournament_matches', (tournament_id,)),
+        ('get_available_tournament_matches', (tournament_id, user_id)),
+        ('has_expired_matches_without_bet', (tournament_id, user_id)),
+        ('get_expired_matches', ()),
+        ('get_upcoming_kickoffs', ()),
+        ('get_available_matches_for_user', (user_id,)),
+        ('get_match', (match_id,)),
+        ('get_match_with_bets', (match_id,)),
+        ('get_match_bets_count', (match_id,)),
+        ('get_user', (user_id,)),
+        ('get_user_bet', (user_id, match_id)),
+        ('get_user_bet_match_ids', (user_id,)),
+        ('get_user_bets', (user_id,)),
+        ('get_user_bets_count', (user_id,)),
+        ('get_user_bets_with_match_info', (user_id,)),
+        ('get_user_tournaments_with_bets', (user_id,)),
+        ('get_tournament_bets_by_user', (user_id, tournament_id)),
+        ('get_user_tournament_bets_count', (user_id, tournament_id)),
+        ('get_tournament_participants', (tournament_id,)),
+        ('get_tournament_participants', (tournament_id, 1)),
+        ('get_tournament_participants', (tournament_id, None, 10, 2)),
+        ('get_tournament_participants_count', (tournament_id,)),
+        ('get_tournament_standings', (tournament_id,)),
+        ('get_tournament_standings_count', (tournament_id,)),
+        ('get_user_standing', (tournament_id, user_id)),
+        ('get_standings_around_user', (tournament_id, user_id)),
+        ('get_bot_stats', ()),
+        ('get_users_count', ()),
+        ('get_users_page', ()),
+        ('get_users_page', (user_id,)),
+        ('get_users_page', (None, 10, user_id)),
+        ('search_users', ('play',)),
+        ('search_users', ('play', user_id)),
+        ('search_users', ('play', None, 10, user_id)),
+    ]
+
+def seed(db: DatabaseHandler):
+    db.register_user(1, '+70000000001', 'player', 'hash', 'Player')
+    db.add_tournament('Cup', 'plans', 1)
+    tournament_id = db.get_all_tournaments()[0][0]
+    db.add_match(tournament_id, '01.01.2030', '18:00', 'A', 'B', 1)
+    match_id = db.get_tournament_matches(tournament_id)[0][0]
+    db.add_user_bet(1, match_id, '1-0')
+    return tournament_id, match_id, 1
+
+def collect_plans(db: DatabaseHandler, method: str, args: tuple):
+    """Планы всех SELECT-запросов, выполненных методом"""
+    statements = []
+    with db.pool.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            getattr(db, method)(*args)
+        finally:
+            conn.set_trace_callback(None)
+
+        plans = []
+        for sql in statements:
+            if sql.lstrip().upper().startswith('SELECT'):
+                rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+                plans.append((sql, [row[-1] for row in rows]))
+        return plans
+
+def main() -> int:
+    failures = 0
+    with scratch_db('plans.db') as db:
+        for method, args in hot_paths(*seed(db)):
+            for sql, plan in collect_plans(db, method, args):
+                scans = [step for step in plan if FULL_SCAN.search(step)]
+                status = 'FAIL' if scans else 'ok'
+                print(f"[{status:4}] {method}: {'; '.join(plan)}")
+                if scans:
+                    failures += 1
+                    print('       ' + ' '.join(sql.split()))
+
+    print(f"\n{failures} query(ies) with full table scans")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
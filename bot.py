@@ -11,7 +11,13 @@ from handlers.login import register_login_handlers
 from handlers.profile import register_profile_handlers
 from handlers.callbacks import register_callback_handlers
 from handlers.admin import register_admin_handlers
-from utils.match_checker import start_match_checker
+from utils.match_checker import MatchScheduler
+from utils.match_index import MatchIndex
+from utils.message_helpers import edit_cache
+from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
+from middlewares.database import DatabaseMiddleware
+from config import config
 
 # Загружаем переменные окружения из .env файла
 load_dotenv()
@@ -22,6 +28,17 @@ logging.basicConfig(
     level=logging.INFO
 )
 
+async def run_wal_checkpoints(db: AsyncDatabaseHandler, interval: int):
+    """Периодический перенос журнала WAL в файл базы данных"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            busy, log_frames, checkpointed = await db.checkpoint()
+            if busy:
+                logging.info(f"Контрольная точка WAL не завершена: перенесено {checkpointed} из {log_frames} страниц")
+        except Exception as e:
+            logging.error(f"Ошибка при создании контрольной точки WAL: {e}")
+
 async def main():
     """Основная функция запуска бота"""
     # Получаем токен из переменных окружения
@@ -36,6 +53,16 @@ async def main():
     storage = MemoryStorage()
     dp = Dispatcher(bot, storage=storage)
     
+    # Единый обработчик базы данных на время работы бота (схема создается один раз)
+    db = AsyncDatabaseHandler(
+        DatabaseHandler(config.DATABASE_NAME, pragmas=config.get_db_pragmas()),
+        write_batch_size=config.DB_WRITE_BATCH_SIZE,
+        write_max_wait=config.DB_WRITE_MAX_WAIT,
+        cache_size=config.DB_READ_CACHE_SIZE
+    )
+    match_index = MatchIndex(db, config.MATCH_INDEX_TOURNAMENTS, config.MATCH_INDEX_USERS)
+    dp.middleware.setup(DatabaseMiddleware(db, match_index))
+    
     # Регистрация обработчиков (ВАЖНО: правильный порядок)
     register_start_handlers(dp)
     register_registration_handlers(dp)  # Должен быть зарегистрирован
@@ -44,20 +71,35 @@ async def main():
     register_callback_handlers(dp)
     register_admin_handlers(dp)
     
+    # Фоновые задачи, останавливаемые до закрытия базы данных
+    tasks = []
+    
     # Запуск бота
     try:
         logging.info("Бот запущен...")
         
         # Запускаем фоновую задачу проверки матчей
-        asyncio.create_task(start_match_checker())
+        scheduler = MatchScheduler(db)
+        db.subscribe('matches', scheduler.reschedule)
+        tasks.append(asyncio.create_task(scheduler.run()))
+        
+        if config.DB_JOURNAL_MODE.upper() == 'WAL':
+            tasks.append(asyncio.create_task(run_wal_checkpoints(db, config.DB_CHECKPOINT_INTERVAL)))
         
         await dp.start_polling()
     except Exception as e:
         logging.error(f"Ошибка при запуске бота: {e}")
     finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         await dp.storage.close()
         await dp.storage.wait_closed()
         await bot.session.close()
+        logging.info(f"Кэш чтения: {db.cache.stats()}")
+        logging.info(f"Индекс матчей: {match_index.stats()}")
+        logging.info(f"Изменения сообщений: {edit_cache.stats()}")
+        await db.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
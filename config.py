@@ -6,9 +6,37 @@ class Config:
     BOT_TOKEN: str = os.getenv('BOT_TOKEN')
     DATABASE_NAME: str = 'users.db'
     ADMIN_IDS: list = None
+    # Групповая фиксация записей: размер пакета и ожидание новых записей (сек.)
+    DB_WRITE_BATCH_SIZE: int = 64
+    DB_WRITE_MAX_WAIT: float = 0.005
+    # Настройки SQLite, применяемые к каждому соединению
+    DB_JOURNAL_MODE: str = 'WAL'
+    DB_SYNCHRONOUS: str = 'NORMAL'
+    DB_CACHE_SIZE: int = -16000  # отрицательное значение - размер в КиБ
+    DB_MMAP_SIZE: int = 64 * 1024 * 1024
+    DB_BUSY_TIMEOUT: int = 5000  # мс
+    DB_TEMP_STORE: str = 'MEMORY'
+    # Интервал контрольных точек WAL (сек.)
+    DB_CHECKPOINT_INTERVAL: int = 300
+    # Размер кэша турниров и расписаний матчей (число результатов запросов)
+    DB_READ_CACHE_SIZE: int = 256
+    # Размер индекса матчей (число турниров и пользователей со ставками)
+    MATCH_INDEX_TOURNAMENTS: int = 256
+    MATCH_INDEX_USERS: int = 10000
 
     def __post_init__(self):
         if self.ADMIN_IDS is None:
             self.ADMIN_IDS = [831040832]  # Замените на ваш ID
 
+    def get_db_pragmas(self) -> dict:
+        """PRAGMA-настройки соединений с базой данных"""
+        return {
+            'journal_mode': self.DB_JOURNAL_MODE,
+            'synchronous': self.DB_SYNCHRONOUS,
+            'cache_size': self.DB_CACHE_SIZE,
+            'mmap_size': self.DB_MMAP_SIZE,
+            'busy_timeout': self.DB_BUSY_TIMEOUT,
+            'temp_store': self.DB_TEMP_STORE,
+        }
+
 config = Config()
\ No newline at end of file
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from database.cache import QueryCache
+from database.db_handler import DatabaseHandler
+
+class AsyncDatabaseHandler:
+    """
+    Асинхронный интерфейс к DatabaseHandler.
+
+    Те же методы, что у DatabaseHandler, но в виде корутин: запросы выполняются
+    в отдельных потоках на соединениях из пула и не блокируют цикл событий.
+
+    Изменяющие методы выполняются одной задачей-писателем: записи из очереди
+    собираются в пакеты и фиксируются одной транзакцией, каждая запись - в
+    своей точке сохранения. Вызывающий получает результат своей записи.
+
+    Турниры и расписания матчей читаются через кэш (QueryCache): их меняет
+    только администратор, а читает каждый пользователь. Кэш сбрасывается
+    после изменяющих их методов. Возвращаемые из кэша списки общие для всех
+    вызывающих и не должны изменяться. Счетчики ставок и участников в строках
+    из кэша могут отставать - для них есть отдельные методы.
+    """
+
+    # Методы без обращения к базе вызываются напрямую
+    SYNC_METHODS = {'get_moscow_time', 'get_current_timestamp', 'is_match_expired'}
+
+    # Методы, изменяющие данные (выполняются через очередь записи)
+    WRITE_METHODS = {
+        'register_user', 'update_last_login', 'update_profile', 'update_user_password',
+        'add_tournament', 'update_tournament_status', 'update_tournament_rules', 'delete_tournament',
+        'add_match', 'update_match', 'delete_match',
+        'update_match_status', 'update_match_result', 'update_match_multiplier', 'complete_due_matches',
+        'add_user_bet', 'rebuild_tournament_standings',
+    }
+
+    # Изменяющие методы и разделы данных, подписчики которых уведомляются
+    # после успешного вызова
+    WRITE_EVENTS = {
+        'add_match': 'matches',
+        'update_match': 'matches',
+        'delete_match': 'matches',
+        'delete_tournament': 'matches',
+        'add_user_bet': 'bets',
+    }
+
+    # Методы чтения, результаты которых кэшируются
+    CACHED_METHODS = {'get_all_tournaments', 'get_all_tournaments_admin', 'get_tournament', 'get_tournament_matches'}
+
+    # Изменяющие методы, после которых кэш чтения сбрасывается
+    CACHE_INVALIDATING_METHODS = {
+        'add_tournament', 'update_tournament_status', 'update_tournament_rules', 'delete_tournament',
+        'add_match', 'update_match', 'delete_match',
+        'update_match_status', 'update_match_result', 'update_match_multiplier', 'complete_due_matches',
+    }
+
+    def __init__(self, db: DatabaseHandler, max_workers: int = None,
+                 write_batch_size: int = 64, write_max_wait: float = 0.005, cache_size: int = 256):
+        self.db = db
+        self.cache = QueryCache(cache_size)
+        self.write_batch_size = write_batch_size
+        self.write_max_wait = write_max_wait
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or db.pool.max_size,
+            thread_name_prefix='db'
+        )
+        self._listeners = defaultdict(list)
+        self._writes = None
+        self._writer = None
+        self._closing = False
+
+    def subscribe(self, topic: str, callback):
+        """Подписка на изменения раздела данных (callback получает аргументы изменяющего вызова)"""
+        self._listeners[topic].append(callback)
+
+    def _notify(self, topic: str, *args, **kwargs):
+        for callback in self._listeners[topic]:
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                logging.error(f"Ошибка в обработчике изменений '{topic}': {e}")
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if name.startswith('_') or name in self.SYNC_METHODS or not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            if name in self.CACHED_METHODS:
+                key = (name, args, tuple(sorted(kwargs.items())))
+                found, result = self.cache.get(key)
+                if found:
+                    return result
+                version = self.cache.version
+
+            call = partial(attr, *args, **kwargs)
+            if name in self.WRITE_METHODS:
+                result = await self._submit_write(call)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, call)
+
+            if name in self.CACHED_METHODS:
+                self.cache.put(key, result, version)
+            if result and name in self.CACHE_INVALIDATING_METHODS:
+                self.cache.invalidate()
+            if result and name in self.WRITE_EVENTS:
+                self._notify(self.WRITE_EVENTS[name], *args, **kwargs)
+            return result
+
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+        setattr(self, name, method)
+        return method
+
+    async def _submit_write(self, call):
+        """Постановка записи в очередь и ожидание ее результата"""
+        if self._closing:
+            raise RuntimeError("База данных закрывается: запись не принята")
+        if self._writer is None:
+            self._writes = asyncio.Queue()
+            self._writer = asyncio.create_task(self._write_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((call, future))
+        return await future
+
+    async def _collect_batch(self):
+        """Следующий пакет записей: ждет первую запись, затем добирает остальные"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._writes.get()]
+        deadline = loop.time() + self.write_max_wait
+
+        # Остальные записи берутся только get_nowait(): get(), отмененный по
+        # таймауту wait_for, может потерять уже извлеченную из очереди запись
+        while len(batch) < self.write_batch_size:
+            if not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            await asyncio.sleep(timeout)
+
+        return batch
+
+    def _execute_batch(self, calls):
+        """Выполнение пакета записей в одной транзакции"""
+        results = []
+        with self.db.pool.connection() as conn:
+            conn.execute('BEGIN')
+            for call in calls:
+                try:
+                    results.append((call(), None))
+                except Exception as e:
+                    results.append((None, e))
+        return results
+
+    async def _write_loop(self):
+        """Задача-писатель: выполняет записи пакетами"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self._execute_batch, [call for call, _ in batch]
+                )
+            except Exception as e:
+                logging.error(f"Ошибка при фиксации пакета из {len(batch)} записей: {e}")
+                results = [(None, e)] * len(batch)
+
+            for (_, future), (result, error) in zip(batch, results):
+                self._writes.task_done()
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    async def close(self):
+        """
+        Остановка: новые записи не принимаются, записи из очереди фиксируются,
+        затем останавливаются потоки и закрываются соединения
+        """
+        self._closing = True
+        if self._writer is not None:
+            await self._writes.join()
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(self._executor.shutdown, wait=True))
+        self.db.close()
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+class QueryCache:
+    """
+    Кэш результатов чтения с вытеснением давно не использованных записей (LRU).
+
+    Записи действительны для текущей версии данных. Изменение данных
+    увеличивает версию и очищает кэш; результат чтения, начатого до
+    изменения, не сохраняется (put с прежней версией игнорируется).
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Найдено ли значение и само значение"""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def put(self, key: Hashable, value: Any, version: int):
+        """Сохранение значения, прочитанного при версии данных version"""
+        if version != self.version or self.max_size <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: Hashable):
+        """Изменилось одно значение: новая версия, сбрасывается только оно"""
+        self.version += 1
+        self._entries.pop(key, None)
+
+    def invalidate(self):
+        """Данные изменились: новая версия, прежние значения сбрасываются"""
+        self.version += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Счетчики кэша"""
+        return {
+            'size': len(self._entries),
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
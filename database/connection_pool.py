@@ -0,0 +1,139 @@
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from queue import Queue, Empty, Full
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Не удалось получить соединение из пула за отведенное время"""
+
+class ConnectionPool:
+    """
+    Пул долгоживущих соединений с SQLite.
+
+    pragmas - PRAGMA-настройки (имя: значение), применяемые к каждому
+    новому соединению.
+    """
+
+    def __init__(self, db_name: str, max_size: int = 4, timeout: float = 10.0, cached_statements: int = 256,
+                 pragmas: dict = None):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.pragmas = pragmas or {}
+
+        self._idle = Queue(maxsize=max_size)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._connections = []
+        self._local = threading.local()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        """Открытие нового соединения"""
+        conn = sqlite3.connect(
+            self.db_name,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        try:
+            for name, value in self.pragmas.items():
+                conn.execute(f'PRAGMA {name} = {value}')
+        except sqlite3.Error:
+            conn.close()
+            raise
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Получение соединения из пула (блокируется, если все соединения заняты)"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(f"Timed out waiting for a connection to {self.db_name}")
+
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        try:
+            return self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        """Возврат соединения в пул"""
+        if conn.in_transaction:
+            conn.rollback()
+
+        if self._closed:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except Full:
+                conn.close()
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Соединение на время одной операции.
+
+        При выходе без ошибок транзакция фиксируется, при исключении откатывается.
+        Вложенные вызовы в том же потоке получают то же соединение и не
+        завершают внешнюю транзакцию; если она уже открыта, вложенный вызов
+        выполняется в точке сохранения и при исключении откатывается только он.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            if not conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute('SAVEPOINT nested')
+            try:
+                yield conn
+            except Exception:
+                conn.execute('ROLLBACK TO nested')
+                conn.execute('RELEASE nested')
+                raise
+            conn.execute('RELEASE nested')
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self.release(conn)
+
+    def close(self):
+        """Закрытие всех соединений пула"""
+        self._closed = True
+        with self._lock:
+            connections, self._connections = self._connections, []
+
+        while True:
+            try:
+                self._idle.get_nowait()
+            except Empty:
+                break
+
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.error(f"Error closing database connection: {e}")
@@ -1,135 +1,251 @@
+import re
 import sqlite3
 import logging
+import time
 from typing import Optional, List
 from datetime import datetime
 import pytz
-from database.models import User
+from database.models import User, Tournament, Match, Bet, Standing, Participant, BotStats, BetStatus, row_factory
+from database.connection_pool import ConnectionPool
+from database.migrations import apply_migrations
+from database.standings import (
+    EXACT_SCORE_POINTS, GOAL_DIFF_POINTS, OUTCOME_POINTS,
+    rescore_tournament, settle_match, update_positions, parse_goals
+)
+from utils.time_utils import get_kickoff_timestamp
 
 class DatabaseHandler:
-    def __init__(self, db_name: str):
+    def __init__(self, db_name: str, pool_size: int = 4, pragmas: dict = None):
         self.db_name = db_name
+        self.pool = ConnectionPool(db_name, max_size=pool_size, pragmas=pragmas)
         self.init_database()
+
+    def close(self):
+        """Закрытие соединений с базой данных"""
+        self.pool.close()
+
+    def checkpoint(self, mode: str = 'PASSIVE'):
+        """Перенос изменений из журнала WAL в файл базы данных"""
+        with self.pool.connection() as conn:
+            return conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
     
     def get_moscow_time(self):
         """Получение текущего московского времени"""
         moscow_tz = pytz.timezone('Europe/Moscow')
         return datetime.now(moscow_tz)
 
-    def is_match_expired(self, match_date: str, match_time: str) -> bool:
+    def get_current_timestamp(self) -> int:
+        """Текущее время в секундах Unix"""
+        return int(time.time())
+
+    def is_match_expired(self, kickoff_ts: Optional[int]) -> bool:
         """Проверка, истекло ли время матча"""
-        try:
-            moscow_tz = pytz.timezone('Europe/Moscow')
-            current_time = self.get_moscow_time()
-            
-            # Парсим дату и время матча
-            match_datetime_str = f"{match_date} {match_time}"
-            match_datetime = datetime.strptime(match_datetime_str, '%d.%m.%Y %H:%M')
-            match_datetime = moscow_tz.localize(match_datetime)
-            
-            # Сравниваем с текущим временем
-            return current_time >= match_datetime
-        except Exception as e:
-            logging.error(f"Error checking match expiration: {e}")
+        if kickoff_ts is None:
             return False
+        return self.get_current_timestamp() >= kickoff_ts
     
-    def get_available_tournament_matches(self, tournament_id: int, user_id: int):
+    def get_available_tournament_matches(self, tournament_id: int, user_id: int) -> List[Match]:
         """Получение доступных матчей турнира (не истекших и без ставок пользователя)"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Match)
             cursor.execute('''
                 SELECT m.* 
                 FROM matches m
                 WHERE m.tournament_id = ? 
+                AND m.kickoff_ts > ?
                 AND m.id NOT IN (
                     SELECT match_id FROM user_bets WHERE user_id = ?
                 )
-                ORDER BY m.match_date, m.match_time
-            ''', (tournament_id, user_id))
-            all_matches = cursor.fetchall()
-            
-            # Фильтруем матчи по времени
-            available_matches = []
-            for match in all_matches:
-                if not self.is_match_expired(match[2], match[3]):
-                    available_matches.append(match)
-            
-            return available_matches
+                ORDER BY m.kickoff_ts
+            ''', (tournament_id, self.get_current_timestamp(), user_id))
+            return cursor.fetchall()
     
-    def get_expired_matches(self):
-        """Получение всех истекших матчей"""
-        with sqlite3.connect(self.db_name) as conn:
+    def has_expired_matches_without_bet(self, tournament_id: int, user_id: int) -> bool:
+        """Есть ли в турнире истекшие матчи, на которые пользователь не сделал ставку"""
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM matches')
-            all_matches = cursor.fetchall()
-            
-            expired_matches = []
-            for match in all_matches:
-                if self.is_match_expired(match[2], match[3]):
-                    expired_matches.append(match)
-            
-            return expired_matches
+            cursor.execute('''
+                SELECT EXISTS (
+                    SELECT 1 FROM matches m
+                    WHERE m.tournament_id = ?
+                    AND m.kickoff_ts <= ?
+                    AND NOT EXISTS (
+                        SELECT 1 FROM user_bets ub WHERE ub.user_id = ? AND ub.match_id = m.id
+                    )
+                )
+            ''', (tournament_id, self.get_current_timestamp(), user_id))
+            return bool(cursor.fetchone()[0])
+    
+    def get_expired_matches(self) -> List[Match]:
+        """Получение истекших матчей, статус которых еще не обновлен"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(Match)
+            cursor.execute('''
+                SELECT * FROM matches
+                WHERE status = 'scheduled' AND kickoff_ts <= ?
+                ORDER BY kickoff_ts
+            ''', (self.get_current_timestamp(),))
+            return cursor.fetchall()
+    
+    def get_upcoming_kickoffs(self):
+        """Время начала всех матчей, еще не переведенных в статус 'completed'"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT kickoff_ts, id FROM matches
+                WHERE status = 'scheduled' AND kickoff_ts IS NOT NULL
+                ORDER BY kickoff_ts
+            ''')
+            return cursor.fetchall()
+    
+    def complete_due_matches(self, now_ts: int = None):
+        """Перевод всех начавшихся матчей в статус 'completed' одним запросом"""
+        if now_ts is None:
+            now_ts = self.get_current_timestamp()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE matches SET status = 'completed'
+                WHERE status = 'scheduled' AND kickoff_ts <= ?
+                RETURNING id, team1, team2
+            ''', (now_ts,))
+            return cursor.fetchall()
     
     def update_match_status(self, match_id: int, status: str) -> bool:
         """Обновление статуса матча"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE matches SET status = ? WHERE id = ?
                 ''', (status, match_id))
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             logging.error(f"Error updating match status: {e}")
             return False
     
     def update_match_result(self, match_id: int, result: str) -> bool:
-        """Обновление результата матча"""
+        """Обновление результата матча и начисление очков за ставки на него"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            result_home, result_away = parse_goals(result)
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    UPDATE matches SET result = ?, status = 'completed' WHERE id = ?
-                ''', (result, match_id))
-                conn.commit()
-                return cursor.rowcount > 0
+                    UPDATE matches SET result = ?, result_home = ?, result_away = ?, status = 'completed'
+                    WHERE id = ?
+                ''', (result, result_home, result_away, match_id))
+                if cursor.rowcount == 0:
+                    return False
+                settle_match(conn, match_id)
+                return True
         except Exception as e:
             logging.error(f"Error updating match result: {e}")
             return False
 
-    def get_match_with_bets(self, match_id: int):
-        """Получение информации о матче со ставками пользователей"""
-        with sqlite3.connect(self.db_name) as conn:
+    def update_match_multiplier(self, match_id: int, multiplier: int) -> bool:
+        """Изменение множителя очков за матч и пересчет ставок на него"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('UPDATE matches SET points_multiplier = ? WHERE id = ?', (multiplier, match_id))
+                if cursor.rowcount == 0:
+                    return False
+                settle_match(conn, match_id)
+                return True
+        except Exception as e:
+            logging.error(f"Error updating match multiplier: {e}")
+            return False
+
+    def rebuild_tournament_standings(self, tournament_id: int) -> bool:
+        """Полный пересчет очков ставок и таблицы результатов турнира по его правилам"""
+        try:
+            with self.pool.connection() as conn:
+                rescore_tournament(conn, tournament_id)
+                return True
+        except Exception as e:
+            logging.error(f"Error rebuilding standings: {e}")
+            return False
+
+    def get_tournament_standings(self, tournament_id: int, limit: int = 10, offset: int = 0) -> List[Standing]:
+        """Страница таблицы результатов турнира (по местам)"""
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Standing)
             cursor.execute('''
-                SELECT m.*, COUNT(ub.id) as bets_count
-                FROM matches m
-                LEFT JOIN user_bets ub ON m.id = ub.match_id
-                WHERE m.id = ?
-                GROUP BY m.id
-            ''', (match_id,))
-            result = cursor.fetchone()
-            return result
+                SELECT s.*, u.username, u.full_name
+                FROM tournament_standings s
+                LEFT JOIN users u ON u.user_id = s.user_id
+                WHERE s.tournament_id = ? AND s.position > ?
+                ORDER BY s.position
+                LIMIT ?
+            ''', (tournament_id, offset, limit))
+            return cursor.fetchall()
+
+    def get_tournament_standings_count(self, tournament_id: int) -> int:
+        """Количество участников в таблице результатов турнира (места идут подряд с 1)"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(position) FROM tournament_standings WHERE tournament_id = ?', (tournament_id,))
+            return cursor.fetchone()[0] or 0
+
+    def get_user_standing(self, tournament_id: int, user_id: int) -> Optional[Standing]:
+        """Строка пользователя в таблице результатов турнира (с его местом)"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(Standing)
+            cursor.execute('''
+                SELECT s.*, u.username, u.full_name
+                FROM tournament_standings s
+                LEFT JOIN users u ON u.user_id = s.user_id
+                WHERE s.tournament_id = ? AND s.user_id = ?
+            ''', (tournament_id, user_id))
+            return cursor.fetchone()
+
+    def get_standings_around_user(self, tournament_id: int, user_id: int, radius: int = 2) -> List[Standing]:
+        """Место пользователя и соседние строки таблицы (radius мест выше и ниже)"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(Standing)
+            cursor.execute('''
+                SELECT s.*, u.username, u.full_name
+                FROM tournament_standings me
+                JOIN tournament_standings s
+                  ON s.tournament_id = me.tournament_id
+                 AND s.position BETWEEN me.position - ? AND me.position + ?
+                LEFT JOIN users u ON u.user_id = s.user_id
+                WHERE me.tournament_id = ? AND me.user_id = ?
+                ORDER BY s.position
+            ''', (radius, radius, tournament_id, user_id))
+            return cursor.fetchall()
+
+    def get_match_with_bets(self, match_id: int) -> Optional[Match]:
+        """Получение информации о матче с количеством ставок (счетчик matches.bets_count)"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(Match)
+            cursor.execute('SELECT * FROM matches WHERE id = ?', (match_id,))
+            return cursor.fetchone()
 
     def get_match_bets_count(self, match_id: int) -> int:
         """Получение количества ставок на матч"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT COUNT(*) FROM user_bets WHERE match_id = ?
-            ''', (match_id,))
+            cursor.execute('SELECT bets_count FROM matches WHERE id = ?', (match_id,))
             result = cursor.fetchone()
             return result[0] if result else 0
     
-    def get_user_bets_with_match_info(self, user_id: int) -> list:
+    def get_user_bets_with_match_info(self, user_id: int) -> List[Bet]:
         """Получить ставки пользователя с информацией о матчах"""
-        with self.conn:
-            cursor = self.conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(Bet)
             cursor.execute('''
                 SELECT 
-                    b.bet_id,
+                    b.id,
                     b.match_id,
-                    b.predicted_score,
+                    b.score,
                     b.bet_date,
                     m.match_date,
                     m.match_time,
@@ -138,87 +254,29 @@ class DatabaseHandler:
                     m.result as match_result,  -- Берем результат из таблицы matches
                     t.name as tournament_name
                 FROM user_bets b
-                JOIN matches m ON b.match_id = m.match_id
-                JOIN tournaments t ON m.tournament_id = t.tournament_id
+                JOIN matches m ON b.match_id = m.id
+                JOIN tournaments t ON m.tournament_id = t.id
                 WHERE b.user_id = ?
-                ORDER BY m.match_date DESC, m.match_time DESC
+                ORDER BY m.kickoff_ts DESC
             ''', (user_id,))
             
-            bets = cursor.fetchall()
-            return bets
+            return cursor.fetchall()
         
     def init_database(self):
-        """Инициализация базы данных"""
-        with sqlite3.connect(self.db_name) as conn:
-            cursor = conn.cursor()
-            
-            # Таблица пользователей
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    phone_number TEXT UNIQUE NOT NULL,
-                    username TEXT UNIQUE,
-                    full_name TEXT,
-                    password_hash TEXT NOT NULL,
-                    registration_date TEXT,
-                    last_login TEXT
-                )
-            ''')
-            
-            # Таблица турниров
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tournaments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    status TEXT DEFAULT 'active',
-                    created_date TEXT,
-                    created_by INTEGER
-                )
-            ''')
-            
-            # Таблица матчей
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS matches (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tournament_id INTEGER NOT NULL,
-                    match_date TEXT NOT NULL,
-                    match_time TEXT NOT NULL,
-                    team1 TEXT NOT NULL,
-                    team2 TEXT NOT NULL,
-                    status TEXT DEFAULT 'scheduled',
-                    result TEXT,
-                    created_date TEXT,
-                    created_by INTEGER,
-                    FOREIGN KEY (tournament_id) REFERENCES tournaments (id)
-                )
-            ''')
-            
-            # Таблица ставок пользователей
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_bets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    match_id INTEGER NOT NULL,
-                    score TEXT NOT NULL,
-                    bet_date TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id),
-                    FOREIGN KEY (match_id) REFERENCES matches (id),
-                    UNIQUE(user_id, match_id)
-                )
-            ''')
-            conn.commit()
+        """Инициализация базы данных (применение миграций схемы)"""
+        with self.pool.connection() as conn:
+            apply_migrations(conn)
     
     def is_phone_taken(self, phone_number: str) -> bool:
         """Проверка, занят ли номер телефона"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT user_id FROM users WHERE phone_number = ?', (phone_number,))
             return cursor.fetchone() is not None
     
     def is_username_taken(self, username: str) -> bool:
         """Проверка, занят ли логин"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT user_id FROM users WHERE username = ?', (username,))
             return cursor.fetchone() is not None
@@ -226,7 +284,7 @@ class DatabaseHandler:
     def register_user(self, user_id: int, phone_number: str, username: str, password_hash: str, full_name: str = None) -> bool:
         """Регистрация нового пользователя с логином, паролем и ФИО"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем, не заняты ли номер или логин
@@ -239,50 +297,37 @@ class DatabaseHandler:
                     INSERT INTO users (user_id, phone_number, username, full_name, password_hash, registration_date, last_login)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (user_id, phone_number, username, full_name, password_hash, self.get_moscow_time(), self.get_moscow_time()))
-                conn.commit()
                 return True
         except sqlite3.IntegrityError:
             return False
     
     def get_user(self, user_id: int) -> Optional[User]:
         """Получение пользователя по ID"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(User)
             cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-            row = cursor.fetchone()
-            
-            if row:
-                return User(
-                    user_id=row[0],
-                    phone_number=row[1],
-                    username=row[2],
-                    full_name=row[3],
-                    registration_date=row[5],
-                    last_login=row[6]
-                )
-            return None
+            return cursor.fetchone()
     
-    def get_user_by_username(self, username: str):
+    def get_user_by_username(self, username: str) -> Optional[User]:
         """Получение пользователя по логину"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(User)
             cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-            row = cursor.fetchone()
-            
-            if row:
-                return User(
-                    user_id=row[0],
-                    phone_number=row[1],
-                    username=row[2],
-                    full_name=row[3],
-                    registration_date=row[5],
-                    last_login=row[6]
-                )
-            return None
+            return cursor.fetchone()
+    
+    def get_user_by_phone(self, phone_number: str) -> Optional[User]:
+        """Получение пользователя по номеру телефона"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(User)
+            cursor.execute('SELECT * FROM users WHERE phone_number = ?', (phone_number,))
+            return cursor.fetchone()
     
     def verify_password(self, user_id: int, password_hash: str) -> bool:
         """Проверка пароля пользователя"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT password_hash FROM users WHERE user_id = ?', (user_id,))
             row = cursor.fetchone()
@@ -293,17 +338,16 @@ class DatabaseHandler:
     
     def update_last_login(self, user_id: int):
         """Обновление времени последнего входа"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE users SET last_login = ? WHERE user_id = ?
             ''', (self.get_moscow_time(), user_id))
-            conn.commit()
     
     def update_profile(self, user_id: int, username: str = None, full_name: str = None) -> bool:
         """Обновление профиля пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 if username and full_name:
@@ -322,7 +366,6 @@ class DatabaseHandler:
                         WHERE user_id = ?
                     ''', (full_name, self.get_moscow_time(), user_id))
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             logging.error(f"Error updating profile: {e}")
@@ -331,13 +374,12 @@ class DatabaseHandler:
     def update_user_password(self, user_id: int, new_password_hash: str) -> bool:
         """Обновление пароля пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE users SET password_hash = ?, last_login = ?
                     WHERE user_id = ?
                 ''', (new_password_hash, self.get_moscow_time(), user_id))
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             logging.error(f"Error updating password: {e}")
@@ -347,93 +389,194 @@ class DatabaseHandler:
         """Проверка существования пользователя"""
         return self.get_user(user_id) is not None
     
-    def get_all_users(self) -> List[User]:
-        """Получение всех пользователей (для админа)"""
-        with sqlite3.connect(self.db_name) as conn:
+    def get_users_page(self, after_cursor: int = None, limit: int = 10, before_cursor: int = None) -> List[User]:
+        """
+        Страница пользователей (для админа), новые первыми.
+
+        after_cursor - следующая страница, before_cursor - предыдущая; курсор -
+        user_id пользователя из предыдущей выборки.
+        """
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM users ORDER BY registration_date DESC')
-            rows = cursor.fetchall()
-            
-            users = []
-            for row in rows:
-                users.append(User(
-                    user_id=row[0],
-                    phone_number=row[1],
-                    username=row[2],
-                    full_name=row[3],
-                    registration_date=row[5],
-                    last_login=row[6]
-                ))
-            return users
+            cursor.row_factory = row_factory(User)
+            if before_cursor is not None:
+                cursor.execute('''
+                    SELECT * FROM (
+                        SELECT * FROM users
+                        WHERE (registration_date, user_id) > (SELECT registration_date, user_id FROM users WHERE user_id = ?)
+                        ORDER BY registration_date, user_id
+                        LIMIT ?
+                    )
+                    ORDER BY registration_date DESC, user_id DESC
+                ''', (before_cursor, limit))
+            elif after_cursor is not None:
+                cursor.execute('''
+                    SELECT * FROM users
+                    WHERE (registration_date, user_id) < (SELECT registration_date, user_id FROM users WHERE user_id = ?)
+                    ORDER BY registration_date DESC, user_id DESC
+                    LIMIT ?
+                ''', (after_cursor, limit))
+            else:
+                cursor.execute('''
+                    SELECT * FROM users ORDER BY registration_date DESC, user_id DESC LIMIT ?
+                ''', (limit,))
+            return cursor.fetchall()
+
+    def search_users(self, query: str, after_cursor: int = None, limit: int = 10, before_cursor: int = None) -> List[User]:
+        """
+        Поиск пользователей по началу слов логина, имени и телефона (все слова
+        запроса должны найтись). Результаты упорядочены по user_id, курсоры -
+        как в get_users_page.
+        """
+        words = re.findall(r'\w+', query.lower())
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(User)
+            if before_cursor is not None:
+                cursor.execute('''
+                    SELECT * FROM (
+                        SELECT u.* FROM users_fts f
+                        JOIN users u ON u.user_id = f.rowid
+                        WHERE users_fts MATCH ? AND f.rowid < ?
+                        ORDER BY f.rowid DESC
+                        LIMIT ?
+                    )
+                    ORDER BY user_id
+                ''', (match, before_cursor, limit))
+            else:
+                cursor.execute('''
+                    SELECT u.* FROM users_fts f
+                    JOIN users u ON u.user_id = f.rowid
+                    WHERE users_fts MATCH ? AND f.rowid > ?
+                    ORDER BY f.rowid
+                    LIMIT ?
+                ''', (match, after_cursor if after_cursor is not None else -1, limit))
+            return cursor.fetchall()
     
+    def get_bot_stats(self, now_ts: int = None) -> BotStats:
+        """
+        Статистика бота одним запросом: итоговые счетчики из bot_stats и
+        ставки по часам из stats_hourly (не больше суток строк), поэтому время
+        не растет с историей.
+        """
+        now_ts = now_ts if now_ts is not None else self.get_current_timestamp()
+        day_start = self.get_moscow_time().replace(hour=0, minute=0, second=0, microsecond=0)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(BotStats)
+            cursor.execute('''
+                SELECT s.*,
+                    (SELECT COALESCE(SUM(bets), 0) FROM stats_hourly WHERE hour_ts >= ?) AS bets_today,
+                    (SELECT COALESCE(SUM(bets), 0) FROM stats_hourly WHERE hour_ts >= ?) AS bets_last_hour,
+                    (SELECT COALESCE(SUM(bets), 0) FROM stats_hourly WHERE hour_ts >= ?) AS bets_last_24h,
+                    (SELECT COUNT(*) FROM users WHERE last_active_ts >= ?) AS active_users_24h
+                FROM bot_stats s
+                WHERE s.id = 1
+            ''', (
+                int(day_start.timestamp()) // 3600 * 3600,
+                now_ts // 3600 * 3600,
+                (now_ts - 86400) // 3600 * 3600 + 3600,
+                now_ts - 86400,
+            ))
+            return cursor.fetchone() or BotStats()
+
     def get_users_count(self) -> int:
         """Получение количества пользователей"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM users')
-            return cursor.fetchone()[0]
+            cursor.execute('SELECT users FROM bot_stats WHERE id = 1')
+            row = cursor.fetchone()
+            return row[0] if row else 0
     
     # Методы для турниров
     def add_tournament(self, name: str, description: str, created_by: int) -> bool:
         """Добавление нового турнира"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO tournaments (name, description, created_date, created_by)
-                    VALUES (?, ?, ?, ?)
-                ''', (name, description, self.get_moscow_time(), created_by))
-                conn.commit()
+                    INSERT INTO tournaments (name, description, created_date, created_by,
+                                             exact_points, diff_points, outcome_points)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (name, description, self.get_moscow_time(), created_by,
+                      EXACT_SCORE_POINTS, GOAL_DIFF_POINTS, OUTCOME_POINTS))
                 return True
         except Exception as e:
             logging.error(f"Error adding tournament: {e}")
             return False
     
-    def get_all_tournaments(self):
+    def get_all_tournaments(self) -> List[Tournament]:
         """Получение всех активных турниров"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM tournaments WHERE status = "active" ORDER BY created_date DESC')
+            cursor.row_factory = row_factory(Tournament)
+            cursor.execute("SELECT * FROM tournaments WHERE status = 'active' ORDER BY created_date DESC")
             return cursor.fetchall()
     
-    def get_all_tournaments_admin(self):
+    def get_all_tournaments_admin(self) -> List[Tournament]:
         """Получение всех турниров (включая неактивные) для админа"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Tournament)
             cursor.execute('SELECT * FROM tournaments ORDER BY created_date DESC')
             return cursor.fetchall()
     
-    def get_tournament(self, tournament_id: int):
+    def get_tournament(self, tournament_id: int) -> Optional[Tournament]:
         """Получение турнира по ID"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Tournament)
             cursor.execute('SELECT * FROM tournaments WHERE id = ?', (tournament_id,))
             return cursor.fetchone()
     
     def update_tournament_status(self, tournament_id: int, status: str) -> bool:
         """Обновление статуса турнира"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE tournaments SET status = ? WHERE id = ?
                 ''', (status, tournament_id))
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             logging.error(f"Error updating tournament status: {e}")
             return False
     
+    def update_tournament_rules(self, tournament_id: int, exact_points: int, diff_points: int, outcome_points: int) -> bool:
+        """Изменение правил начисления очков турнира и полный пересчет его очков"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE tournaments SET exact_points = ?, diff_points = ?, outcome_points = ?
+                    WHERE id = ?
+                ''', (exact_points, diff_points, outcome_points, tournament_id))
+                if cursor.rowcount == 0:
+                    return False
+                rescore_tournament(conn, tournament_id)
+                return True
+        except Exception as e:
+            logging.error(f"Error updating tournament rules: {e}")
+            return False
+
     def delete_tournament(self, tournament_id: int) -> bool:
         """Удаление турнира"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
-                # Сначала удаляем все матчи турнира
+                # Сначала удаляем ставки (триггеры уменьшают счетчики) и матчи турнира
+                cursor.execute(
+                    'DELETE FROM user_bets WHERE match_id IN (SELECT id FROM matches WHERE tournament_id = ?)',
+                    (tournament_id,)
+                )
                 cursor.execute('DELETE FROM matches WHERE tournament_id = ?', (tournament_id,))
+                cursor.execute('DELETE FROM tournament_standings WHERE tournament_id = ?', (tournament_id,))
+                cursor.execute('DELETE FROM tournament_participants WHERE tournament_id = ?', (tournament_id,))
                 # Затем удаляем сам турнир
                 cursor.execute('DELETE FROM tournaments WHERE id = ?', (tournament_id,))
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             logging.error(f"Error deleting tournament: {e}")
@@ -443,43 +586,79 @@ class DatabaseHandler:
     def add_match(self, tournament_id: int, match_date: str, match_time: str, team1: str, team2: str, created_by: int) -> bool:
         """Добавление матча в турнир"""
         try:
-            with self.conn:
-                cursor = self.conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO matches (tournament_id, match_date, match_time, team1, team2, created_by, result)
-                    VALUES (?, ?, ?, ?, ?, ?, NULL)  -- Явно устанавливаем result в NULL
-                ''', (tournament_id, match_date, match_time, team1, team2, created_by))
+                    INSERT INTO matches (tournament_id, match_date, match_time, kickoff_ts, team1, team2, created_by, result)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, NULL)  -- Явно устанавливаем result в NULL
+                ''', (tournament_id, match_date, match_time, get_kickoff_timestamp(match_date, match_time), team1, team2, created_by))
                 return True
         except Exception as e:
             logging.error(f"Error adding match: {e}")
             return False
     
-    def get_tournament_matches(self, tournament_id: int):
+    def get_tournament_matches(self, tournament_id: int) -> List[Match]:
         """Получение всех матчей турнира"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Match)
             cursor.execute('''
                 SELECT * FROM matches 
                 WHERE tournament_id = ? 
-                ORDER BY match_date, match_time
+                ORDER BY kickoff_ts
             ''', (tournament_id,))
             return cursor.fetchall()
     
-    def get_match(self, match_id: int):
+    def get_match(self, match_id: int) -> Optional[Match]:
         """Получение матча по ID"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Match)
             cursor.execute('SELECT * FROM matches WHERE id = ?', (match_id,))
             return cursor.fetchone()
     
     def delete_match(self, match_id: int) -> bool:
         """Удаление матча"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('DELETE FROM matches WHERE id = ?', (match_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+                # Очки за удаленный матч снимаются вместе с его результатом
+                cursor.execute('''
+                    UPDATE matches SET result_home = NULL, result_away = NULL
+                    WHERE id = ? AND result_home IS NOT NULL
+                ''', (match_id,))
+                if cursor.rowcount:
+                    settle_match(conn, match_id)
+                # Участники, у которых не останется ставок в турнире, выбывают из таблицы
+                cursor.execute('''
+                    DELETE FROM tournament_standings
+                    WHERE tournament_id = (SELECT tournament_id FROM matches WHERE id = ?)
+                      AND user_id IN (SELECT user_id FROM user_bets WHERE match_id = ?)
+                      AND bets_settled = 0
+                      AND NOT EXISTS (
+                          SELECT 1 FROM user_bets ub
+                          JOIN matches m ON m.id = ub.match_id
+                          WHERE ub.user_id = tournament_standings.user_id
+                            AND m.tournament_id = tournament_standings.tournament_id
+                            AND ub.match_id != ?
+                      )
+                ''', (match_id, match_id, match_id))
+                pruned = cursor.rowcount
+                # Ставка на этот матч - единственная у участника
+                cursor.execute('''
+                    DELETE FROM tournament_participants
+                    WHERE tournament_id = (SELECT tournament_id FROM matches WHERE id = ?)
+                      AND user_id IN (SELECT user_id FROM user_bets WHERE match_id = ?)
+                      AND bets_count = 1
+                ''', (match_id, match_id))
+                cursor.execute('DELETE FROM user_bets WHERE match_id = ?', (match_id,))
+                cursor.execute('DELETE FROM matches WHERE id = ? RETURNING tournament_id', (match_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    return False
+                if pruned:
+                    update_positions(conn, row[0])
+                return True
         except Exception as e:
             logging.error(f"Error deleting match: {e}")
             return False
@@ -487,7 +666,7 @@ class DatabaseHandler:
     def update_match(self, match_id: int, match_date: str = None, match_time: str = None, team1: str = None, team2: str = None) -> bool:
         """Обновление информации о матче"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 updates = []
@@ -511,8 +690,17 @@ class DatabaseHandler:
                     cursor.execute(f'''
                         UPDATE matches SET {", ".join(updates)} WHERE id = ?
                     ''', params)
-                    conn.commit()
-                    return cursor.rowcount > 0
+                    updated = cursor.rowcount > 0
+                    
+                    # Пересчитываем время начала по сохраненным дате и времени
+                    if updated and (match_date or match_time):
+                        cursor.execute('SELECT match_date, match_time FROM matches WHERE id = ?', (match_id,))
+                        row = cursor.fetchone()
+                        cursor.execute(
+                            'UPDATE matches SET kickoff_ts = ? WHERE id = ?',
+                            (get_kickoff_timestamp(row[0], row[1]), match_id)
+                        )
+                    return updated
                 return False
                 
         except Exception as e:
@@ -520,82 +708,93 @@ class DatabaseHandler:
             return False
 
     # Методы для ставок
-    def add_user_bet(self, user_id: int, match_id: int, score: str) -> bool:
-        """Добавление ставки пользователя"""
+    def add_user_bet(self, user_id: int, match_id: int, score: str, now_ts: int = None) -> Optional[str]:
+        """
+        Добавление или изменение ставки пользователя одним запросом.
+
+        Ставка записывается, только если матч еще не начался (проверка в том же
+        запросе). Возвращает BetStatus или None при ошибке.
+        """
+        if now_ts is None:
+            now_ts = self.get_current_timestamp()
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            score_home, score_away = parse_goals(score)
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO user_bets (user_id, match_id, score, bet_date)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, match_id, score, self.get_moscow_time()))
-                conn.commit()
-                return True
-        except sqlite3.IntegrityError:
-            # Обновляем ставку если она уже существует
-            return self.update_user_bet(user_id, match_id, score)
+                    INSERT INTO user_bets (user_id, match_id, score, score_home, score_away, bet_date)
+                    SELECT ?, id, ?, ?, ?, ? FROM matches
+                    WHERE id = ? AND kickoff_ts > ?
+                    ON CONFLICT(user_id, match_id) DO UPDATE SET
+                        score = excluded.score,
+                        score_home = excluded.score_home,
+                        score_away = excluded.score_away,
+                        edited_date = excluded.bet_date
+                    RETURNING edited_date IS NULL
+                ''', (user_id, score, score_home, score_away, self.get_moscow_time(), match_id, now_ts))
+                row = cursor.fetchone()
+                if row is None:
+                    return BetStatus.REJECTED_LATE
+                return BetStatus.ACCEPTED if row[0] else BetStatus.UPDATED
         except Exception as e:
             logging.error(f"Error adding user bet: {e}")
-            return False
-    
-    def update_user_bet(self, user_id: int, match_id: int, score: str) -> bool:
-        """Обновление ставки пользователя"""
-        try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE user_bets SET score = ?, bet_date = ?
-                    WHERE user_id = ? AND match_id = ?
-                ''', (score, self.get_moscow_time(), user_id, match_id))
-                conn.commit()
-                return cursor.rowcount > 0
-        except Exception as e:
-            logging.error(f"Error updating user bet: {e}")
-            return False
+            return None
     
-    def get_user_bet(self, user_id: int, match_id: int):
+    def get_user_bet_match_ids(self, user_id: int) -> List[int]:
+        """Id матчей, на которые пользователь сделал ставку"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT match_id FROM user_bets WHERE user_id = ?', (user_id,))
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_user_bet(self, user_id: int, match_id: int) -> Optional[Bet]:
         """Получение ставки пользователя на матч"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Bet)
             cursor.execute('''
                 SELECT * FROM user_bets WHERE user_id = ? AND match_id = ?
             ''', (user_id, match_id))
             return cursor.fetchone()
     
-    def get_user_bets(self, user_id: int):
+    def get_user_bets(self, user_id: int) -> List[Bet]:
         """Получение всех ставок пользователя"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Bet)
             cursor.execute('''
                 SELECT ub.*, m.match_date, m.match_time, m.team1, m.team2, t.name as tournament_name
                 FROM user_bets ub
                 JOIN matches m ON ub.match_id = m.id
                 JOIN tournaments t ON m.tournament_id = t.id
                 WHERE ub.user_id = ?
-                ORDER BY m.match_date, m.match_time
+                ORDER BY m.kickoff_ts
             ''', (user_id,))
             return cursor.fetchall()
     
-    def get_available_matches_for_user(self, user_id: int):
+    def get_available_matches_for_user(self, user_id: int) -> List[Match]:
         """Получение матчей, на которые пользователь еще не делал ставку"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Match)
             cursor.execute('''
                 SELECT m.*, t.name as tournament_name
                 FROM matches m
                 JOIN tournaments t ON m.tournament_id = t.id
                 WHERE m.status = 'scheduled' 
+                AND m.kickoff_ts > ?
                 AND m.id NOT IN (
                     SELECT match_id FROM user_bets WHERE user_id = ?
                 )
-                ORDER BY m.match_date, m.match_time
-            ''', (user_id,))
+                ORDER BY m.kickoff_ts
+            ''', (self.get_current_timestamp(), user_id))
             return cursor.fetchall()
     
-    def get_user_tournaments_with_bets(self, user_id: int):
+    def get_user_tournaments_with_bets(self, user_id: int) -> List[Tournament]:
         """Получение турниров, в которых пользователь делал ставки"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Tournament)
             cursor.execute('''
                 SELECT DISTINCT t.*
                 FROM tournaments t
@@ -606,48 +805,79 @@ class DatabaseHandler:
             ''', (user_id,))
             return cursor.fetchall()
     
-    def get_tournament_bets_by_user(self, user_id: int, tournament_id: int):
-        """Получение ставок пользователя в конкретном турнире"""
-        with sqlite3.connect(self.db_name) as conn:
+    def get_tournament_bets_by_user(self, user_id: int, tournament_id: int) -> List[Bet]:
+        """Получение ставок пользователя в конкретном турнире с результатами матчей и очками"""
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = row_factory(Bet)
             cursor.execute('''
-                SELECT ub.*, m.match_date, m.match_time, m.team1, m.team2
+                SELECT ub.*, m.match_date, m.match_time, m.team1, m.team2,
+                       m.result AS match_result, m.points_multiplier
                 FROM user_bets ub
                 JOIN matches m ON ub.match_id = m.id
                 WHERE ub.user_id = ? AND m.tournament_id = ?
-                ORDER BY m.match_date, m.match_time
+                ORDER BY m.kickoff_ts
             ''', (user_id, tournament_id))
             return cursor.fetchall()
     
     def get_user_bets_count(self, user_id: int) -> int:
         """Получение количества ставок пользователя"""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT bets_count FROM users WHERE user_id = ?', (user_id,))
+            result = cursor.fetchone()
+            return result[0] if result else 0
+
+    def get_user_tournament_bets_count(self, user_id: int, tournament_id: int) -> int:
+        """Количество ставок пользователя в турнире (счетчик участника)"""
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM user_bets WHERE user_id = ?', (user_id,))
-            return cursor.fetchone()[0]
+            cursor.execute(
+                'SELECT bets_count FROM tournament_participants WHERE tournament_id = ? AND user_id = ?',
+                (tournament_id, user_id)
+            )
+            result = cursor.fetchone()
+            return result[0] if result else 0
     
-    def get_tournament_participants(self, tournament_id: int):
-        """Получение всех участников турнира"""
-        with sqlite3.connect(self.db_name) as conn:
+    def get_tournament_participants(self, tournament_id: int, after_cursor: int = None, limit: int = 10,
+                                    before_cursor: int = None) -> List[Participant]:
+        """
+        Страница участников турнира в порядке вступления.
+
+        after_cursor - следующая страница (участники после курсора),
+        before_cursor - предыдущая (участники до курсора); курсор - id
+        участника из предыдущей выборки. Стоимость не зависит от номера страницы.
+        """
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT DISTINCT u.*
-                FROM users u
-                JOIN user_bets ub ON u.user_id = ub.user_id
-                JOIN matches m ON ub.match_id = m.id
-                WHERE m.tournament_id = ?
-                ORDER BY u.registration_date
-            ''', (tournament_id,))
-            rows = cursor.fetchall()
-            
-            users = []
-            for row in rows:
-                users.append(User(
-                    user_id=row[0],
-                    phone_number=row[1],
-                    username=row[2],
-                    full_name=row[3],
-                    registration_date=row[5],
-                    last_login=row[6]
-                ))
-            return users
+            cursor.row_factory = row_factory(Participant)
+            if before_cursor is not None:
+                cursor.execute('''
+                    SELECT * FROM (
+                        SELECT p.*, u.username, u.full_name
+                        FROM tournament_participants p
+                        LEFT JOIN users u ON u.user_id = p.user_id
+                        WHERE p.tournament_id = ? AND p.id < ?
+                        ORDER BY p.id DESC
+                        LIMIT ?
+                    )
+                    ORDER BY id
+                ''', (tournament_id, before_cursor, limit))
+            else:
+                cursor.execute('''
+                    SELECT p.*, u.username, u.full_name
+                    FROM tournament_participants p
+                    LEFT JOIN users u ON u.user_id = p.user_id
+                    WHERE p.tournament_id = ? AND p.id > ?
+                    ORDER BY p.id
+                    LIMIT ?
+                ''', (tournament_id, after_cursor or 0, limit))
+            return cursor.fetchall()
+
+    def get_tournament_participants_count(self, tournament_id: int) -> int:
+        """Количество участников турнира"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT participants_count FROM tournaments WHERE id = ?', (tournament_id,))
+            result = cursor.fetchone()
+            return result[0] if result else 0
@@ -0,0 +1,509 @@
+import sqlite3
+import logging
+from datetime import datetime
+import pytz
+from utils.time_utils import get_kickoff_timestamp
+
+def backfill_kickoff_ts(conn: sqlite3.Connection):
+    """Заполнение kickoff_ts для существующих матчей"""
+    rows = conn.execute('SELECT id, match_date, match_time FROM matches').fetchall()
+    conn.executemany(
+        'UPDATE matches SET kickoff_ts = ? WHERE id = ?',
+        [(get_kickoff_timestamp(match_date, match_time), match_id) for match_id, match_date, match_time in rows]
+    )
+
+def backfill_settlement(conn: sqlite3.Connection):
+    """Начисление очков по уже введенным результатам (правила на момент миграции 6)"""
+    conn.execute('''
+        UPDATE user_bets SET hit = CASE
+            WHEN user_bets.score_home = m.result_home AND user_bets.score_away = m.result_away THEN 3
+            WHEN user_bets.score_home - user_bets.score_away = m.result_home - m.result_away THEN 2
+            WHEN sign(user_bets.score_home - user_bets.score_away) = sign(m.result_home - m.result_away) THEN 1
+            ELSE 0
+        END
+        FROM matches m
+        WHERE m.id = user_bets.match_id AND m.result_home IS NOT NULL
+    ''')
+    conn.execute('UPDATE user_bets SET points = CASE hit WHEN 3 THEN 3 WHEN 2 THEN 2 WHEN 1 THEN 1 ELSE 0 END WHERE hit IS NOT NULL')
+    conn.execute('DELETE FROM tournament_standings')
+    conn.execute('''
+        INSERT INTO tournament_standings
+            (tournament_id, user_id, points, exact_hits, diff_hits, outcome_hits, bets_settled)
+        SELECT
+            m.tournament_id, ub.user_id, COALESCE(SUM(ub.points), 0),
+            COUNT(CASE WHEN ub.hit = 3 THEN 1 END),
+            COUNT(CASE WHEN ub.hit = 2 THEN 1 END),
+            COUNT(CASE WHEN ub.hit = 1 THEN 1 END),
+            COUNT(ub.hit)
+        FROM user_bets ub
+        JOIN matches m ON m.id = ub.match_id
+        GROUP BY m.tournament_id, ub.user_id
+    ''')
+
+# Миграции применяются по порядку, каждая ровно один раз.
+# Шаг миграции - SQL-строка или функция, принимающая соединение.
+# Уже выпущенные миграции не меняются: для изменения схемы добавляется новая.
+MIGRATIONS = [
+    (1, "Базовая схема", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            phone_number TEXT UNIQUE NOT NULL,
+            username TEXT UNIQUE,
+            full_name TEXT,
+            password_hash TEXT NOT NULL,
+            registration_date TEXT,
+            last_login TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            status TEXT DEFAULT 'active',
+            created_date TEXT,
+            created_by INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            match_date TEXT NOT NULL,
+            match_time TEXT NOT NULL,
+            team1 TEXT NOT NULL,
+            team2 TEXT NOT NULL,
+            status TEXT DEFAULT 'scheduled',
+            result TEXT,
+            created_date TEXT,
+            created_by INTEGER,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_bets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            match_id INTEGER NOT NULL,
+            score TEXT NOT NULL,
+            bet_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (user_id),
+            FOREIGN KEY (match_id) REFERENCES matches (id),
+            UNIQUE(user_id, match_id)
+        )
+        ''',
+    ]),
+    (2, "Индексы для основных запросов", [
+        # get_tournament_matches, get_available_tournament_matches
+        'CREATE INDEX IF NOT EXISTS idx_matches_tournament_date ON matches (tournament_id, match_date, match_time)',
+        # get_available_matches_for_user
+        'CREATE INDEX IF NOT EXISTS idx_matches_status_date ON matches (status, match_date, match_time)',
+        # get_match_bets_count, get_match_with_bets, get_tournament_participants
+        'CREATE INDEX IF NOT EXISTS idx_user_bets_match_user ON user_bets (match_id, user_id)',
+        # get_all_tournaments
+        'CREATE INDEX IF NOT EXISTS idx_tournaments_status_created ON tournaments (status, created_date)',
+        # get_all_tournaments_admin
+        'CREATE INDEX IF NOT EXISTS idx_tournaments_created ON tournaments (created_date)',
+        # get_all_users
+        'CREATE INDEX IF NOT EXISTS idx_users_registration_date ON users (registration_date)',
+    ]),
+    (3, "Время начала матча в секундах Unix", [
+        'ALTER TABLE matches ADD COLUMN kickoff_ts INTEGER',
+        backfill_kickoff_ts,
+        'DROP INDEX IF EXISTS idx_matches_tournament_date',
+        'DROP INDEX IF EXISTS idx_matches_status_date',
+        'CREATE INDEX IF NOT EXISTS idx_matches_tournament_kickoff ON matches (tournament_id, kickoff_ts)',
+        'CREATE INDEX IF NOT EXISTS idx_matches_status_kickoff ON matches (status, kickoff_ts)',
+    ]),
+    (4, "Дата изменения ставки", [
+        'ALTER TABLE user_bets ADD COLUMN edited_date TEXT',
+    ]),
+    (5, "Таблица результатов турниров", [
+        '''
+        CREATE TABLE IF NOT EXISTS tournament_standings (
+            tournament_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            points INTEGER NOT NULL DEFAULT 0,
+            exact_hits INTEGER NOT NULL DEFAULT 0,
+            diff_hits INTEGER NOT NULL DEFAULT 0,
+            outcome_hits INTEGER NOT NULL DEFAULT 0,
+            bets_settled INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tournament_id, user_id)
+        ) WITHOUT ROWID
+        ''',
+        # get_tournament_standings: порядок мест в таблице
+        '''
+        CREATE INDEX IF NOT EXISTS idx_standings_order
+        ON tournament_standings (tournament_id, points DESC, exact_hits DESC, diff_hits DESC, user_id)
+        ''',
+        # Первая ставка в турнире добавляет участника в таблицу
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_user_bets_standings AFTER INSERT ON user_bets
+        BEGIN
+            INSERT OR IGNORE INTO tournament_standings (tournament_id, user_id)
+            SELECT tournament_id, NEW.user_id FROM matches WHERE id = NEW.match_id;
+        END
+        ''',
+        # Таблица заполняется миграцией 6 по целочисленным счетам
+    ]),
+    (6, "Целочисленные счета и очки ставок", [
+        'ALTER TABLE matches ADD COLUMN result_home INTEGER',
+        'ALTER TABLE matches ADD COLUMN result_away INTEGER',
+        'ALTER TABLE user_bets ADD COLUMN score_home INTEGER',
+        'ALTER TABLE user_bets ADD COLUMN score_away INTEGER',
+        'ALTER TABLE user_bets ADD COLUMN hit INTEGER',
+        'ALTER TABLE user_bets ADD COLUMN points INTEGER',
+        '''
+        UPDATE matches SET
+            result_home = CAST(substr(result, 1, instr(result, '-') - 1) AS INTEGER),
+            result_away = CAST(substr(result, instr(result, '-') + 1) AS INTEGER)
+        WHERE result GLOB '[0-9]*-[0-9]*'
+        ''',
+        '''
+        UPDATE user_bets SET
+            score_home = CAST(substr(score, 1, instr(score, '-') - 1) AS INTEGER),
+            score_away = CAST(substr(score, instr(score, '-') + 1) AS INTEGER)
+        WHERE score GLOB '[0-9]*-[0-9]*'
+        ''',
+        backfill_settlement,
+    ]),
+    (7, "Места участников в таблице результатов", [
+        'ALTER TABLE tournament_standings ADD COLUMN position INTEGER',
+        '''
+        UPDATE tournament_standings SET position = r.position
+        FROM (
+            SELECT tournament_id, user_id, ROW_NUMBER() OVER (
+                PARTITION BY tournament_id
+                ORDER BY points DESC, exact_hits DESC, diff_hits DESC, user_id
+            ) AS position
+            FROM tournament_standings
+        ) AS r
+        WHERE tournament_standings.tournament_id = r.tournament_id
+          AND tournament_standings.user_id = r.user_id
+        ''',
+        # get_tournament_standings, get_user_standing: страница и место по номеру
+        'CREATE INDEX IF NOT EXISTS idx_standings_position ON tournament_standings (tournament_id, position)',
+        # Новый участник занимает последнее место до следующего расчета матча
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_standings_position AFTER INSERT ON tournament_standings
+        WHEN NEW.position IS NULL
+        BEGIN
+            UPDATE tournament_standings SET position = (
+                SELECT COALESCE(MAX(position), 0) + 1 FROM tournament_standings
+                WHERE tournament_id = NEW.tournament_id
+            )
+            WHERE tournament_id = NEW.tournament_id AND user_id = NEW.user_id;
+        END
+        ''',
+    ]),
+    (8, "Правила начисления очков турнира и коэффициент матча", [
+        'ALTER TABLE tournaments ADD COLUMN exact_points INTEGER NOT NULL DEFAULT 3',
+        'ALTER TABLE tournaments ADD COLUMN diff_points INTEGER NOT NULL DEFAULT 2',
+        'ALTER TABLE tournaments ADD COLUMN outcome_points INTEGER NOT NULL DEFAULT 1',
+        # Множитель очков за матч (например, 2 для матчей плей-офф)
+        'ALTER TABLE matches ADD COLUMN points_multiplier INTEGER NOT NULL DEFAULT 1',
+    ]),
+    (9, "Участники турниров", [
+        # id - порядок вступления и курсор постраничного списка игроков
+        '''
+        CREATE TABLE IF NOT EXISTS tournament_participants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tournament_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            joined_date TEXT,
+            UNIQUE (tournament_id, user_id)
+        )
+        ''',
+        # get_tournament_participants: страница после курсора (tournament_id, id)
+        'CREATE INDEX IF NOT EXISTS idx_participants_tournament ON tournament_participants (tournament_id)',
+        '''
+        INSERT OR IGNORE INTO tournament_participants (tournament_id, user_id, joined_date)
+        SELECT m.tournament_id, ub.user_id, MIN(ub.bet_date)
+        FROM user_bets ub
+        JOIN matches m ON m.id = ub.match_id
+        GROUP BY m.tournament_id, ub.user_id
+        ORDER BY MIN(ub.id)
+        ''',
+        # Первая ставка в турнире делает пользователя участником
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_user_bets_participants AFTER INSERT ON user_bets
+        BEGIN
+            INSERT OR IGNORE INTO tournament_participants (tournament_id, user_id, joined_date)
+            SELECT tournament_id, NEW.user_id, NEW.bet_date FROM matches WHERE id = NEW.match_id;
+        END
+        ''',
+    ]),
+    (10, "Полнотекстовый поиск пользователей", [
+        # search_users: логин, имя и телефон; индекс префиксов для поиска по началу слова
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+            username, full_name, phone_number,
+            content='users', content_rowid='user_id',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )
+        ''',
+        "INSERT INTO users_fts (users_fts) VALUES ('rebuild')",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_fts_insert AFTER INSERT ON users
+        BEGIN
+            INSERT INTO users_fts (rowid, username, full_name, phone_number)
+            VALUES (NEW.user_id, NEW.username, NEW.full_name, NEW.phone_number);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_fts_delete AFTER DELETE ON users
+        BEGIN
+            INSERT INTO users_fts (users_fts, rowid, username, full_name, phone_number)
+            VALUES ('delete', OLD.user_id, OLD.username, OLD.full_name, OLD.phone_number);
+        END
+        ''',
+        # Вход пользователя (last_login) индекс не затрагивает
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_fts_update AFTER UPDATE OF user_id, username, full_name, phone_number ON users
+        BEGIN
+            INSERT INTO users_fts (users_fts, rowid, username, full_name, phone_number)
+            VALUES ('delete', OLD.user_id, OLD.username, OLD.full_name, OLD.phone_number);
+            INSERT INTO users_fts (rowid, username, full_name, phone_number)
+            VALUES (NEW.user_id, NEW.username, NEW.full_name, NEW.phone_number);
+        END
+        ''',
+    ]),
+    (11, "Счетчики статистики бота", [
+        # Итоговые счетчики (одна строка), поддерживаются триггерами
+        '''
+        CREATE TABLE IF NOT EXISTS bot_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            users INTEGER NOT NULL DEFAULT 0,
+            tournaments INTEGER NOT NULL DEFAULT 0,
+            active_tournaments INTEGER NOT NULL DEFAULT 0,
+            matches INTEGER NOT NULL DEFAULT 0,
+            settled_matches INTEGER NOT NULL DEFAULT 0,
+            bets INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO bot_stats (id, users, tournaments, active_tournaments, matches, settled_matches, bets)
+        SELECT 1,
+            (SELECT COUNT(*) FROM users),
+            (SELECT COUNT(*) FROM tournaments),
+            (SELECT COUNT(*) FROM tournaments WHERE status = 'active'),
+            (SELECT COUNT(*) FROM matches),
+            (SELECT COUNT(*) FROM matches WHERE result_home IS NOT NULL),
+            (SELECT COUNT(*) FROM user_bets)
+        ''',
+        # Сделанные ставки по часам (начало часа в секундах Unix)
+        '''
+        CREATE TABLE IF NOT EXISTS stats_hourly (
+            hour_ts INTEGER PRIMARY KEY,
+            bets INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        INSERT INTO stats_hourly (hour_ts, bets)
+        SELECT CAST(strftime('%s', bet_date) AS INTEGER) / 3600 * 3600 AS hour_ts, COUNT(*)
+        FROM user_bets
+        WHERE bet_date IS NOT NULL
+        GROUP BY hour_ts
+        ''',
+        # Время последнего действия пользователя (вход или ставка)
+        'ALTER TABLE users ADD COLUMN last_active_ts INTEGER',
+        '''
+        UPDATE users SET last_active_ts = MAX(
+            COALESCE(CAST(strftime('%s', last_login) AS INTEGER), 0),
+            COALESCE((SELECT CAST(strftime('%s', MAX(COALESCE(edited_date, bet_date))) AS INTEGER)
+                      FROM user_bets WHERE user_id = users.user_id), 0)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_users_last_active ON users (last_active_ts)',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_users_insert AFTER INSERT ON users
+        BEGIN
+            UPDATE bot_stats SET users = users + 1;
+            UPDATE users SET last_active_ts = CAST(strftime('%s', 'now') AS INTEGER) WHERE user_id = NEW.user_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_users_delete AFTER DELETE ON users
+        BEGIN
+            UPDATE bot_stats SET users = users - 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_users_login AFTER UPDATE OF last_login ON users
+        BEGIN
+            UPDATE users SET last_active_ts = CAST(strftime('%s', 'now') AS INTEGER) WHERE user_id = NEW.user_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_tournaments_insert AFTER INSERT ON tournaments
+        BEGIN
+            UPDATE bot_stats SET tournaments = tournaments + 1,
+                                 active_tournaments = active_tournaments + (NEW.status = 'active');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_tournaments_delete AFTER DELETE ON tournaments
+        BEGIN
+            UPDATE bot_stats SET tournaments = tournaments - 1,
+                                 active_tournaments = active_tournaments - (OLD.status = 'active');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_tournaments_status AFTER UPDATE OF status ON tournaments
+        BEGIN
+            UPDATE bot_stats SET active_tournaments = active_tournaments
+                + (NEW.status = 'active') - (OLD.status = 'active');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_matches_insert AFTER INSERT ON matches
+        BEGIN
+            UPDATE bot_stats SET matches = matches + 1,
+                                 settled_matches = settled_matches + (NEW.result_home IS NOT NULL);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_matches_delete AFTER DELETE ON matches
+        BEGIN
+            UPDATE bot_stats SET matches = matches - 1,
+                                 settled_matches = settled_matches - (OLD.result_home IS NOT NULL);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_matches_result AFTER UPDATE OF result_home ON matches
+        BEGIN
+            UPDATE bot_stats SET settled_matches = settled_matches
+                + (NEW.result_home IS NOT NULL) - (OLD.result_home IS NOT NULL);
+        END
+        ''',
+        # Удаленные ставки вычитаются из итога, но не из почасовой активности
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_bets_insert AFTER INSERT ON user_bets
+        BEGIN
+            UPDATE bot_stats SET bets = bets + 1;
+            INSERT INTO stats_hourly (hour_ts, bets)
+            VALUES (CAST(strftime('%s', 'now') AS INTEGER) / 3600 * 3600, 1)
+            ON CONFLICT (hour_ts) DO UPDATE SET bets = bets + 1;
+            UPDATE users SET last_active_ts = CAST(strftime('%s', 'now') AS INTEGER) WHERE user_id = NEW.user_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_bets_edit AFTER UPDATE OF score ON user_bets
+        BEGIN
+            UPDATE users SET last_active_ts = CAST(strftime('%s', 'now') AS INTEGER) WHERE user_id = NEW.user_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_stats_bets_delete AFTER DELETE ON user_bets
+        BEGIN
+            UPDATE bot_stats SET bets = bets - 1;
+        END
+        ''',
+    ]),
+    (12, "Счетчики ставок и участников", [
+        'ALTER TABLE users ADD COLUMN bets_count INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE users ADD COLUMN tournaments_count INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE matches ADD COLUMN bets_count INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE tournaments ADD COLUMN participants_count INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE tournament_participants ADD COLUMN bets_count INTEGER NOT NULL DEFAULT 0',
+        # Ставки удаленных ранее турниров оставались без матчей
+        'DELETE FROM user_bets WHERE match_id NOT IN (SELECT id FROM matches)',
+        '''
+        UPDATE tournament_participants SET bets_count = (
+            SELECT COUNT(*) FROM user_bets ub
+            JOIN matches m ON m.id = ub.match_id
+            WHERE ub.user_id = tournament_participants.user_id
+              AND m.tournament_id = tournament_participants.tournament_id
+        )
+        ''',
+        '''
+        UPDATE users SET
+            bets_count = (SELECT COUNT(*) FROM user_bets WHERE user_id = users.user_id),
+            tournaments_count = (SELECT COUNT(*) FROM tournament_participants WHERE user_id = users.user_id)
+        ''',
+        'UPDATE matches SET bets_count = (SELECT COUNT(*) FROM user_bets WHERE match_id = matches.id)',
+        '''
+        UPDATE tournaments SET participants_count = (
+            SELECT COUNT(*) FROM tournament_participants WHERE tournament_id = tournaments.id
+        )
+        ''',
+        # Участие и ставки в турнире учитываются одним UPSERT (порядок
+        # срабатывания отдельных триггеров не определен)
+        'DROP TRIGGER IF EXISTS trg_user_bets_participants',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_user_bets_counters_insert AFTER INSERT ON user_bets
+        BEGIN
+            INSERT INTO tournament_participants (tournament_id, user_id, joined_date, bets_count)
+            SELECT tournament_id, NEW.user_id, NEW.bet_date, 1 FROM matches WHERE id = NEW.match_id
+            ON CONFLICT (tournament_id, user_id) DO UPDATE SET bets_count = bets_count + 1;
+            UPDATE users SET bets_count = bets_count + 1 WHERE user_id = NEW.user_id;
+            UPDATE matches SET bets_count = bets_count + 1 WHERE id = NEW.match_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_user_bets_counters_delete AFTER DELETE ON user_bets
+        BEGIN
+            UPDATE tournament_participants SET bets_count = bets_count - 1
+            WHERE tournament_id = (SELECT tournament_id FROM matches WHERE id = OLD.match_id)
+              AND user_id = OLD.user_id;
+            UPDATE users SET bets_count = bets_count - 1 WHERE user_id = OLD.user_id;
+            UPDATE matches SET bets_count = bets_count - 1 WHERE id = OLD.match_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_participants_counters_insert AFTER INSERT ON tournament_participants
+        BEGIN
+            UPDATE users SET tournaments_count = tournaments_count + 1 WHERE user_id = NEW.user_id;
+            UPDATE tournaments SET participants_count = participants_count + 1 WHERE id = NEW.tournament_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_participants_counters_delete AFTER DELETE ON tournament_participants
+        BEGIN
+            UPDATE users SET tournaments_count = tournaments_count - 1 WHERE user_id = OLD.user_id;
+            UPDATE tournaments SET participants_count = participants_count - 1 WHERE id = OLD.tournament_id;
+        END
+        ''',
+    ]),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Текущая версия схемы базы данных"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_date TEXT
+        )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+def apply_migrations(conn: sqlite3.Connection):
+    """Применение всех непримененных миграций (каждая в своей транзакции)"""
+    current_version = get_schema_version(conn)
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current_version:
+            continue
+
+        logging.info(f"Применение миграции {version}: {description}")
+        try:
+            conn.execute('BEGIN')
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                'INSERT INTO schema_version (version, description, applied_date) VALUES (?, ?, ?)',
+                (version, description, str(datetime.now(pytz.timezone('Europe/Moscow'))))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logging.error(f"Ошибка при применении миграции {version}")
+            raise
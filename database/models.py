@@ -1,11 +1,124 @@
-from dataclasses import dataclass
-from typing import Optional
+from typing import NamedTuple, Optional
 
-@dataclass
-class User:
+class User(NamedTuple):
     user_id: int
     phone_number: str
     username: Optional[str] = None
     full_name: Optional[str] = None
     registration_date: Optional[str] = None
-    last_login: Optional[str] = None
\ No newline at end of file
+    last_login: Optional[str] = None
+    bets_count: int = 0
+    tournaments_count: int = 0
+
+class Tournament(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str] = None
+    status: str = 'active'
+    created_date: Optional[str] = None
+    created_by: Optional[int] = None
+    exact_points: int = 3
+    diff_points: int = 2
+    outcome_points: int = 1
+    participants_count: int = 0
+
+class Match(NamedTuple):
+    id: int
+    tournament_id: int
+    match_date: str
+    match_time: str
+    team1: str
+    team2: str
+    status: str = 'scheduled'
+    result: Optional[str] = None
+    created_date: Optional[str] = None
+    created_by: Optional[int] = None
+    kickoff_ts: Optional[int] = None
+    result_home: Optional[int] = None
+    result_away: Optional[int] = None
+    points_multiplier: int = 1
+    bets_count: int = 0
+    # Поля из связанных таблиц (заполняются не всеми запросами)
+    tournament_name: Optional[str] = None
+
+class Bet(NamedTuple):
+    id: int
+    user_id: Optional[int] = None
+    match_id: Optional[int] = None
+    score: Optional[str] = None
+    bet_date: Optional[str] = None
+    edited_date: Optional[str] = None
+    score_home: Optional[int] = None
+    score_away: Optional[int] = None
+    hit: Optional[int] = None  # 3 - точный счет, 2 - разница мячей, 1 - исход, 0 - мимо
+    points: Optional[int] = None
+    # Поля из связанных таблиц (заполняются не всеми запросами)
+    match_date: Optional[str] = None
+    match_time: Optional[str] = None
+    team1: Optional[str] = None
+    team2: Optional[str] = None
+    match_result: Optional[str] = None
+    points_multiplier: Optional[int] = None
+    tournament_name: Optional[str] = None
+
+class Standing(NamedTuple):
+    tournament_id: int
+    user_id: int
+    points: int = 0
+    exact_hits: int = 0
+    diff_hits: int = 0
+    outcome_hits: int = 0
+    bets_settled: int = 0
+    position: Optional[int] = None
+    # Поля из связанных таблиц
+    username: Optional[str] = None
+    full_name: Optional[str] = None
+
+class Participant(NamedTuple):
+    id: int  # курсор постраничного списка (порядок вступления)
+    tournament_id: int
+    user_id: int
+    joined_date: Optional[str] = None
+    bets_count: int = 0
+    # Поля из связанных таблиц
+    username: Optional[str] = None
+    full_name: Optional[str] = None
+
+class BotStats(NamedTuple):
+    """Статистика бота для админ-панели"""
+    users: int = 0
+    tournaments: int = 0
+    active_tournaments: int = 0
+    matches: int = 0
+    settled_matches: int = 0
+    bets: int = 0
+    bets_today: int = 0
+    bets_last_hour: int = 0
+    bets_last_24h: int = 0
+    active_users_24h: int = 0
+
+class BetStatus:
+    """Результат сохранения ставки"""
+    ACCEPTED = 'accepted'  # новая ставка
+    UPDATED = 'updated'  # изменен существующий прогноз
+    REJECTED_LATE = 'rejected_late'  # матч уже начался (или не найден)
+
+def row_factory(model):
+    """
+    row_factory для курсора: строки выборки как объекты model.
+
+    Столбцы сопоставляются с полями по имени, лишние столбцы пропускаются,
+    отсутствующие поля получают значение по умолчанию.
+    """
+    fields = model._fields
+    defaults = model._field_defaults
+    state = {'description': None, 'getters': None}
+
+    def factory(cursor, row):
+        if cursor.description is not state['description']:
+            columns = {column[0]: index for index, column in enumerate(cursor.description)}
+            state['description'] = cursor.description
+            state['getters'] = [(columns.get(field), defaults.get(field)) for field in fields]
+        return model._make([row[index] if index is not None else default for index, default in state['getters']])
+
+    return factory
@@ -0,0 +1,270 @@
+import sqlite3
+import numpy as np
+
+# Очки за прогноз по умолчанию (правила турнира хранятся в tournaments)
+EXACT_SCORE_POINTS = 3  # точный счет
+GOAL_DIFF_POINTS = 2  # верная разница мячей
+OUTCOME_POINTS = 1  # верный исход (победа одной из команд или ничья)
+
+# Тип попадания прогноза: 3 - точный счет, 2 - разница мячей, 1 - исход,
+# 0 - мимо, NULL - результат матча не введен
+HIT_SQL = '''
+    CASE
+        WHEN m.result_home IS NULL THEN NULL
+        WHEN ub.score_home = m.result_home AND ub.score_away = m.result_away THEN 3
+        WHEN ub.score_home - ub.score_away = m.result_home - m.result_away THEN 2
+        WHEN sign(ub.score_home - ub.score_away) = sign(m.result_home - m.result_away) THEN 1
+        ELSE 0
+    END
+'''
+
+# Новые и текущие попадание и очки ставок (параметр - условие отбора ставок)
+_SETTLEMENT_ROWS = f'''
+    SELECT
+        id, tournament_id, user_id, old_hit, old_points, new_hit,
+        CASE new_hit
+            WHEN 3 THEN exact_points
+            WHEN 2 THEN diff_points
+            WHEN 1 THEN outcome_points
+            WHEN 0 THEN 0
+        END * points_multiplier AS new_points
+    FROM (
+        SELECT ub.id, m.tournament_id, ub.user_id,
+               ub.hit AS old_hit, ub.points AS old_points, {HIT_SQL} AS new_hit,
+               t.exact_points, t.diff_points, t.outcome_points, m.points_multiplier
+        FROM user_bets ub
+        JOIN matches m ON m.id = ub.match_id
+        JOIN tournaments t ON t.id = m.tournament_id
+        WHERE {{where}}
+    )
+'''
+
+def _apply_deltas(conn: sqlite3.Connection, rows: str, params: tuple):
+    """
+    Перенос в tournament_standings разницы между новыми и начисленными ранее
+    очками ставок (для исправленного или отмененного результата она
+    отрицательна).
+    """
+    conn.execute(f'''
+        INSERT INTO tournament_standings
+            (tournament_id, user_id, points, exact_hits, diff_hits, outcome_hits, bets_settled)
+        SELECT
+            tournament_id,
+            user_id,
+            SUM(COALESCE(new_points, 0) - COALESCE(old_points, 0)),
+            SUM((new_hit IS 3) - (old_hit IS 3)),
+            SUM((new_hit IS 2) - (old_hit IS 2)),
+            SUM((new_hit IS 1) - (old_hit IS 1)),
+            SUM((new_hit IS NOT NULL) - (old_hit IS NOT NULL))
+        FROM ({rows})
+        WHERE new_hit IS NOT old_hit OR new_points IS NOT old_points
+        GROUP BY tournament_id, user_id
+        ON CONFLICT (tournament_id, user_id) DO UPDATE SET
+            points = points + excluded.points,
+            exact_hits = exact_hits + excluded.exact_hits,
+            diff_hits = diff_hits + excluded.diff_hits,
+            outcome_hits = outcome_hits + excluded.outcome_hits,
+            bets_settled = bets_settled + excluded.bets_settled
+    ''', params)
+
+def _update_bets(conn: sqlite3.Connection, rows: str, params: tuple) -> int:
+    """Запись новых попадания и очков в ставки; возвращает число измененных ставок"""
+    cursor = conn.execute(f'''
+        UPDATE user_bets SET hit = s.new_hit, points = s.new_points
+        FROM ({rows}) AS s
+        WHERE user_bets.id = s.id
+          AND (s.new_hit IS NOT s.old_hit OR s.new_points IS NOT s.old_points)
+    ''', params)
+    return cursor.rowcount
+
+def update_positions(conn: sqlite3.Connection, tournament_id: int = None):
+    """Пересчет мест участников (только изменившихся) по очкам и дополнительным показателям"""
+    where, params = ('WHERE tournament_id = ?', (tournament_id,)) if tournament_id is not None else ('', ())
+    conn.execute(f'''
+        UPDATE tournament_standings SET position = r.position
+        FROM (
+            SELECT tournament_id, user_id, ROW_NUMBER() OVER (
+                PARTITION BY tournament_id
+                ORDER BY points DESC, exact_hits DESC, diff_hits DESC, user_id
+            ) AS position
+            FROM tournament_standings
+            {where}
+        ) AS r
+        WHERE tournament_standings.tournament_id = r.tournament_id
+          AND tournament_standings.user_id = r.user_id
+          AND tournament_standings.position IS NOT r.position
+    ''', params)
+
+def settle_match(conn: sqlite3.Connection, match_id: int) -> int:
+    """
+    Начисление очков за ставки на матч (или их снятие, если результата нет).
+
+    Очки всех ставок пересчитываются одним запросом, в таблицу результатов
+    переносится только разница. Возвращает число измененных ставок.
+    """
+    rows = _SETTLEMENT_ROWS.format(where='ub.match_id = ?')
+    params = (match_id,)
+    _apply_deltas(conn, rows, params)
+    changed = _update_bets(conn, rows, params)
+    if changed:
+        tournament_id = conn.execute('SELECT tournament_id FROM matches WHERE id = ?', params).fetchone()[0]
+        update_positions(conn, tournament_id)
+    return changed
+
+def rebuild_standings(conn: sqlite3.Connection, tournament_id: int = None):
+    """
+    Полный пересчет очков всех ставок и таблицы tournament_standings
+    (одного турнира или всех).
+    """
+    if tournament_id is None:
+        _update_bets(conn, _SETTLEMENT_ROWS.format(where='1'), ())
+        conn.execute('DELETE FROM tournament_standings')
+        where, params = '', ()
+    else:
+        _update_bets(conn, _SETTLEMENT_ROWS.format(where='m.tournament_id = ?'), (tournament_id,))
+        conn.execute('DELETE FROM tournament_standings WHERE tournament_id = ?', (tournament_id,))
+        where, params = 'WHERE m.tournament_id = ?', (tournament_id,)
+
+    conn.execute(f'''
+        INSERT INTO tournament_standings
+            (tournament_id, user_id, points, exact_hits, diff_hits, outcome_hits, bets_settled)
+        SELECT
+            m.tournament_id,
+            ub.user_id,
+            COALESCE(SUM(ub.points), 0),
+            COUNT(CASE WHEN ub.hit = 3 THEN 1 END),
+            COUNT(CASE WHEN ub.hit = 2 THEN 1 END),
+            COUNT(CASE WHEN ub.hit = 1 THEN 1 END),
+            COUNT(ub.hit)
+        FROM user_bets ub
+        JOIN matches m ON m.id = ub.match_id
+        {where}
+        GROUP BY m.tournament_id, ub.user_id
+    ''', params)
+    update_positions(conn, tournament_id)
+
+# Наибольшее значение счета и попадания ставки в упакованном числе
+# rescore_tournament: поле 8 бит, значение хранится со сдвигом +1
+PACKED_FIELD_MAX = 0xFF - 1
+
+def _int_array(lists) -> np.ndarray:
+    """Массив из списков чисел через запятую (результатов group_concat)"""
+    return np.concatenate([np.array(values.split(','), dtype=np.int64) for values in lists])
+
+def rescore_tournament(conn: sqlite3.Connection, tournament_id: int) -> int:
+    """
+    Полный пересчет очков турнира по его текущим правилам.
+
+    Ставки и результаты загружаются массивами NumPy, попадания и итоги
+    участников считаются векторно (без цикла по ставкам), затем ставки и
+    таблица результатов перезаписываются в текущей транзакции.
+    Возвращает число участников.
+    """
+    rules = conn.execute(
+        'SELECT exact_points, diff_points, outcome_points FROM tournaments WHERE id = ?',
+        (tournament_id,)
+    ).fetchone()
+    if rules is None:
+        return 0
+    exact_points, diff_points, outcome_points = rules
+
+    # Строка на матч, ставки - списками через group_concat: выборка миллиона
+    # отдельных строк стоила бы в разы дороже самого расчета. Списки одной
+    # строки выровнены: все агрегаты группы получают ставки в одном и том же
+    # порядке. Счет, попадание и очки ставки упакованы в одно число (+1, чтобы
+    # NULL стал нулем): счет и попадание - по 8 бит, очки - в старших битах.
+    # Значения вне полей испортили бы соседние поля, поэтому они считаются
+    # в том же запросе и прерывают пересчет (validate_score ограничивает счет 20).
+    matches = conn.execute('''
+        SELECT
+            m.result_home IS NOT NULL, COALESCE(m.result_home, 0), COALESCE(m.result_away, 0),
+            m.points_multiplier, COUNT(*),
+            SUM(ub.score_home NOT BETWEEN 0 AND :field_max OR ub.score_away NOT BETWEEN 0 AND :field_max
+                OR ub.hit NOT BETWEEN 0 AND :field_max OR ub.points < 0),
+            group_concat(ub.id), group_concat(ub.user_id),
+            group_concat(
+                (COALESCE(ub.score_home, -1) + 1)
+                | ((COALESCE(ub.score_away, -1) + 1) << 8)
+                | ((COALESCE(ub.hit, -1) + 1) << 16)
+                | ((COALESCE(ub.points, -1) + 1) << 24)
+            )
+        FROM matches m
+        JOIN user_bets ub ON ub.match_id = m.id
+        WHERE m.tournament_id = :tournament_id
+        GROUP BY m.kickoff_ts, m.id  -- порядок idx_matches_tournament_kickoff, без сортировки
+    ''', {'tournament_id': tournament_id, 'field_max': PACKED_FIELD_MAX}).fetchall()
+
+    out_of_range = sum(row[5] or 0 for row in matches)
+    if out_of_range:
+        raise ValueError(
+            f"Пересчет турнира {tournament_id} невозможен: {out_of_range} ставок со счетом, "
+            f"попаданием или очками вне допустимого диапазона (0..{PACKED_FIELD_MAX})"
+        )
+
+    conn.execute('DELETE FROM tournament_standings WHERE tournament_id = ?', (tournament_id,))
+    if not matches:
+        return 0
+
+    has_result, home, away, multiplier, counts, _, bet_ids, user_ids, packed = zip(*matches)
+    has_result, home, away, multiplier = (
+        np.repeat(np.array(column, dtype=np.int64), counts) for column in (has_result, home, away, multiplier)
+    )
+    bet_ids, user_ids, packed = _int_array(bet_ids), _int_array(user_ids), _int_array(packed)
+    if not len(bet_ids) == len(user_ids) == len(packed) == sum(counts):
+        raise ValueError(f"Пересчет турнира {tournament_id}: списки ставок group_concat не совпадают по длине")
+    bet_home = (packed & 0xFF) - 1
+    bet_away = (packed >> 8 & 0xFF) - 1
+    old_hit = (packed >> 16 & 0xFF) - 1
+    old_points = (packed >> 24) - 1
+
+    # Попадание (как в HIT_SQL): 3, 2, 1, 0; -1 - результат не введен
+    bet_diff = bet_home - bet_away
+    result_diff = home - away
+    hit = np.select(
+        [(bet_home == home) & (bet_away == away), bet_diff == result_diff, np.sign(bet_diff) == np.sign(result_diff)],
+        [3, 2, 1],
+        0
+    )
+    hit[bet_home < 0] = 0
+    hit[has_result == 0] = -1
+    points_by_hit = np.array([0, outcome_points, diff_points, exact_points], dtype=np.int64)
+    points = np.where(hit >= 0, points_by_hit[hit] * multiplier, -1)
+
+    # Ставки: записываются только изменившиеся (-1 - NULL)
+    changed = np.flatnonzero((hit != old_hit) | (points != old_points))
+    conn.executemany(
+        'UPDATE user_bets SET hit = ?, points = ? WHERE id = ?',
+        ((h if h >= 0 else None, p if p >= 0 else None, i)
+         for h, p, i in zip(hit[changed].tolist(), points[changed].tolist(), bet_ids[changed].tolist()))
+    )
+
+    # Итоги участников
+    participants, index = np.unique(user_ids, return_inverse=True)
+    settled = hit >= 0
+    total_points, exact_hits, diff_hits, outcome_hits, bets_settled = (
+        np.bincount(index, weights=values, minlength=len(participants)).astype(np.int64)
+        for values in (np.where(settled, points, 0), hit == 3, hit == 2, hit == 1, settled)
+    )
+
+    # Места (порядок как в update_positions)
+    order = np.lexsort((participants, -diff_hits, -exact_hits, -total_points))
+    positions = np.empty(len(participants), dtype=np.int64)
+    positions[order] = np.arange(1, len(participants) + 1)
+
+    conn.executemany(
+        '''
+        INSERT INTO tournament_standings
+            (tournament_id, user_id, points, exact_hits, diff_hits, outcome_hits, bets_settled, position)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        ((tournament_id, *values) for values in zip(
+            participants.tolist(), total_points.tolist(), exact_hits.tolist(), diff_hits.tolist(),
+            outcome_hits.tolist(), bets_settled.tolist(), positions.tolist()
+        ))
+    )
+    return len(participants)
+
+def parse_goals(score: str):
+    """Голы хозяев и гостей из счета вида 'X-Y'"""
+    home, away = score.split('-')
+    return int(home), int(away)
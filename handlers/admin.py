@@ -1,7 +1,7 @@
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import Message, CallbackQuery
-from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
 from keyboards.menu import (
     get_admin_main_keyboard, 
     get_admin_tournaments_keyboard,
@@ -15,6 +15,10 @@ from keyboards.menu import (
 )
 from states.user_states import AdminStates
 from utils.validators import validate_score  # Добавляем импорт
+from utils.time_utils import parse_user_date, parse_user_time
+from utils.callback_data import PageCursor
+from utils.callback_router import get_callback_router
+from utils.message_helpers import safe_edit_message, safe_edit_reply_markup
 from config import config
 
 def is_admin(user_id: int) -> bool:
@@ -39,49 +43,43 @@ async def admin_main_callback(callback: CallbackQuery, state: FSMContext):
         return
     
     await state.finish()
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "👑 Панель администратора\n\nВыберите раздел:",
-        reply_markup=get_admin_main_keyboard()
+        reply_markup=get_admin_main_keyboard(),
+        parse_mode=None
     )
 
-async def admin_tournaments_callback(callback: CallbackQuery, state: FSMContext):
+async def admin_tournaments_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler):
     """Список турниров для админа"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
     await state.finish()
-    db = DatabaseHandler('users.db')
-    tournaments = db.get_all_tournaments_admin()
+    tournaments = await db.get_all_tournaments_admin()
     
     if tournaments:
         text = "🏆 Список всех турниров:\n\n"
         for tournament in tournaments:
-            status = "✅ Активный" if tournament[3] == 'active' else "❌ Неактивный"
-            text += f"• {tournament[1]} ({status})\n"
+            status = "✅ Активный" if tournament.status == 'active' else "❌ Неактивный"
+            text += f"• {tournament.name} ({status})\n"
     else:
         text = "🏆 Турниры отсутствуют.\n\nДобавьте первый турнир!"
     
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         text,
-        reply_markup=get_admin_tournaments_keyboard(tournaments)
+        reply_markup=get_admin_tournaments_keyboard(tournaments),
+        parse_mode=None
     )
 
-async def admin_users_callback(callback: CallbackQuery, state: FSMContext):
-    """Список пользователей для админа"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
-        return
-    
-    await state.finish()
-    db = DatabaseHandler('users.db')
-    users = db.get_all_users()
-    users_count = db.get_users_count()
-    
-    text = f"👥 Все пользователи\n\n📊 Общее количество: {users_count}\n\n"
-    
-    # Показываем последних 10 пользователей
-    for i, user in enumerate(users[:10], 1):
+USERS_PER_PAGE = 10
+
+def format_users_page(users, start_index: int) -> str:
+    """Текст страницы списка пользователей"""
+    text = ""
+    for i, user in enumerate(users, start_index + 1):
         text += f"{i}. ID: {user.user_id}\n"
         text += f"   📱: {user.phone_number}\n"
         if user.username:
@@ -89,49 +87,140 @@ async def admin_users_callback(callback: CallbackQuery, state: FSMContext):
         if user.full_name:
             text += f"   📛: {user.full_name}\n"
         text += f"   📅: {user.registration_date}\n\n"
+    return text
+
+async def build_search_page(db: AsyncDatabaseHandler, query: str, page: int = 0, after_cursor: int = None, before_cursor: int = None):
+    """Текст и клавиатура страницы результатов поиска пользователей"""
+    # Лишняя строка показывает, есть ли следующая страница
+    users = await db.search_users(query, after_cursor, USERS_PER_PAGE + 1, before_cursor)
+    if not users and (after_cursor or before_cursor):
+        page, after_cursor, before_cursor = 0, None, None
+        users = await db.search_users(query, limit=USERS_PER_PAGE + 1)
+    if before_cursor is not None:
+        users = users[-USERS_PER_PAGE:]
+        has_next = True
+    else:
+        has_next = len(users) > USERS_PER_PAGE
+        users = users[:USERS_PER_PAGE]
+    
+    text = f"🔍 Поиск: {query}\n\n"
+    if not users:
+        text += "Пользователи не найдены."
+        return text, get_admin_users_keyboard(search=True)
     
-    if users_count > 10:
-        text += f"... и еще {users_count - 10} пользователей"
+    text += format_users_page(users, page * USERS_PER_PAGE)
+    return text, get_admin_users_keyboard(page, users[0].user_id, users[-1].user_id, has_next, search=True)
+
+async def admin_users_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler,
+                               page: int = 0, cursor: PageCursor = PageCursor()):
+    """Список пользователей для админа (новые первыми, постранично)"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
+        return
+    
+    await state.finish()
+    after_cursor, before_cursor = cursor
+    
+    users_count = await db.get_users_count()
+    # Лишняя строка показывает, есть ли следующая страница
+    users = await db.get_users_page(after_cursor, USERS_PER_PAGE + 1, before_cursor)
+    if not users and (after_cursor or before_cursor):
+        # Курсор устарел (пользователь удален) - начинаем с первой страницы
+        page, after_cursor, before_cursor = 0, None, None
+        users = await db.get_users_page(limit=USERS_PER_PAGE + 1)
+    if before_cursor is not None:
+        users = users[-USERS_PER_PAGE:]
+        has_next = True
+    else:
+        has_next = len(users) > USERS_PER_PAGE
+        users = users[:USERS_PER_PAGE]
     
-    await callback.message.edit_text(
+    text = f"👥 Все пользователи\n\n📊 Общее количество: {users_count}\n\n"
+    text += format_users_page(users, page * USERS_PER_PAGE)
+    
+    await safe_edit_message(
+        callback,
         text,
-        reply_markup=get_admin_users_keyboard()
+        reply_markup=get_admin_users_keyboard(
+            page, users[0].user_id if users else None, users[-1].user_id if users else None, has_next
+        ),
+        parse_mode=None
     )
 
-async def admin_stats_callback(callback: CallbackQuery, state: FSMContext):
-    """Статистика для админа"""
+async def admin_user_search_callback(callback: CallbackQuery, state: FSMContext):
+    """Начало поиска пользователя"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
     await state.finish()
-    db = DatabaseHandler('users.db')
-    users_count = db.get_users_count()
-    tournaments = db.get_all_tournaments_admin()
-    active_tournaments = db.get_all_tournaments()
+    await safe_edit_message(
+        callback,
+        "🔍 Поиск пользователя\n\n"
+        "Введите логин, имя или номер телефона (можно начало слова, например: ива +7999):",
+        reply_markup=get_cancel_keyboard(),
+        parse_mode=None
+    )
+    await AdminStates.waiting_for_user_search.set()
+
+async def process_user_search(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
+    """Обработка поискового запроса"""
+    query = message.text.strip()[:64]
+    
+    # Запрос сохраняется для перехода по страницам результатов
+    await state.finish()
+    await state.update_data(user_search=query)
+    
+    text, keyboard = await build_search_page(db, query)
+    await message.answer(text, reply_markup=keyboard)
+
+async def admin_search_page_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler,
+                                     page: int = 0, cursor: PageCursor = PageCursor()):
+    """Страница результатов поиска пользователей"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
+        return
+    
+    query = (await state.get_data()).get('user_search')
+    if not query:
+        await callback.answer("🔍 Повторите поиск.", show_alert=True)
+        return
+    
+    text, keyboard = await build_search_page(db, query, page, *cursor)
+    await safe_edit_message(callback, text, reply_markup=keyboard, parse_mode=None)
+
+async def admin_stats_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler):
+    """Статистика для админа"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
+        return
     
-    # Получаем общее количество матчей
-    total_matches = 0
-    for tournament in tournaments:
-        matches = db.get_tournament_matches(tournament[0])
-        total_matches += len(matches)
+    await state.finish()
+    stats = await db.get_bot_stats()
     
     text = f"""
 📊 Статистика бота:
 
-👥 Пользователи: {users_count}
-🏆 Всего турниров: {len(tournaments)}
-✅ Активных турниров: {len(active_tournaments)}
-⚽ Всего матчей: {total_matches}
+👥 Пользователи: {stats.users}
+🟢 Активных за сутки: {stats.active_users_24h}
+🏆 Всего турниров: {stats.tournaments}
+✅ Активных турниров: {stats.active_tournaments}
+⚽ Всего матчей: {stats.matches}
+🏁 Рассчитано: {stats.settled_matches} | ⏳ Ожидают результата: {stats.matches - stats.settled_matches}
+🎯 Всего ставок: {stats.bets}
+📅 Ставок сегодня: {stats.bets_today}
+⏱ Ставок за текущий час: {stats.bets_last_hour} (в среднем за сутки: {stats.bets_last_24h / 24:.1f} в час)
     """
     
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         text,
-        reply_markup=get_admin_main_keyboard()
+        reply_markup=get_admin_main_keyboard(),
+        parse_mode=None
     )
 
 # Управление турнирами
-async def tournament_detail_callback(callback: CallbackQuery, state: FSMContext):
+async def tournament_detail_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, tournament_id: int):
     """Детальная информация о турнире"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
@@ -139,32 +228,32 @@ async def tournament_detail_callback(callback: CallbackQuery, state: FSMContext)
     
     await state.finish()
     
-    tournament_id = int(callback.data.split('_')[1])
-    
-    db = DatabaseHandler('users.db')
-    tournament = db.get_tournament(tournament_id)
-    matches = db.get_tournament_matches(tournament_id)
+    tournament = await db.get_tournament(tournament_id)
+    matches = await db.get_tournament_matches(tournament_id)
     
     if tournament:
-        status = "✅ Активный" if tournament[3] == 'active' else "❌ Неактивный"
+        status = "✅ Активный" if tournament.status == 'active' else "❌ Неактивный"
         text = f"""
 🏆 Информация о турнире:
 
-📌 Название: {tournament[1]}
-📝 Описание: {tournament[2] or 'Нет описания'}
+📌 Название: {tournament.name}
+📝 Описание: {tournament.description or 'Нет описания'}
 🔰 Статус: {status}
-📅 Дата создания: {tournament[4]}
-🆔 ID: {tournament[0]}
+📅 Дата создания: {tournament.created_date}
+🆔 ID: {tournament.id}
 ⚽ Матчей: {len(matches)}
+🏅 Очки: 🎯 {tournament.exact_points} | ± {tournament.diff_points} | ✓ {tournament.outcome_points}
         """
-        await callback.message.edit_text(
+        await safe_edit_message(
+            callback,
             text,
-            reply_markup=get_admin_tournament_detail_keyboard(tournament_id, tournament[3])
+            reply_markup=get_admin_tournament_detail_keyboard(tournament_id, tournament.status),
+            parse_mode=None
         )
     else:
         await callback.answer("❌ Турнир не найден.", show_alert=True)
 
-async def tournament_matches_callback(callback: CallbackQuery, state: FSMContext):
+async def tournament_matches_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, tournament_id: int):
     """Список матчей турнира для админа"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
@@ -172,26 +261,25 @@ async def tournament_matches_callback(callback: CallbackQuery, state: FSMContext
     
     await state.finish()
     
-    tournament_id = int(callback.data.split('_')[2])
-    
-    db = DatabaseHandler('users.db')
-    tournament = db.get_tournament(tournament_id)
-    matches = db.get_tournament_matches(tournament_id)
+    tournament = await db.get_tournament(tournament_id)
+    matches = await db.get_tournament_matches(tournament_id)
     
     if tournament:
         if matches:
-            text = f"🏆 Матчи турнира: {tournament[1]}\n\n"
+            text = f"🏆 Матчи турнира: {tournament.name}\n\n"
             for match in matches:
                 # Проверяем истекло ли время матча
-                is_expired = db.is_match_expired(match[2], match[3])
+                is_expired = db.is_match_expired(match.kickoff_ts)
                 status = "⏰ Истек" if is_expired else "✅ Активен"
-                text += f"📅 {match[2]} {match[3]} - {match[4]} vs {match[5]} ({status})\n\n"
+                text += f"📅 {match.match_date} {match.match_time} - {match.team1} vs {match.team2} ({status})\n\n"
         else:
-            text = f"🏆 В турнире '{tournament[1]}' пока нет матчей.\n\nДобавьте первый матч!"
+            text = f"🏆 В турнире '{tournament.name}' пока нет матчей.\n\nДобавьте первый матч!"
         
-        await callback.message.edit_text(
+        await safe_edit_message(
+            callback,
             text,
-            reply_markup=get_admin_tournament_matches_keyboard(tournament_id, matches)
+            reply_markup=get_admin_tournament_matches_keyboard(tournament_id, matches),
+            parse_mode=None
         )
     else:
         await callback.answer("❌ Турнир не найден.", show_alert=True)
@@ -202,9 +290,11 @@ async def add_tournament_callback(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "🏆 Добавление турнира\n\nВведите название турнира:",
-        reply_markup=get_cancel_keyboard()
+        reply_markup=get_cancel_keyboard(),
+        parse_mode=None
     )
     await AdminStates.waiting_for_tournament_name.set()
 
@@ -219,23 +309,22 @@ async def process_tournament_name(message: Message, state: FSMContext):
     )
     await AdminStates.waiting_for_tournament_description.set()
 
-async def process_tournament_description(message: Message, state: FSMContext):
+async def process_tournament_description(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка описания турнира и сохранение"""
     async with state.proxy() as data:
         data['description'] = message.text
     
-    db = DatabaseHandler('users.db')
-    if db.add_tournament(data['name'], data['description'], message.from_user.id):
+    if await db.add_tournament(data['name'], data['description'], message.from_user.id):
         await message.answer(
             "✅ Турнир успешно добавлен!",
             reply_markup=types.ReplyKeyboardRemove()
         )
         # Показываем обновленный список турниров
-        tournaments = db.get_all_tournaments_admin()
+        tournaments = await db.get_all_tournaments_admin()
         text = "🏆 Список всех турниров:\n\n"
         for tournament in tournaments:
-            status = "✅ Активный" if tournament[3] == 'active' else "❌ Неактивный"
-            text += f"• {tournament[1]} ({status})\n"
+            status = "✅ Активный" if tournament.status == 'active' else "❌ Неактивный"
+            text += f"• {tournament.name} ({status})\n"
         
         await message.answer(
             text,
@@ -249,117 +338,182 @@ async def process_tournament_description(message: Message, state: FSMContext):
     
     await state.finish()
 
-async def activate_tournament_callback(callback: CallbackQuery):
+async def activate_tournament_callback(callback: CallbackQuery, db: AsyncDatabaseHandler, tournament_id: int):
     """Активация турнира"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
-    tournament_id = int(callback.data.split('_')[2])
-    
-    db = DatabaseHandler('users.db')
-    if db.update_tournament_status(tournament_id, 'active'):
+    if await db.update_tournament_status(tournament_id, 'active'):
         await callback.answer("✅ Турнир активирован!", show_alert=True)
         # Обновляем сообщение
-        tournament = db.get_tournament(tournament_id)
-        matches = db.get_tournament_matches(tournament_id)
+        tournament = await db.get_tournament(tournament_id)
+        matches = await db.get_tournament_matches(tournament_id)
         
         text = f"""
 🏆 Информация о турнире:
 
-📌 Название: {tournament[1]}
-📝 Описание: {tournament[2] or 'Нет описания'}
+📌 Название: {tournament.name}
+📝 Описание: {tournament.description or 'Нет описания'}
 🔰 Статус: ✅ Активный
-📅 Дата создания: {tournament[4]}
-🆔 ID: {tournament[0]}
+📅 Дата создания: {tournament.created_date}
+🆔 ID: {tournament.id}
 ⚽ Матчей: {len(matches)}
         """
-        await callback.message.edit_text(
+        await safe_edit_message(
+            callback,
             text,
-            reply_markup=get_admin_tournament_detail_keyboard(tournament_id, 'active')
+            reply_markup=get_admin_tournament_detail_keyboard(tournament_id, 'active'),
+            parse_mode=None
         )
     else:
         await callback.answer("❌ Ошибка при активации турнира.", show_alert=True)
 
-async def deactivate_tournament_callback(callback: CallbackQuery):
+async def deactivate_tournament_callback(callback: CallbackQuery, db: AsyncDatabaseHandler, tournament_id: int):
     """Деактивация турнира"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
-    tournament_id = int(callback.data.split('_')[2])
-    
-    db = DatabaseHandler('users.db')
-    if db.update_tournament_status(tournament_id, 'inactive'):
+    if await db.update_tournament_status(tournament_id, 'inactive'):
         await callback.answer("✅ Турнир деактивирован!", show_alert=True)
         # Обновляем сообщение
-        tournament = db.get_tournament(tournament_id)
-        matches = db.get_tournament_matches(tournament_id)
+        tournament = await db.get_tournament(tournament_id)
+        matches = await db.get_tournament_matches(tournament_id)
         
         text = f"""
 🏆 Информация о турнире:
 
-📌 Название: {tournament[1]}
-📝 Описание: {tournament[2] or 'Нет описания'}
+📌 Название: {tournament.name}
+📝 Описание: {tournament.description or 'Нет описания'}
 🔰 Статус: ❌ Неактивный
-📅 Дата создания: {tournament[4]}
-🆔 ID: {tournament[0]}
+📅 Дата создания: {tournament.created_date}
+🆔 ID: {tournament.id}
 ⚽ Матчей: {len(matches)}
         """
-        await callback.message.edit_text(
+        await safe_edit_message(
+            callback,
             text,
-            reply_markup=get_admin_tournament_detail_keyboard(tournament_id, 'inactive')
+            reply_markup=get_admin_tournament_detail_keyboard(tournament_id, 'inactive'),
+            parse_mode=None
         )
     else:
         await callback.answer("❌ Ошибка при деактивации турнира.", show_alert=True)
 
-async def delete_tournament_callback(callback: CallbackQuery):
+async def delete_tournament_callback(callback: CallbackQuery, db: AsyncDatabaseHandler, tournament_id: int):
     """Удаление турнира"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
-    tournament_id = int(callback.data.split('_')[2])
-    
-    db = DatabaseHandler('users.db')
-    if db.delete_tournament(tournament_id):
+    if await db.delete_tournament(tournament_id):
         await callback.answer("✅ Турнир удален!", show_alert=True)
         # Возвращаемся к списку турниров
-        tournaments = db.get_all_tournaments_admin()
+        tournaments = await db.get_all_tournaments_admin()
         text = "🏆 Список всех турниров:\n\n"
         for tournament in tournaments:
-            status = "✅ Активный" if tournament[3] == 'active' else "❌ Неактивный"
-            text += f"• {tournament[1]} ({status})\n"
+            status = "✅ Активный" if tournament.status == 'active' else "❌ Неактивный"
+            text += f"• {tournament.name} ({status})\n"
         
-        await callback.message.edit_text(
+        await safe_edit_message(
+            callback,
             text,
-            reply_markup=get_admin_tournaments_keyboard(tournaments)
+            reply_markup=get_admin_tournaments_keyboard(tournaments),
+            parse_mode=None
         )
     else:
         await callback.answer("❌ Ошибка при удалении турнира.", show_alert=True)
 
+async def edit_rules_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, tournament_id: int):
+    """Начало изменения правил начисления очков турнира"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
+        return
+    
+    tournament = await db.get_tournament(tournament_id)
+    
+    if not tournament:
+        await callback.answer("❌ Турнир не найден.", show_alert=True)
+        return
+    
+    async with state.proxy() as data:
+        data['tournament_id'] = tournament_id
+    
+    await safe_edit_message(
+        callback,
+        f"⚙️ Правила подсчета: {tournament.name}\n\n"
+        f"Сейчас: 🎯 точный счет - {tournament.exact_points}, ± разница мячей - {tournament.diff_points}, "
+        f"✓ исход - {tournament.outcome_points}\n\n"
+        f"📝 Введите очки за точный счет, разницу мячей и исход через пробел (например: 3 2 1).\n"
+        f"Очки всех ставок турнира будут пересчитаны.",
+        reply_markup=get_cancel_to_tournament_keyboard(tournament_id),
+        parse_mode=None
+    )
+    await AdminStates.waiting_for_scoring_rules.set()
+
+async def process_scoring_rules(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
+    """Обработка правил начисления очков и пересчет турнира"""
+    async with state.proxy() as data:
+        tournament_id = data['tournament_id']
+    
+    parts = message.text.split()
+    if len(parts) != 3 or not all(part.isdigit() and int(part) <= 100 for part in parts):
+        await message.answer(
+            "❌ Введите три целых числа от 0 до 100 через пробел (например: 3 2 1). Попробуйте еще раз:",
+            reply_markup=get_cancel_to_tournament_keyboard(tournament_id)
+        )
+        return
+    
+    exact_points, diff_points, outcome_points = map(int, parts)
+    tournament = await db.get_tournament(tournament_id)
+    
+    if tournament and await db.update_tournament_rules(tournament_id, exact_points, diff_points, outcome_points):
+        await message.answer(
+            f"✅ Правила сохранены, очки турнира пересчитаны!\n\n"
+            f"🎯 точный счет - {exact_points}, ± разница мячей - {diff_points}, ✓ исход - {outcome_points}",
+            reply_markup=get_admin_tournament_detail_keyboard(tournament_id, tournament.status)
+        )
+    else:
+        await message.answer(
+            "❌ Ошибка при сохранении правил.",
+            reply_markup=get_cancel_to_tournament_keyboard(tournament_id)
+        )
+    
+    await state.finish()
+
+async def rescore_tournament_callback(callback: CallbackQuery, db: AsyncDatabaseHandler, tournament_id: int):
+    """Полный пересчет очков турнира"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
+        return
+    
+    if await db.rebuild_tournament_standings(tournament_id):
+        await callback.answer("✅ Очки турнира пересчитаны!", show_alert=True)
+    else:
+        await callback.answer("❌ Ошибка при пересчете очков.", show_alert=True)
+
 # Управление матчами
-async def add_match_callback(callback: CallbackQuery, state: FSMContext):
+async def add_match_callback(callback: CallbackQuery, state: FSMContext, tournament_id: int):
     """Начало добавления матча"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
-    tournament_id = int(callback.data.split('_')[2])
-    
     async with state.proxy() as data:
         data['tournament_id'] = tournament_id
     
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "⚽ Добавление матча\n\nВведите дату матча в формате ДД.ММ.ГГГГ (например: 04.11.2025):",
-        reply_markup=get_cancel_to_tournament_keyboard(tournament_id)
+        reply_markup=get_cancel_to_tournament_keyboard(tournament_id),
+        parse_mode=None
     )
     await AdminStates.waiting_for_match_date.set()
 
 async def process_match_date(message: Message, state: FSMContext):
     """Обработка даты матча"""
     date_parts = message.text.split('.')
-    if len(date_parts) != 3 or not all(part.isdigit() for part in date_parts):
+    if len(date_parts) != 3 or not all(part.isdigit() for part in date_parts) or not parse_user_date(message.text):
         await message.answer("❌ Неверный формат даты. Используйте ДД.ММ.ГГГГ (например: 04.11.2025):")
         return
     
@@ -375,7 +529,7 @@ async def process_match_date(message: Message, state: FSMContext):
 async def process_match_time(message: Message, state: FSMContext):
     """Обработка времени матча"""
     time_parts = message.text.split(':')
-    if len(time_parts) != 2 or not all(part.isdigit() for part in time_parts):
+    if len(time_parts) != 2 or not all(part.isdigit() for part in time_parts) or not parse_user_time(message.text):
         await message.answer("❌ Неверный формат времени. Используйте ЧЧ:ММ (например: 20:45):")
         return
     
@@ -399,13 +553,12 @@ async def process_team1(message: Message, state: FSMContext):
     )
     await AdminStates.waiting_for_team2.set()
 
-async def process_team2(message: Message, state: FSMContext):
+async def process_team2(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка названия второй команды и сохранение матча"""
     async with state.proxy() as data:
         data['team2'] = message.text
     
-    db = DatabaseHandler('users.db')
-    if db.add_match(
+    if await db.add_match(
         data['tournament_id'], 
         data['match_date'], 
         data['match_time'], 
@@ -418,15 +571,15 @@ async def process_team2(message: Message, state: FSMContext):
             reply_markup=types.ReplyKeyboardRemove()
         )
         # Показываем обновленный список матчей
-        tournament = db.get_tournament(data['tournament_id'])
-        matches = db.get_tournament_matches(data['tournament_id'])
+        tournament = await db.get_tournament(data['tournament_id'])
+        matches = await db.get_tournament_matches(data['tournament_id'])
         
         if matches:
-            text = f"🏆 Матчи турнира: {tournament[1]}\n\n"
+            text = f"🏆 Матчи турнира: {tournament.name}\n\n"
             for match in matches:
-                text += f"📅 {match[2]} {match[3]} - {match[4]} vs {match[5]}\n\n"
+                text += f"📅 {match.match_date} {match.match_time} - {match.team1} vs {match.team2}\n\n"
         else:
-            text = f"🏆 В турнире '{tournament[1]}' пока нет матчей.\n\nДобавьте первый матч!"
+            text = f"🏆 В турнире '{tournament.name}' пока нет матчей.\n\nДобавьте первый матч!"
         
         await message.answer(
             text,
@@ -440,37 +593,31 @@ async def process_team2(message: Message, state: FSMContext):
     
     await state.finish()
 
-async def admin_match_detail_callback(callback: CallbackQuery, state: FSMContext):
+async def admin_match_detail_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, match_id: int):
     """Детальная информация о матче для админа"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
     await state.finish()
-    match_id = int(callback.data.split('_')[2])
-    
-    db = DatabaseHandler('users.db')
-    match = db.get_match(match_id)
+    match = await db.get_match(match_id)
     
     if match:
-        # Получаем количество ставок на матч
-        bets_count = db.get_match_bets_count(match_id)
-        
         text = f"""
 ⚽ Информация о матче:
 
-📅 Дата: {match[2]}
-⏰ Время: {match[3]}
-🏆 Команда 1: {match[4]}
-🏆 Команда 2: {match[5]}
-🔰 Статус: {match[6]}
-📊 Ставок сделано: {bets_count}
-📅 Создан: {match[7] if match[7] else 'Не указана'}
-🆔 ID: {match[0]}
+📅 Дата: {match.match_date}
+⏰ Время: {match.match_time}
+🏆 Команда 1: {match.team1}
+🏆 Команда 2: {match.team2}
+🔰 Статус: {match.status}
+📊 Ставок сделано: {match.bets_count}
+📅 Создан: {match.created_date if match.created_date else 'Не указана'}
+🆔 ID: {match.id}
         """
         
         # Добавляем информацию о результате, если он есть и не является датой
-        match_result = match[8] if len(match) > 8 else None
+        match_result = match.result
         
         # Простая проверка: если результат содержит "-" и состоит только из цифр и дефиса, то это счет
         if (match_result and 
@@ -481,23 +628,39 @@ async def admin_match_detail_callback(callback: CallbackQuery, state: FSMContext
         else:
             text += f"\n🎯 Результат: `Неизвестно`"  # Зеленый шрифт
         
-        await callback.message.edit_text(
+        await safe_edit_message(
+            callback,
             text,
-            reply_markup=get_admin_match_detail_keyboard(match_id, match[1])
+            reply_markup=get_admin_match_detail_keyboard(match_id, match.tournament_id, match.points_multiplier),
+            parse_mode=None
         )
     else:
         await callback.answer("❌ Матч не найден.", show_alert=True)
 
-async def enter_result_callback(callback: CallbackQuery, state: FSMContext):
-    """Начало ввода результата матча"""
+async def match_multiplier_callback(callback: CallbackQuery, db: AsyncDatabaseHandler, match_id: int, multiplier: int):
+    """Изменение множителя очков за матч"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
-    match_id = int(callback.data.split('_')[2])
+    match = await db.get_match(match_id)
     
-    db = DatabaseHandler('users.db')
-    match = db.get_match(match_id)
+    if match and await db.update_match_multiplier(match_id, multiplier):
+        await callback.answer(f"✅ Очки за матч: x{multiplier}", show_alert=True)
+        await safe_edit_reply_markup(
+            callback,
+            get_admin_match_detail_keyboard(match_id, match.tournament_id, multiplier)
+        )
+    else:
+        await callback.answer("❌ Ошибка при изменении коэффициента.", show_alert=True)
+
+async def enter_result_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, match_id: int):
+    """Начало ввода результата матча"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
+        return
+    
+    match = await db.get_match(match_id)
     
     if not match:
         await callback.answer("❌ Матч не найден.", show_alert=True)
@@ -505,18 +668,20 @@ async def enter_result_callback(callback: CallbackQuery, state: FSMContext):
     
     async with state.proxy() as data:
         data['match_id'] = match_id
-        data['tournament_id'] = match[1]
+        data['tournament_id'] = match.tournament_id
     
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         f"⚽ Ввод результата матча:\n\n"
-        f"📅 {match[2]} {match[3]}\n"
-        f"🏆 {match[4]} vs {match[5]}\n\n"
+        f"📅 {match.match_date} {match.match_time}\n"
+        f"🏆 {match.team1} vs {match.team2}\n\n"
         f"📝 Введите окончательный счет матча в формате X-Y (например: 2-1):",
-        reply_markup=get_cancel_to_matches_keyboard(match[1])
+        reply_markup=get_cancel_to_matches_keyboard(match.tournament_id),
+        parse_mode=None
     )
     await AdminStates.waiting_for_match_result.set()
 
-async def process_match_result(message: Message, state: FSMContext):
+async def process_match_result(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка результата матча"""
     result = message.text.strip()
     
@@ -534,36 +699,32 @@ async def process_match_result(message: Message, state: FSMContext):
         match_id = data['match_id']
         tournament_id = data['tournament_id']
     
-    db = DatabaseHandler('users.db')
-    
-    if db.update_match_result(match_id, result):
+    if await db.update_match_result(match_id, result):
         await message.answer(
             f"✅ Результат матча {result} успешно сохранен!",
             reply_markup=types.ReplyKeyboardRemove()
         )
         
         # Возвращаемся к информации о матче
-        match = db.get_match(match_id)
-        match_with_bets = db.get_match_with_bets(match_id)
-        bets_count = match_with_bets[8] if match_with_bets else 0
+        match = await db.get_match(match_id)
         
         text = f"""
 ⚽ Информация о матче:
 
-📅 Дата: {match[2]}
-⏰ Время: {match[3]}
-🏆 Команда 1: {match[4]}
-🏆 Команда 2: {match[5]}
-🔰 Статус: {match[6]}
-🎯 Результат: {match[8]}
-📊 Ставок сделано: {bets_count}
-📅 Создан: {match[7] if match[7] else 'Не указана'}
-🆔 ID: {match[0]}
+📅 Дата: {match.match_date}
+⏰ Время: {match.match_time}
+🏆 Команда 1: {match.team1}
+🏆 Команда 2: {match.team2}
+🔰 Статус: {match.status}
+🎯 Результат: {match.result}
+📊 Ставок сделано: {match.bets_count}
+📅 Создан: {match.created_date if match.created_date else 'Не указана'}
+🆔 ID: {match.id}
         """
         
         await message.answer(
             text,
-            reply_markup=get_admin_match_detail_keyboard(match_id, tournament_id)
+            reply_markup=get_admin_match_detail_keyboard(match_id, tournament_id, match.points_multiplier)
         )
     else:
         await message.answer(
@@ -573,34 +734,33 @@ async def process_match_result(message: Message, state: FSMContext):
     
     await state.finish()
 
-async def delete_match_callback(callback: CallbackQuery):
+async def delete_match_callback(callback: CallbackQuery, db: AsyncDatabaseHandler, match_id: int):
     """Удаление матча"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет прав доступа.", show_alert=True)
         return
     
-    match_id = int(callback.data.split('_')[2])
-    
-    db = DatabaseHandler('users.db')
-    match = db.get_match(match_id)
+    match = await db.get_match(match_id)
     
-    if match and db.delete_match(match_id):
+    if match and await db.delete_match(match_id):
         await callback.answer("✅ Матч удален!", show_alert=True)
         # Возвращаемся к списку матчей турнира
-        tournament_id = match[1]
-        tournament = db.get_tournament(tournament_id)
-        matches = db.get_tournament_matches(tournament_id)
+        tournament_id = match.tournament_id
+        tournament = await db.get_tournament(tournament_id)
+        matches = await db.get_tournament_matches(tournament_id)
         
         if matches:
-            text = f"🏆 Матчи турнира: {tournament[1]}\n\n"
+            text = f"🏆 Матчи турнира: {tournament.name}\n\n"
             for match_item in matches:
-                text += f"📅 {match_item[2]} {match_item[3]} - {match_item[4]} vs {match_item[5]}\n\n"
+                text += f"📅 {match_item.match_date} {match_item.match_time} - {match_item.team1} vs {match_item.team2}\n\n"
         else:
-            text = f"🏆 В турнире '{tournament[1]}' пока нет матчей.\n\nДобавьте первый матч!"
+            text = f"🏆 В турнире '{tournament.name}' пока нет матчей.\n\nДобавьте первый матч!"
         
-        await callback.message.edit_text(
+        await safe_edit_message(
+            callback,
             text,
-            reply_markup=get_admin_tournament_matches_keyboard(tournament_id, matches)
+            reply_markup=get_admin_tournament_matches_keyboard(tournament_id, matches),
+            parse_mode=None
         )
     else:
         await callback.answer("❌ Ошибка при удалении матча.", show_alert=True)
@@ -612,9 +772,11 @@ async def admin_back_to_main(callback: CallbackQuery, state: FSMContext):
         return
     
     await state.finish()
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "👑 Панель администратора\n\nВыберите раздел:",
-        reply_markup=get_admin_main_keyboard()
+        reply_markup=get_admin_main_keyboard(),
+        parse_mode=None
     )
 
 def register_admin_handlers(dp: Dispatcher):
@@ -622,33 +784,46 @@ def register_admin_handlers(dp: Dispatcher):
     # Команда /admin
     dp.register_message_handler(admin_command, commands=['admin'])
     
+    router = get_callback_router(dp)
+
     # Главное меню админа
-    dp.register_callback_query_handler(admin_main_callback, lambda c: c.data == "admin_main", state="*")
-    dp.register_callback_query_handler(admin_back_to_main, lambda c: c.data == "admin_main", state="*")
+    router.register(admin_main_callback, "admin_main", state="*")
+    router.register(admin_back_to_main, "admin_main", state="*")
     
     # Разделы админ-панели
-    dp.register_callback_query_handler(admin_tournaments_callback, lambda c: c.data == "admin_tournaments", state="*")
-    dp.register_callback_query_handler(admin_users_callback, lambda c: c.data == "admin_users", state="*")
-    dp.register_callback_query_handler(admin_stats_callback, lambda c: c.data == "admin_stats", state="*")
+    router.register(admin_tournaments_callback, "admin_tournaments", state="*")
+    router.register(admin_users_callback, "admin_users", state="*", page=int, cursor=PageCursor.parse)
+    router.register(admin_user_search_callback, "admin_user_search", state="*")
+    router.register(admin_search_page_callback, "admin_search", state="*", page=int, cursor=PageCursor.parse)
+    router.register(admin_stats_callback, "admin_stats", state="*")
     
     # Управление турнирами
-    dp.register_callback_query_handler(add_tournament_callback, lambda c: c.data == "add_tournament", state="*")
-    dp.register_callback_query_handler(tournament_detail_callback, lambda c: c.data.startswith("tournament_") and not c.data.startswith("tournament_matches_"), state="*")
-    dp.register_callback_query_handler(tournament_matches_callback, lambda c: c.data.startswith("tournament_matches_"), state="*")
-    dp.register_callback_query_handler(activate_tournament_callback, lambda c: c.data.startswith("activate_tournament_"))
-    dp.register_callback_query_handler(deactivate_tournament_callback, lambda c: c.data.startswith("deactivate_tournament_"))
-    dp.register_callback_query_handler(delete_tournament_callback, lambda c: c.data.startswith("delete_tournament_"))
+    router.register(add_tournament_callback, "add_tournament", state="*")
+    router.register(tournament_detail_callback, "tournament", state="*", tournament_id=int)
+    router.register(tournament_matches_callback, "tournament_matches", state="*", tournament_id=int)
+    router.register(activate_tournament_callback, "activate_tournament", tournament_id=int)
+    router.register(deactivate_tournament_callback, "deactivate_tournament", tournament_id=int)
+    router.register(delete_tournament_callback, "delete_tournament", tournament_id=int)
+    router.register(edit_rules_callback, "edit_rules", state="*", tournament_id=int)
+    router.register(rescore_tournament_callback, "rescore_tournament", tournament_id=int)
     
     # Управление матчами
-    dp.register_callback_query_handler(add_match_callback, lambda c: c.data.startswith("add_match_"), state="*")
-    dp.register_callback_query_handler(admin_match_detail_callback, lambda c: c.data.startswith("admin_match_"), state="*")
-    dp.register_callback_query_handler(enter_result_callback, lambda c: c.data.startswith("enter_result_"), state="*")
-    dp.register_callback_query_handler(delete_match_callback, lambda c: c.data.startswith("delete_match_"))
+    router.register(add_match_callback, "add_match", state="*", tournament_id=int)
+    router.register(admin_match_detail_callback, "admin_match", state="*", match_id=int)
+    router.register(enter_result_callback, "enter_result", state="*", match_id=int)
+    router.register(delete_match_callback, "delete_match", match_id=int)
+    router.register(match_multiplier_callback, "match_multiplier", match_id=int, multiplier=int)
     
     # FSM для добавления турнира
     dp.register_message_handler(process_tournament_name, state=AdminStates.waiting_for_tournament_name)
     dp.register_message_handler(process_tournament_description, state=AdminStates.waiting_for_tournament_description)
     
+    # FSM для поиска пользователей
+    dp.register_message_handler(process_user_search, state=AdminStates.waiting_for_user_search)
+    
+    # FSM для правил начисления очков
+    dp.register_message_handler(process_scoring_rules, state=AdminStates.waiting_for_scoring_rules)
+    
     # FSM для добавления матча
     dp.register_message_handler(process_match_date, state=AdminStates.waiting_for_match_date)
     dp.register_message_handler(process_match_time, state=AdminStates.waiting_for_match_time)
@@ -1,8 +1,8 @@
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import CallbackQuery, Message
-from aiogram.utils.exceptions import MessageNotModified
-from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
+from database.models import BetStatus
 from keyboards.menu import (
     get_main_inline_keyboard,
     get_profile_inline_keyboard,
@@ -12,9 +12,15 @@ from keyboards.menu import (
     get_user_tournament_matches_keyboard,
     get_tournament_detail_keyboard,
     get_tournament_players_keyboard,
+    get_tournament_leaderboard_keyboard,
+    get_user_bet_keyboard,
     get_back_keyboard
 )
 from states.user_states import ProfileStates, UserBetStates
+from utils.callback_data import PageCursor, pack
+from utils.callback_router import get_callback_router
+from utils.match_index import MatchIndex
+from utils.message_helpers import safe_edit_message
 from utils.validators import validate_username, validate_score
 import hashlib
 
@@ -38,42 +44,25 @@ def _is_datetime_string(self, text: str) -> bool:
             return True
     return False
 
-async def safe_edit_message(callback: CallbackQuery, text: str, reply_markup=None):
-    """Безопасное редактирование сообщения"""
-    try:
-        await callback.message.edit_text(text, reply_markup=reply_markup, parse_mode='Markdown')
-    except MessageNotModified:
-        pass
+def format_standing_row(row, user_id: int) -> str:
+    """Строка общей таблицы турнира (строка пользователя отмечается стрелкой)"""
+    name = f"@{row.username}".replace('_', '\\_') if row.username else f"ID: {row.user_id}"
+    marker = "👉 " if row.user_id == user_id else ""
+    return f"{marker}{row.position}. {name} - {row.points} очк. (🎯 {row.exact_hits} | ± {row.diff_hits} | ✓ {row.outcome_hits})\n"
 
-async def handle_navigation(callback: CallbackQuery, state: FSMContext):
-    """Универсальный обработчик навигации"""
-    await state.finish()
-    
-    navigation_config = {
-        "main_menu": {
-            "text": "Выберите действие:",
-            "keyboard": get_main_inline_keyboard()
-        },
-        "profile": {
-            "text": "👤 Личный кабинет. Выберите действие:",
-            "keyboard": get_profile_inline_keyboard()
-        },
-        "tournaments_main": {
-            "text": "🏆 Раздел турниров\n\nВыберите раздел:",
-            "keyboard": get_tournaments_main_keyboard()
-        },
-        "all_tournaments": {
-            "text": "📋 Все доступные турниры:\n\nВыберите турнир для участия:",
-            "keyboard": get_all_tournaments_keyboard(DatabaseHandler('users.db').get_all_tournaments())
-        },
-        "my_tournaments": {
-            "text": "🏆 Ваши турниры:\n\nВыберите турнир для просмотра:",
-            "keyboard": get_my_tournaments_keyboard(
-                DatabaseHandler('users.db').get_user_tournaments_with_bets(callback.from_user.id)
-            )
-        },
-        "help": {
-            "text": """🤖 **Помощь по боту:**
+# Отметки попадания ставки (значение Bet.hit)
+HIT_MARKS = {3: "🎯 точный счет", 2: "± разница мячей", 1: "✓ исход", 0: "✗ мимо"}
+
+def format_bet_row(bet) -> str:
+    """Строка ставки с результатом матча и начисленными очками"""
+    text = f"📅 {bet.match_date} | {bet.match_time} | {bet.team1} vs {bet.team2} | Счет: {bet.score}"
+    if bet.hit is None:
+        # Результат матча еще не введен
+        return text + " | 🎯 Итог: `Неизвестно`\n\n"
+    multiplier = f" (x{bet.points_multiplier})" if bet.points_multiplier and bet.points_multiplier != 1 else ""
+    return text + f" | 🎯 Итог: `{bet.match_result}` | {HIT_MARKS[bet.hit]}: +{bet.points} очк.{multiplier}\n\n"
+
+HELP_TEXT = """🤖 **Помощь по боту:**
 
 📱 **Регистрация:** 
 • Уникальный номер телефона и логин
@@ -93,11 +82,9 @@ async def handle_navigation(callback: CallbackQuery, state: FSMContext):
 3. Выберите матч
 4. Введите счет (формат X-Y)
 
-После ставки турнир появится в Мои турниры""",
-            "keyboard": get_back_keyboard()
-        },
-        "about": {
-            "text": """📞 **О нас**
+После ставки турнир появится в Мои турниры"""
+
+ABOUT_TEXT = """📞 **О нас**
 
 Современная платформа для организации турниров.
 
@@ -107,77 +94,98 @@ async def handle_navigation(callback: CallbackQuery, state: FSMContext):
 
 ⚽ **Ставки:** Прогнозирование результатов матчей.
 
-Следите за обновлениями!""",
-            "keyboard": get_back_keyboard()
-        }
+Следите за обновлениями!"""
+
+def build_static_screens() -> dict:
+    """Экраны навигации без данных из базы: текст и клавиатура"""
+    return {
+        "main_menu": ("Выберите действие:", get_main_inline_keyboard()),
+        "profile": ("👤 Личный кабинет. Выберите действие:", get_profile_inline_keyboard()),
+        "tournaments_main": ("🏆 Раздел турниров\n\nВыберите раздел:", get_tournaments_main_keyboard()),
+        "help": (HELP_TEXT, get_back_keyboard()),
+        "about": (ABOUT_TEXT, get_back_keyboard()),
     }
+
+async def all_tournaments_screen(callback: CallbackQuery, db: AsyncDatabaseHandler):
+    """Экран 'Все турниры'"""
+    return "📋 Все доступные турниры:\n\nВыберите турнир для участия:", get_all_tournaments_keyboard(await db.get_all_tournaments())
+
+async def my_tournaments_screen(callback: CallbackQuery, db: AsyncDatabaseHandler):
+    """Экран 'Мои турниры'"""
+    tournaments = await db.get_user_tournaments_with_bets(callback.from_user.id)
+    return "🏆 Ваши турниры:\n\nВыберите турнир для просмотра:", get_my_tournaments_keyboard(tournaments)
+
+# Статичные экраны строятся один раз при регистрации обработчиков
+STATIC_SCREENS = {}
+
+# Экраны с данными из базы: запрос выполняется, только когда экран выбран
+DYNAMIC_SCREENS = {
+    "all_tournaments": all_tournaments_screen,
+    "my_tournaments": my_tournaments_screen,
+}
+
+async def handle_navigation(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, action: str):
+    """Универсальный обработчик навигации"""
+    await state.finish()
+    
+    screen = STATIC_SCREENS.get(action)
+    if screen is None:
+        screen = await DYNAMIC_SCREENS[action](callback, db)
     
-    if callback.data in navigation_config:
-        config = navigation_config[callback.data]
-        await safe_edit_message(callback, config["text"], config["keyboard"])
+    text, keyboard = screen
+    await safe_edit_message(callback, text, keyboard)
 
-async def my_profile_callback(callback: CallbackQuery, state: FSMContext):
+async def my_profile_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler):
     """Показать профиль пользователя"""
     await state.finish()
     
-    db = DatabaseHandler('users.db')
     user_id = callback.from_user.id
-    user = db.get_user(user_id)
+    user = await db.get_user(user_id)
     
     if user:
-        # Используем новый метод для получения ставок с информацией о матчах
-        user_bets = db.get_user_bets_with_match_info(user_id)
-        user_tournaments = db.get_user_tournaments_with_bets(user_id)
-        
         profile_text = f"""👤 **Ваш профиль:**
 
 📱 **Телефон:** {user.phone_number}
 👤 **Логин:** {user.username or 'Не установлен'}
 📛 **ФИО:** {user.full_name or 'Не установлено'}
 📅 **Регистрация:** {user.registration_date}
-⚽ **Ставок:** {len(user_bets)}
-🏆 **Турниров:** {len(user_tournaments)}"""
+⚽ **Ставок:** {user.bets_count}
+🏆 **Турниров:** {user.tournaments_count}"""
         
         await safe_edit_message(callback, profile_text, get_profile_inline_keyboard())
     else:
         await callback.answer("❌ Профиль не найден.", show_alert=True)
 
-async def all_tournament_detail_callback(callback: CallbackQuery, state: FSMContext):
+async def all_tournament_detail_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler,
+                                         match_index: MatchIndex, tournament_id: int):
     """Детальная информация о турнире из раздела 'Все турниры'"""
     await state.finish()
     
-    tournament_id = int(callback.data.split('_')[2])
     user_id = callback.from_user.id
     
-    db = DatabaseHandler('users.db')
-    tournament = db.get_tournament(tournament_id)
+    tournament = await db.get_tournament(tournament_id)
     
     if not tournament:
         await callback.answer("❌ Турнир не найден.", show_alert=True)
         return
     
-    # Используем новый метод для получения доступных матчей
-    available_matches = db.get_available_tournament_matches(tournament_id, user_id)
-    all_matches = db.get_tournament_matches(tournament_id)
+    # Доступные матчи - из индекса в памяти (матчи турнира и ставки пользователя)
+    now_ts = db.get_current_timestamp()
+    available_matches = await match_index.get_available_matches(tournament_id, user_id, now_ts)
+    all_matches = await match_index.get_tournament_matches(tournament_id)
     
-    text = f"🏆 Турнир: {tournament[1]}\n"
-    if tournament[2]:
-        text += f"📝 {tournament[2]}\n\n"
+    text = f"🏆 Турнир: {tournament.name}\n"
+    if tournament.description:
+        text += f"📝 {tournament.description}\n\n"
     
     if available_matches:
         text += "Выберите матч для ввода счета:\n\n"
         for match in available_matches:
-            text += f"📅 {match[2]} {match[3]} - {match[4]} vs {match[5]}\n\n"
+            text += f"📅 {match.match_date} {match.match_time} - {match.team1} vs {match.team2}\n\n"
     else:
         if all_matches:
             # Проверяем, есть ли истекшие матчи без ставок
-            expired_without_bets = False
-            for match in all_matches:
-                if db.is_match_expired(match[2], match[3]):
-                    user_bet = db.get_user_bet(user_id, match[0])
-                    if not user_bet:
-                        expired_without_bets = True
-                        break
+            expired_without_bets = await match_index.has_expired_without_bet(tournament_id, user_id, now_ts)
             
             if expired_without_bets:
                 text += "⏰ Время для ставок на некоторые матчи истекло.\n\n"
@@ -192,29 +200,32 @@ async def all_tournament_detail_callback(callback: CallbackQuery, state: FSMCont
         get_user_tournament_matches_keyboard(tournament_id, available_matches, "all_tournaments")
     )
 
-async def my_tournament_detail_callback(callback: CallbackQuery, state: FSMContext):
+async def my_tournament_detail_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, tournament_id: int):
     """Детальная информация о турнире из раздела 'Мои турниры'"""
     await state.finish()
     
-    tournament_id = int(callback.data.split('_')[3])
-    
-    db = DatabaseHandler('users.db')
-    tournament = db.get_tournament(tournament_id)
+    tournament = await db.get_tournament(tournament_id)
     
     if not tournament:
         await callback.answer("❌ Турнир не найден.", show_alert=True)
         return
     
-    user_bets_count = len(db.get_tournament_bets_by_user(callback.from_user.id, tournament_id))
+    user_bets_count = await db.get_user_tournament_bets_count(callback.from_user.id, tournament_id)
+    neighbours = await db.get_standings_around_user(tournament_id, callback.from_user.id)
     
     text = f"""🏆 Детали турнира:
 
-📌 Название: {tournament[1]}
-📝 Описание: {tournament[2] or 'Нет описания'}
-🔰 Статус: {'✅ Активный' if tournament[3] == 'active' else '❌ Неактивный'}
+📌 Название: {tournament.name}
+📝 Описание: {tournament.description or 'Нет описания'}
+🔰 Статус: {'✅ Активный' if tournament.status == 'active' else '❌ Неактивный'}
 📊 Ваших ставок: {user_bets_count}
-
-Выберите раздел для просмотра:"""
+"""
+    if neighbours:
+        text += "\n📍 Ваше место в таблице:\n"
+        for row in neighbours:
+            text += format_standing_row(row, callback.from_user.id)
+    
+    text += "\nВыберите раздел для просмотра:"
     
     await safe_edit_message(
         callback,
@@ -222,37 +233,19 @@ async def my_tournament_detail_callback(callback: CallbackQuery, state: FSMConte
         get_tournament_detail_keyboard(tournament_id)
     )
 
-async def tournament_my_bets_callback(callback: CallbackQuery, state: FSMContext):
+async def tournament_my_bets_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, tournament_id: int):
     """Мои ставки в турнире"""
     await state.finish()
     
-    tournament_id = int(callback.data.split('_')[3])
-    
-    db = DatabaseHandler('users.db')
     user_id = callback.from_user.id
-    tournament = db.get_tournament(tournament_id)
-    bets = db.get_tournament_bets_by_user(user_id, tournament_id)
+    tournament = await db.get_tournament(tournament_id)
+    bets = await db.get_tournament_bets_by_user(user_id, tournament_id)
     
     if tournament and bets:
-        text = f"📋 Ваши ставки в турнире: {tournament[1]}\n\n"
+        text = f"📋 Ваши ставки в турнире: {tournament.name}\n\n"
         
-        for bet in bets:
-            # Получаем полную информацию о матче с результатом
-            match = db.get_match(bet[2])  # bet[2] - match_id
-            
-            # Проверяем есть ли результат и он не пустой и не является датой
-            match_result = match[8] if len(match) > 8 else None
-            
-            # Простая проверка: если результат содержит "-" и состоит только из цифр и дефиса, то это счет
-            if (match_result and 
-                match_result != 'None' and 
-                '-' in str(match_result) and
-                all(c.isdigit() or c == '-' for c in str(match_result).strip())):
-                result_text = f" | 🎯 Итог: `{match_result}`"  # Зеленый шрифт
-            else:
-                result_text = " | 🎯 Итог: `Неизвестно`"  # Зеленый шрифт
-            
-            text += f"📅 {bet[5]} | {bet[6]} | {bet[7]} vs {bet[8]} | Счет: {bet[3]}{result_text}\n\n"
+        # Результаты матчей и очки приходят тем же запросом, что и ставки
+        text += "".join(format_bet_row(bet) for bet in bets)
         
         await safe_edit_message(
             callback,
@@ -260,99 +253,153 @@ async def tournament_my_bets_callback(callback: CallbackQuery, state: FSMContext
             get_tournament_detail_keyboard(tournament_id)
         )
     else:
-        text = f"📋 В турнире '{tournament[1]}' у вас пока нет ставок."
+        text = f"📋 В турнире '{tournament.name}' у вас пока нет ставок."
         await safe_edit_message(
             callback,
             text,
             get_tournament_detail_keyboard(tournament_id)
         )
 
-async def tournament_players_callback(callback: CallbackQuery, state: FSMContext):
-    """Список игроков турнира с пагинацией"""
+async def tournament_players_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler,
+                                      tournament_id: int, page: int = 0, cursor: PageCursor = PageCursor()):
+    """Список игроков турнира с постраничной навигацией по курсору"""
     await state.finish()
     
-    parts = callback.data.split('_')
-    tournament_id = int(parts[2])
+    # Курсор: участники после него (вперед) или до него (назад)
+    users_per_page = 10
+    after_cursor, before_cursor = cursor
+    if after_cursor is None and before_cursor is None:
+        page = 0
     
-    # Получаем номер страницы
-    page = 0
-    if len(parts) > 3:
-        try:
-            page = int(parts[3])
-        except (ValueError, IndexError):
-            page = 0
-    
-    db = DatabaseHandler('users.db')
-    tournament = db.get_tournament(tournament_id)
+    tournament = await db.get_tournament(tournament_id)
     
     if not tournament:
         await callback.answer("❌ Турнир не найден.", show_alert=True)
         return
     
-    users = db.get_tournament_participants(tournament_id)
+    players_count = await db.get_tournament_participants_count(tournament_id)
+    participants = await db.get_tournament_participants(
+        tournament_id, after_cursor, users_per_page, before_cursor
+    ) if players_count else []
+    
+    # Курсор устарел (участники выбыли) - начинаем с первой страницы
+    if players_count and not participants:
+        page = 0
+        participants = await db.get_tournament_participants(tournament_id, limit=users_per_page)
     
-    if users:
-        # Пагинация
-        users_per_page = 10
-        total_pages = (len(users) + users_per_page - 1) // users_per_page
+    if participants:
+        total_pages = (players_count + users_per_page - 1) // users_per_page
+        page = max(0, min(page, total_pages - 1))
         start_index = page * users_per_page
-        end_index = start_index + users_per_page
-        current_users = users[start_index:end_index]
         
-        text = f"👥 Игроки турнира: {tournament[1]}\n\n"
-        text += f"📊 Всего участников: {len(users)}\n\n"
+        text = f"👥 Игроки турнира: {tournament.name}\n\n"
+        text += f"📊 Всего участников: {players_count}\n\n"
         
-        for i, user in enumerate(current_users, start_index + 1):
-            user_info = f"{i}. ID: {user.user_id}"
-            if user.username:
-                user_info += f", 👤: @{user.username}"
+        for i, participant in enumerate(participants, start_index + 1):
+            user_info = f"{i}. ID: {participant.user_id}"
+            if participant.username:
+                user_info += f", 👤: @{participant.username}"
             user_info += "\n"
             text += user_info
         
+        has_next = start_index + len(participants) < players_count
         await safe_edit_message(
             callback,
             text,
-            get_tournament_players_keyboard(tournament_id, page, total_pages, len(users))
+            get_tournament_players_keyboard(
+                tournament_id, page, total_pages, participants[0].id, participants[-1].id, has_next
+            )
         )
     else:
-        text = f"👥 В турнире '{tournament[1]}' пока нет участников."
+        text = f"👥 В турнире '{tournament.name}' пока нет участников."
         await safe_edit_message(
             callback,
             text,
             get_tournament_detail_keyboard(tournament_id)
         )
 
-async def tournament_leaderboard_callback(callback: CallbackQuery, state: FSMContext):
-    """Общая таблица турнира (заглушка)"""
+def leaderboard_page(value: str):
+    """Номер страницы общей таблицы или "me" (страница с местом пользователя)"""
+    return value if value == 'me' else int(value)
+
+async def tournament_leaderboard_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler,
+                                          tournament_id: int, page=0):
+    """Общая таблица турнира с пагинацией"""
     await state.finish()
     
-    tournament_id = int(callback.data.split('_')[3])
+    rows_per_page = 10
     
-    text = """📊 Общая таблица турнира
-
-⏳ Функция находится в разработке.
-В будущем здесь будет отображаться рейтинг участников.
-
-Следите за обновлениями!"""
+    tournament = await db.get_tournament(tournament_id)
+    
+    if not tournament:
+        await callback.answer("❌ Турнир не найден.", show_alert=True)
+        return
+    
+    my_standing = await db.get_user_standing(tournament_id, callback.from_user.id)
+    
+    # "me" - страница с местом пользователя
+    if page == 'me':
+        if not my_standing:
+            await callback.answer("📍 Вы пока не участвуете в этом турнире.", show_alert=True)
+            return
+        page = (my_standing.position - 1) // rows_per_page
+    
+    participants_count = await db.get_tournament_standings_count(tournament_id)
+    
+    if not participants_count:
+        await safe_edit_message(
+            callback,
+            f"📊 В турнире '{tournament.name}' пока нет участников.",
+            get_tournament_detail_keyboard(tournament_id)
+        )
+        return
+    
+    # Пагинация
+    total_pages = (participants_count + rows_per_page - 1) // rows_per_page
+    page = max(0, min(page, total_pages - 1))
+    start_index = page * rows_per_page
+    standings = await db.get_tournament_standings(tournament_id, rows_per_page, start_index)
+    
+    text = f"📊 Общая таблица турнира: {tournament.name}\n\n"
+    text += f"👥 Участников: {participants_count}\n"
+    if my_standing:
+        text += f"📍 Ваше место: {my_standing.position}\n"
+    text += "\n"
+    
+    for row in standings:
+        text += format_standing_row(row, callback.from_user.id)
+    
+    text += (f"\n🎯 точный счет - {tournament.exact_points} очк., ± разница мячей - {tournament.diff_points}, "
+             f"✓ исход - {tournament.outcome_points}")
     
     await safe_edit_message(
         callback,
         text,
-        get_tournament_detail_keyboard(tournament_id)
+        get_tournament_leaderboard_keyboard(tournament_id, page, total_pages, bool(my_standing))
     )
 
-async def tournament_rules_callback(callback: CallbackQuery, state: FSMContext):
-    """Правила турнира (заглушка)"""
+async def tournament_rules_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, tournament_id: int):
+    """Правила турнира"""
     await state.finish()
     
-    tournament_id = int(callback.data.split('_')[3])
+    tournament = await db.get_tournament(tournament_id)
     
-    text = """📖 Правила турнира
+    if not tournament:
+        await callback.answer("❌ Турнир не найден.", show_alert=True)
+        return
+    
+    text = f"""📖 Правила турнира: {tournament.name}
 
-⏳ Функция находится в разработке.
-В будущем здесь будут отображаться правила турнира.
+⚽ Прогноз на матч принимается до его начала (по московскому времени), до этого момента его можно изменить.
 
-Следите за обновлениями!"""
+🏅 Очки за прогноз:
+🎯 Точный счет - {tournament.exact_points} очк.
+± Верная разница мячей - {tournament.diff_points} очк.
+✓ Верный исход (победа или ничья) - {tournament.outcome_points} очк.
+
+✖️ За отдельные матчи (например, плей-офф) очки могут умножаться на коэффициент.
+
+📊 При равенстве очков выше в таблице участник с большим числом точных счетов, затем - угаданных разниц мячей."""
     
     await safe_edit_message(
         callback,
@@ -360,84 +407,126 @@ async def tournament_rules_callback(callback: CallbackQuery, state: FSMContext):
         get_tournament_detail_keyboard(tournament_id)
     )
 
-async def user_match_detail_callback(callback: CallbackQuery, state: FSMContext):
+async def user_match_detail_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler,
+                                     match_index: MatchIndex, match_id: int):
     """Детальная информация о матче для пользователя"""
     await state.finish()
     
-    match_id = int(callback.data.split('_')[2])
     user_id = callback.from_user.id
     
-    db = DatabaseHandler('users.db')
-    match = db.get_match(match_id)
+    match = await db.get_match(match_id)
     
     if not match:
         await callback.answer("❌ Матч не найден.", show_alert=True)
         return
     
     # Проверяем, не истекло ли время матча
-    if db.is_match_expired(match[2], match[3]):
+    if db.is_match_expired(match.kickoff_ts):
         await callback.answer("⏰ Время для ставок на этот матч истекло.", show_alert=True)
         
         # Возвращаем к списку матчей
-        tournament = db.get_tournament(match[1])
-        available_matches = db.get_available_tournament_matches(match[1], user_id)
+        tournament = await db.get_tournament(match.tournament_id)
+        available_matches = await match_index.get_available_matches(match.tournament_id, user_id)
         
-        text = f"🏆 Турнир: {tournament[1]}\n\n"
+        text = f"🏆 Турнир: {tournament.name}\n\n"
         text += "⏰ Время для ставок на выбранный матч истекло.\n\n"
         
         if available_matches:
             text += "Выберите другой матч:\n\n"
             for available_match in available_matches:
-                text += f"📅 {available_match[2]} {available_match[3]} - {available_match[4]} vs {available_match[5]}\n\n"
+                text += f"📅 {available_match.match_date} {available_match.match_time} - {available_match.team1} vs {available_match.team2}\n\n"
         
         await safe_edit_message(
             callback,
             text,
-            get_user_tournament_matches_keyboard(match[1], available_matches, "all_tournaments")
+            get_user_tournament_matches_keyboard(match.tournament_id, available_matches, "all_tournaments")
         )
         return
     
-    tournament = db.get_tournament(match[1])
-    user_bet = db.get_user_bet(user_id, match_id)
+    tournament = await db.get_tournament(match.tournament_id)
+    user_bet = await db.get_user_bet(user_id, match_id)
+    multiplier_text = f"\n✖️ Очки за матч умножаются на {match.points_multiplier}" if match.points_multiplier != 1 else ""
     
     if user_bet:
         text = f"""⚽ Информация о матче:
 
-🏆 Турнир: {tournament[1]}
-📅 Дата: {match[2]}
-⏰ Время: {match[3]}
-⚔️ Матч: {match[4]} vs {match[5]}
+🏆 Турнир: {tournament.name}
+📅 Дата: {match.match_date}
+⏰ Время: {match.match_time}
+⚔️ Матч: {match.team1} vs {match.team2}{multiplier_text}
 
-✅ Ваш счет: {user_bet[3]}
-📅 Дата ставки: {user_bet[4]}"""
+✅ Ваш счет: {user_bet.score}
+📅 Дата ставки: {user_bet.bet_date}"""
+        if user_bet.edited_date:
+            text += f"\n✏️ Изменена: {user_bet.edited_date}"
         
         await safe_edit_message(
             callback,
             text,
-            get_back_keyboard(f"all_tournament_{match[1]}", "🔙 Назад к турниру")
+            get_user_bet_keyboard(match_id, match.tournament_id)
         )
     else:
         text = f"""⚽ Ввод счета для матча:
 
-🏆 Турнир: {tournament[1]}
-📅 Дата: {match[2]}
-⏰ Время: {match[3]}
-⚔️ Матч: {match[4]} vs {match[5]}
+🏆 Турнир: {tournament.name}
+📅 Дата: {match.match_date}
+⏰ Время: {match.match_time}
+⚔️ Матч: {match.team1} vs {match.team2}{multiplier_text}
 
 📝 Введите счет матча в формате X-Y (например: 2-1):"""
         
         async with state.proxy() as data:
             data['match_id'] = match_id
-            data['match_info'] = f"{match[4]} vs {match[5]}"
-            data['tournament_id'] = match[1]
+            data['match_info'] = f"{match.team1} vs {match.team2}"
+            data['tournament_id'] = match.tournament_id
         
         await safe_edit_message(
             callback,
             text,
-            get_back_keyboard(f"all_tournament_{match[1]}", "🔙 Назад к турниру")
+            get_back_keyboard(pack("all_tournament", match.tournament_id), "🔙 Назад к турниру")
         )
         await UserBetStates.waiting_for_score.set()
 
+async def edit_bet_callback(callback: CallbackQuery, state: FSMContext, db: AsyncDatabaseHandler, match_id: int):
+    """Изменение прогноза на матч до его начала"""
+    await state.finish()
+    
+    match = await db.get_match(match_id)
+    
+    if not match:
+        await callback.answer("❌ Матч не найден.", show_alert=True)
+        return
+    
+    if db.is_match_expired(match.kickoff_ts):
+        await callback.answer("⏰ Матч уже начался, прогноз изменить нельзя.", show_alert=True)
+        return
+    
+    tournament = await db.get_tournament(match.tournament_id)
+    user_bet = await db.get_user_bet(callback.from_user.id, match_id)
+    
+    text = f"""✏️ Изменение прогноза:
+
+🏆 Турнир: {tournament.name}
+📅 Дата: {match.match_date}
+⏰ Время: {match.match_time}
+⚔️ Матч: {match.team1} vs {match.team2}
+"""
+    if user_bet:
+        text += f"\n✅ Текущий счет: {user_bet.score}\n"
+    text += "\n📝 Введите новый счет в формате X-Y (например: 2-1):"
+    
+    async with state.proxy() as data:
+        data['match_id'] = match_id
+        data['match_info'] = f"{match.team1} vs {match.team2}"
+        data['tournament_id'] = match.tournament_id
+    
+    await safe_edit_message(
+        callback,
+        text,
+        get_back_keyboard(pack("user_match", match_id), "🔙 Назад к матчу")
+    )
+    await UserBetStates.waiting_for_score.set()
+
 async def change_username_callback(callback: CallbackQuery, state: FSMContext):
     """Начало изменения логина"""
     await safe_edit_message(
@@ -458,7 +547,7 @@ async def change_password_callback(callback: CallbackQuery, state: FSMContext):
         data['step'] = 'waiting_current_password'
     await ProfileStates.waiting_for_password.set()
 
-async def process_username(message: Message, state: FSMContext):
+async def process_username(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка нового логина"""
     new_username = message.text.strip()
     
@@ -466,19 +555,18 @@ async def process_username(message: Message, state: FSMContext):
         await message.answer("❌ Неверный формат логина. Используйте латинские буквы, цифры и нижнее подчеркивание (3-20 символов).")
         return
     
-    db = DatabaseHandler('users.db')
     user_id = message.from_user.id
     
     # Проверка занятости логина
-    if db.is_username_taken(new_username):
-        current_user = db.get_user(user_id)
+    if await db.is_username_taken(new_username):
+        current_user = await db.get_user(user_id)
         if current_user and current_user.username == new_username:
             await message.answer("ℹ️ Это ваш текущий логин. Введите другой логин для изменения:")
         else:
             await message.answer("❌ Этот логин уже занят. Выберите другой логин:")
         return
     
-    if db.update_profile(user_id, username=new_username):
+    if await db.update_profile(user_id, username=new_username):
         await message.answer(
             "✅ Логин успешно обновлен!",
             reply_markup=types.ReplyKeyboardRemove()
@@ -492,20 +580,19 @@ async def process_username(message: Message, state: FSMContext):
     
     await state.finish()
 
-async def process_password_change(message: Message, state: FSMContext):
+async def process_password_change(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка смены пароля"""
     password = message.text.strip()
     
     async with state.proxy() as data:
         current_step = data.get('step', 'waiting_current_password')
     
-    db = DatabaseHandler('users.db')
     user_id = message.from_user.id
     
     if current_step == 'waiting_current_password':
         # Проверяем текущий пароль
         hashed_current_password = hash_password(password)
-        if not db.verify_password(user_id, hashed_current_password):
+        if not await db.verify_password(user_id, hashed_current_password):
             await message.answer("❌ Неверный текущий пароль. Попробуйте еще раз:")
             return
         
@@ -524,7 +611,7 @@ async def process_password_change(message: Message, state: FSMContext):
         # Хешируем и обновляем пароль
         hashed_new_password = hash_password(password)
         
-        if db.update_user_password(user_id, hashed_new_password):
+        if await db.update_user_password(user_id, hashed_new_password):
             await message.answer(
                 "✅ Пароль успешно изменен!",
                 reply_markup=types.ReplyKeyboardRemove()
@@ -538,7 +625,8 @@ async def process_password_change(message: Message, state: FSMContext):
         
         await state.finish()
 
-async def process_score_message(message: Message, state: FSMContext):
+async def process_score_message(message: Message, state: FSMContext, db: AsyncDatabaseHandler,
+                                match_index: MatchIndex):
     """Обработка сообщения с счетом"""
     score = message.text.strip()
     
@@ -551,27 +639,27 @@ async def process_score_message(message: Message, state: FSMContext):
         match_info = data['match_info']
         tournament_id = data['tournament_id']
     
-    db = DatabaseHandler('users.db')
     user_id = message.from_user.id
     
-    # Проверяем, не истекло ли время матча перед сохранением ставки
-    match = db.get_match(match_id)
-    if match and db.is_match_expired(match[2], match[3]):
+    # Время начала матча проверяется в том же запросе, что и запись ставки
+    status = await db.add_user_bet(user_id, match_id, score)
+    
+    if status == BetStatus.REJECTED_LATE:
         await message.answer(
             "⏰ Время для ставок на этот матч истекло. Ставка не принята.",
             reply_markup=types.ReplyKeyboardRemove()
         )
         
         # Возвращаем к списку доступных матчей
-        tournament = db.get_tournament(tournament_id)
-        available_matches = db.get_available_tournament_matches(tournament_id, user_id)
+        tournament = await db.get_tournament(tournament_id)
+        available_matches = await match_index.get_available_matches(tournament_id, user_id)
         
-        text = f"🏆 Турнир: {tournament[1]}\n\n"
+        text = f"🏆 Турнир: {tournament.name}\n\n"
         
         if available_matches:
             text += "Выберите доступный матч:\n\n"
             for available_match in available_matches:
-                text += f"📅 {available_match[2]} {available_match[3]} - {available_match[4]} vs {available_match[5]}\n\n"
+                text += f"📅 {available_match.match_date} {available_match.match_time} - {available_match.team1} vs {available_match.team2}\n\n"
         
         await message.answer(
             text,
@@ -580,31 +668,32 @@ async def process_score_message(message: Message, state: FSMContext):
         await state.finish()
         return
     
-    if db.add_user_bet(user_id, match_id, score):
+    if status:
+        action = "изменен" if status == BetStatus.UPDATED else "сохранен"
         await message.answer(
-            f"✅ Счет {score} для матча {match_info} успешно сохранен!",
+            f"✅ Счет {score} для матча {match_info} успешно {action}!",
             reply_markup=types.ReplyKeyboardRemove()
         )
         
         # Проверяем остались ли доступные матчи
-        tournament = db.get_tournament(tournament_id)
-        available_matches = db.get_available_tournament_matches(tournament_id, user_id)
+        tournament = await db.get_tournament(tournament_id)
+        available_matches = await match_index.get_available_matches(tournament_id, user_id)
         
         if available_matches:
-            text = f"🏆 Турнир: {tournament[1]}\n\n✅ Ваша ставка сохранена!\n\nВыберите следующий матч:\n\n"
+            text = f"🏆 Турнир: {tournament.name}\n\n✅ Ваша ставка сохранена!\n\nВыберите следующий матч:\n\n"
             for match in available_matches:
-                text += f"📅 {match[2]} {match[3]} - {match[4]} vs {match[5]}\n\n"
+                text += f"📅 {match.match_date} {match.match_time} - {match.team1} vs {match.team2}\n\n"
             
             await message.answer(
                 text,
                 reply_markup=get_user_tournament_matches_keyboard(tournament_id, available_matches, "all_tournaments")
             )
         else:
-            text = f"🏆 Турнир: {tournament[1]}\n\n🎉 Поздравляем! Вы сделали ставки на все доступные матчи!\n\nТеперь турнир доступен в разделе '🏆 Мои турниры'"
+            text = f"🏆 Турнир: {tournament.name}\n\n🎉 Поздравляем! Вы сделали ставки на все доступные матчи!\n\nТеперь турнир доступен в разделе '🏆 Мои турниры'"
             
             await message.answer(
                 text,
-                reply_markup=get_back_keyboard("tournaments_main", "🔙 В раздел турниров")
+                reply_markup=get_back_keyboard(pack("tournaments_main"), "🔙 В раздел турниров")
             )
     else:
         await message.answer("❌ Ошибка при сохранении ставки. Попробуйте еще раз.")
@@ -614,9 +703,11 @@ async def process_score_message(message: Message, state: FSMContext):
 async def cancel_operation(callback: CallbackQuery, state: FSMContext):
     """Отмена операции"""
     await state.finish()
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "❌ Операция отменена.",
-        reply_markup=get_profile_inline_keyboard()
+        reply_markup=get_profile_inline_keyboard(),
+        parse_mode=None
     )
 
 async def no_action_callback(callback: CallbackQuery):
@@ -626,34 +717,31 @@ async def no_action_callback(callback: CallbackQuery):
 def register_callback_handlers(dp: Dispatcher):
     """Регистрация обработчиков колбэков"""
     
-    # Основная навигация
-    navigation_handlers = [
-        "main_menu", "profile", "tournaments_main", 
-        "all_tournaments", "my_tournaments", "help", "about"
-    ]
+    router = get_callback_router(dp)
     
-    for handler in navigation_handlers:
-        dp.register_callback_query_handler(
-            handle_navigation, 
-            lambda c, h=handler: c.data == h, 
-            state="*"
-        )
+    # Основная навигация
+    STATIC_SCREENS.update(build_static_screens())
+    for action in [*STATIC_SCREENS, *DYNAMIC_SCREENS]:
+        router.register(handle_navigation, action, state="*")
     
     # Профиль пользователя
-    dp.register_callback_query_handler(my_profile_callback, lambda c: c.data == "my_profile", state="*")
-    dp.register_callback_query_handler(change_username_callback, lambda c: c.data == "change_username", state="*")
-    dp.register_callback_query_handler(change_password_callback, lambda c: c.data == "change_password", state="*")
+    router.register(my_profile_callback, "my_profile", state="*")
+    router.register(change_username_callback, "change_username", state="*")
+    router.register(change_password_callback, "change_password", state="*")
     
     # Турниры
-    dp.register_callback_query_handler(all_tournament_detail_callback, lambda c: c.data.startswith("all_tournament_"), state="*")
-    dp.register_callback_query_handler(my_tournament_detail_callback, lambda c: c.data.startswith("my_tournament_detail_"), state="*")
-    dp.register_callback_query_handler(tournament_my_bets_callback, lambda c: c.data.startswith("tournament_my_bets_"), state="*")
-    dp.register_callback_query_handler(tournament_players_callback, lambda c: c.data.startswith("tournament_players_"), state="*")
-    dp.register_callback_query_handler(tournament_leaderboard_callback, lambda c: c.data.startswith("tournament_leaderboard_"), state="*")
-    dp.register_callback_query_handler(tournament_rules_callback, lambda c: c.data.startswith("tournament_rules_"), state="*")
+    router.register(all_tournament_detail_callback, "all_tournament", state="*", tournament_id=int)
+    router.register(my_tournament_detail_callback, "my_tournament_detail", state="*", tournament_id=int)
+    router.register(tournament_my_bets_callback, "tournament_my_bets", state="*", tournament_id=int)
+    router.register(tournament_players_callback, "tournament_players", state="*",
+                    tournament_id=int, page=int, cursor=PageCursor.parse)
+    router.register(tournament_leaderboard_callback, "tournament_leaderboard", state="*",
+                    tournament_id=int, page=leaderboard_page)
+    router.register(tournament_rules_callback, "tournament_rules", state="*", tournament_id=int)
     
     # Матчи и ставки
-    dp.register_callback_query_handler(user_match_detail_callback, lambda c: c.data.startswith("user_match_"), state="*")
+    router.register(user_match_detail_callback, "user_match", state="*", match_id=int)
+    router.register(edit_bet_callback, "edit_bet", state="*", match_id=int)
     
     # FSM обработчики
     dp.register_message_handler(process_username, state=ProfileStates.waiting_for_username)
@@ -661,7 +749,7 @@ def register_callback_handlers(dp: Dispatcher):
     dp.register_message_handler(process_score_message, state=UserBetStates.waiting_for_score)
     
     # Отмена операций
-    dp.register_callback_query_handler(cancel_operation, lambda c: c.data == "main_menu", state=[ProfileStates.waiting_for_username, ProfileStates.waiting_for_password])
+    router.register(cancel_operation, "main_menu", state=[ProfileStates.waiting_for_username, ProfileStates.waiting_for_password])
     
     # Кнопки без действия
-    dp.register_callback_query_handler(no_action_callback, lambda c: c.data == "no_action")
+    router.register(no_action_callback, "no_action")
@@ -1,14 +1,20 @@
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import Message, CallbackQuery
-from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
 from keyboards.menu import (
     get_main_inline_keyboard, 
     get_phone_keyboard, 
     get_cancel_login_keyboard,
+    get_login_not_found_keyboard,
+    get_back_keyboard,
     remove_keyboard
 )
 from states.user_states import AuthStates
+from utils.validators import format_phone_number
+from utils.callback_data import pack
+from utils.callback_router import get_callback_router
+from utils.message_helpers import safe_edit_message
 import hashlib
 import logging
 
@@ -20,19 +26,20 @@ async def login_start(callback: CallbackQuery, state: FSMContext):
     """Начало процесса входа"""
     await state.finish()
     
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "🚪 Вход в систему\n\n"
         "Для входа введите ваш логин:",
-        reply_markup=get_cancel_login_keyboard()
+        reply_markup=get_cancel_login_keyboard(),
+        parse_mode=None
     )
     await AuthStates.waiting_for_username.set()
 
-async def process_login_username(message: Message, state: FSMContext):
+async def process_login_username(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка логина при входе"""
     username = message.text.strip()
     
-    db = DatabaseHandler('users.db')
-    user = db.get_user_by_username(username)
+    user = await db.get_user_by_username(username)
     
     if not user:
         await message.answer(
@@ -53,7 +60,7 @@ async def process_login_username(message: Message, state: FSMContext):
     )
     await AuthStates.waiting_for_password.set()
 
-async def process_login_password(message: Message, state: FSMContext):
+async def process_login_password(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка пароля при входе"""
     password = message.text.strip()
     
@@ -61,15 +68,14 @@ async def process_login_password(message: Message, state: FSMContext):
         username = data['username']
         user_id = data['user_id']
     
-    db = DatabaseHandler('users.db')
     hashed_password = hash_password(password)
     
-    if db.verify_password(user_id, hashed_password):
+    if await db.verify_password(user_id, hashed_password):
         # Обновляем время последнего входа
-        db.update_last_login(user_id)
+        await db.update_last_login(user_id)
         
         # Получаем актуальные данные пользователя
-        user = db.get_user(user_id)
+        user = await db.get_user(user_id)
         
         await message.answer(
             f"✅ Вход выполнен успешно!\n\n"
@@ -100,46 +106,34 @@ async def process_login_password(message: Message, state: FSMContext):
 async def cancel_login(callback: CallbackQuery, state: FSMContext):
     """Отмена процесса входа"""
     await state.finish()
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "❌ Вход отменен.",
-        reply_markup=types.InlineKeyboardMarkup().add(
-            types.InlineKeyboardButton("🔙 Назад", callback_data="start")
-        )
+        reply_markup=get_back_keyboard(pack("start")),
+        parse_mode=None
     )
 
 async def login_retry(callback: CallbackQuery, state: FSMContext):
     """Повторная попытка входа"""
     await state.finish()
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "🚪 Вход в систему\n\n"
         "Для входа введите ваш логин:",
-        reply_markup=get_cancel_login_keyboard()
+        reply_markup=get_cancel_login_keyboard(),
+        parse_mode=None
     )
     await AuthStates.waiting_for_username.set()
 
-async def handle_login_phone(message: Message, state: FSMContext):
+async def handle_login_phone(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка номера телефона для входа (альтернативный метод)"""
     if message.contact:
         phone_number = message.contact.phone_number
-        # Нормализуем номер телефона
-        if phone_number.startswith('+'):
-            phone_number = phone_number[1:]
-        
-        db = DatabaseHandler('users.db')
-        user = None
+        # Нормализуем номер телефона к формату, в котором он хранится в базе
+        phone_number = format_phone_number(phone_number)
         
         # Ищем пользователя по номеру телефона
-        with db.conn:
-            cursor = db.conn.cursor()
-            cursor.execute('SELECT * FROM users WHERE phone_number = ?', (phone_number,))
-            row = cursor.fetchone()
-            if row:
-                user = type('User', (), {
-                    'user_id': row[0],
-                    'phone_number': row[1],
-                    'username': row[2],
-                    'full_name': row[3]
-                })()
+        user = await db.get_user_by_phone(phone_number)
         
         if user:
             await message.answer(
@@ -155,10 +149,7 @@ async def handle_login_phone(message: Message, state: FSMContext):
             await message.answer(
                 "❌ Пользователь с таким номером телефона не найден.\n\n"
                 "Возможно, вам нужно зарегистрироваться:",
-                reply_markup=types.InlineKeyboardMarkup().add(
-                    types.InlineKeyboardButton("📝 Регистрация", callback_data="register"),
-                    types.InlineKeyboardButton("🔄 Попробовать другой номер", callback_data="login")
-                )
+                reply_markup=get_login_not_found_keyboard()
             )
     else:
         await message.answer(
@@ -170,9 +161,10 @@ def register_login_handlers(dp: Dispatcher):
     """Регистрация обработчиков входа"""
     
     # Обработчики колбэков
-    dp.register_callback_query_handler(login_start, lambda c: c.data == "login", state="*")
-    dp.register_callback_query_handler(login_retry, lambda c: c.data == "login_retry", state="*")
-    dp.register_callback_query_handler(cancel_login, lambda c: c.data == "start", state=AuthStates.all_states)
+    router = get_callback_router(dp)
+    router.register(login_start, "login", state="*")
+    router.register(login_retry, "login_retry", state="*")
+    router.register(cancel_login, "start", state=AuthStates.all_states)
     
     # Обработчики сообщений для FSM
     dp.register_message_handler(process_login_username, state=AuthStates.waiting_for_username)
@@ -1,20 +1,21 @@
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import Message, CallbackQuery
-from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
 from keyboards.menu import get_profile_inline_keyboard
 from utils.validators import validate_username
 from states.user_states import ProfileStates
+from utils.callback_router import get_callback_router
+from utils.message_helpers import safe_edit_message
 
-async def process_username(message: Message, state: FSMContext):
+async def process_username(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка нового логина"""
     new_username = message.text.strip()
     
     if validate_username(new_username):
-        db = DatabaseHandler('users.db')
         user_id = message.from_user.id
         
-        if db.update_profile(user_id, username=new_username):
+        if await db.update_profile(user_id, username=new_username):
             await message.answer(
                 "✅ Логин успешно обновлен!",
                 reply_markup=types.ReplyKeyboardRemove()
@@ -39,9 +40,11 @@ async def process_username(message: Message, state: FSMContext):
 async def cancel_username(callback: CallbackQuery, state: FSMContext):
     """Отмена изменения логина"""
     await state.finish()
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "❌ Изменение логина отменено.",
-        reply_markup=get_profile_inline_keyboard()
+        reply_markup=get_profile_inline_keyboard(),
+        parse_mode=None
     )
 
 def register_profile_handlers(dp: Dispatcher):
@@ -50,4 +53,4 @@ def register_profile_handlers(dp: Dispatcher):
     dp.register_message_handler(process_username, state=ProfileStates.waiting_for_username)
     
     # Обработчики отмены через callback (кнопка Назад)
-    dp.register_callback_query_handler(cancel_username, lambda c: c.data == "main_menu", state=ProfileStates.waiting_for_username)
\ No newline at end of file
+    get_callback_router(dp).register(cancel_username, "main_menu", state=ProfileStates.waiting_for_username)
\ No newline at end of file
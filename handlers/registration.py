@@ -1,7 +1,7 @@
 from aiogram import Dispatcher, types
 from aiogram.dispatcher import FSMContext
 from aiogram.types import Message, CallbackQuery
-from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
 from keyboards.menu import (
     get_main_inline_keyboard, 
     get_phone_keyboard, 
@@ -11,6 +11,7 @@ from keyboards.menu import (
 )
 from states.user_states import AuthStates
 from utils.validators import validate_phone_number, validate_username, format_phone_number
+from utils.callback_router import get_callback_router
 import hashlib
 import logging
 
@@ -37,7 +38,7 @@ async def register_start(callback: CallbackQuery, state: FSMContext):
         logging.error(f"Ошибка в register_start: {e}")
         await callback.answer("❌ Ошибка при начале регистрации", show_alert=True)
 
-async def process_phone_registration(message: Message, state: FSMContext):
+async def process_phone_registration(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка номера телефона при регистрации"""
     logging.info(f"Обработка телефона для пользователя {message.from_user.id}")
     
@@ -57,8 +58,7 @@ async def process_phone_registration(message: Message, state: FSMContext):
         return
     
     # Проверяем, не занят ли номер
-    db = DatabaseHandler('users.db')
-    if db.is_phone_taken(formatted_phone):
+    if await db.is_phone_taken(formatted_phone):
         await message.answer(
             "❌ Этот номер телефона уже зарегистрирован. Пожалуйста, используйте другой номер:",
             reply_markup=get_cancel_registration_keyboard()
@@ -75,7 +75,7 @@ async def process_phone_registration(message: Message, state: FSMContext):
     )
     await AuthStates.waiting_for_username.set()
 
-async def process_username_registration(message: Message, state: FSMContext):
+async def process_username_registration(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка логина при регистрации"""
     username = message.text.strip()
     
@@ -87,8 +87,7 @@ async def process_username_registration(message: Message, state: FSMContext):
         return
     
     # Проверяем, не занят ли логин
-    db = DatabaseHandler('users.db')
-    if db.is_username_taken(username):
+    if await db.is_username_taken(username):
         await message.answer(
             "❌ Этот логин уже занят. Пожалуйста, выберите другой логин:",
             reply_markup=get_cancel_registration_keyboard()
@@ -127,7 +126,7 @@ async def process_password_registration(message: Message, state: FSMContext):
     )
     await AuthStates.waiting_for_full_name.set()
 
-async def process_full_name_registration(message: Message, state: FSMContext):
+async def process_full_name_registration(message: Message, state: FSMContext, db: AsyncDatabaseHandler):
     """Обработка ФИО и завершение регистрации"""
     full_name = message.text.strip()
     
@@ -147,11 +146,10 @@ async def process_full_name_registration(message: Message, state: FSMContext):
         await state.finish()
         return
     
-    db = DatabaseHandler('users.db')
     user_id = message.from_user.id
     
     # Регистрируем пользователя
-    if db.register_user(user_id, phone, username, password, full_name):
+    if await db.register_user(user_id, phone, username, password, full_name):
         await message.answer(
             f"✅ Регистрация успешно завершена!\n\n"
             f"👤 Добро пожаловать, {full_name}!\n"
@@ -189,8 +187,9 @@ def register_registration_handlers(dp: Dispatcher):
     """Регистрация обработчиков регистрации"""
     
     # Обработчики колбэков
-    dp.register_callback_query_handler(register_start, lambda c: c.data == "register", state="*")
-    dp.register_callback_query_handler(cancel_registration, lambda c: c.data == "start", state=AuthStates.all_states)
+    router = get_callback_router(dp)
+    router.register(register_start, "register", state="*")
+    router.register(cancel_registration, "start", state=AuthStates.all_states)
     
     # Обработчики сообщений для FSM
     dp.register_message_handler(process_phone_registration, content_types=['contact', 'text'], state=AuthStates.waiting_for_phone)
@@ -1,14 +1,15 @@
 from aiogram import Dispatcher, types
 from aiogram.types import Message
-from database.db_handler import DatabaseHandler
+from database.async_handler import AsyncDatabaseHandler
 from keyboards.menu import get_start_keyboard, get_phone_keyboard, get_main_inline_keyboard
+from utils.callback_router import get_callback_router
+from utils.message_helpers import safe_edit_message
 
-async def start_command(message: Message):
+async def start_command(message: Message, db: AsyncDatabaseHandler):
     """Обработчик команды /start"""
-    db = DatabaseHandler('users.db')
     user_id = message.from_user.id
     
-    if db.user_exists(user_id):
+    if await db.user_exists(user_id):
         # Пользователь уже зарегистрирован
         await message.answer(
             "Добро пожаловать назад! Выберите действие:",
@@ -24,18 +25,19 @@ async def start_command(message: Message):
 
 async def back_to_start(callback: types.CallbackQuery):
     """Возврат к стартовому меню"""
-    await callback.message.edit_text(
+    await safe_edit_message(
+        callback,
         "👋 Добро пожаловать в BetVsBet Bot!\n\n"
         "Для использования бота необходимо войти или зарегистрироваться.",
-        reply_markup=get_start_keyboard()
+        reply_markup=get_start_keyboard(),
+        parse_mode=None
     )
 
-async def back_to_main(message: Message):
+async def back_to_main(message: Message, db: AsyncDatabaseHandler):
     """Возврат в главное меню"""
-    db = DatabaseHandler('users.db')
     user_id = message.from_user.id
     
-    if db.user_exists(user_id):
+    if await db.user_exists(user_id):
         await message.answer(
             "Главное меню:",
             reply_markup=get_main_inline_keyboard()
@@ -50,4 +52,4 @@ def register_start_handlers(dp: Dispatcher):
     """Регистрация обработчиков стартовых команд"""
     dp.register_message_handler(start_command, commands=['start'])
     dp.register_message_handler(back_to_main, lambda message: message.text == '🔙 Назад')
-    dp.register_callback_query_handler(back_to_start, lambda c: c.data == "start")
\ No newline at end of file
+    get_callback_router(dp).register(back_to_start, "start")
\ No newline at end of file
@@ -1,3 +1,5 @@
+import json
+from functools import lru_cache, wraps
 from aiogram.types import (
     ReplyKeyboardMarkup, 
     KeyboardButton, 
@@ -5,22 +7,89 @@ from aiogram.types import (
     InlineKeyboardMarkup,
     InlineKeyboardButton
 )
+from utils.callback_data import PageCursor, pack
 
+# Число клавиатур, хранимых для каждой функции с параметрами
+KEYBOARD_CACHE_SIZE = 128
+
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    """
+    Готовая инлайн клавиатура, общая для всех сообщений.
+
+    Не изменяется (add, row и insert запрещены), поэтому представление для
+    Bot API и его JSON вычисляются один раз при создании.
+    """
+
+    def __init__(self, keyboard: InlineKeyboardMarkup):
+        super().__init__(row_width=keyboard.row_width, inline_keyboard=keyboard.inline_keyboard)
+        self._python = keyboard.to_python()
+        self._json = json.dumps(self._python)
+
+    def to_python(self):
+        return self._python
+
+    def as_json(self):
+        return self._json
+
+    def _frozen(self, *args):
+        raise TypeError("Готовую клавиатуру нельзя изменить")
+
+    add = row = insert = _frozen
+
+def freeze(keyboard):
+    """Инлайн клавиатура - в неизменяемую, остальные - без изменений"""
+    if isinstance(keyboard, InlineKeyboardMarkup) and not isinstance(keyboard, FrozenInlineKeyboardMarkup):
+        return FrozenInlineKeyboardMarkup(keyboard)
+    return keyboard
+
+def static_keyboard(builder):
+    """Клавиатура без параметров: строится один раз при импорте"""
+    keyboard = freeze(builder())
+
+    @wraps(builder)
+    def get_keyboard():
+        return keyboard
+    return get_keyboard
+
+def memoized_keyboard(builder):
+    """
+    Клавиатура с параметрами: строится один раз для одинаковых данных.
+
+    Списки (турниры, матчи) сравниваются по содержимому. Хранятся последние
+    KEYBOARD_CACHE_SIZE клавиатур, счетчики - в cache_info().
+    """
+    @lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+    def build(*args, **kwargs):
+        return freeze(builder(*args, **kwargs))
+
+    def hashable(value):
+        return tuple(value) if isinstance(value, list) else value
+
+    @wraps(builder)
+    def get_keyboard(*args, **kwargs):
+        return build(*map(hashable, args), **{name: hashable(value) for name, value in kwargs.items()})
+    get_keyboard.cache_info = build.cache_info
+    get_keyboard.cache_clear = build.cache_clear
+    return get_keyboard
+
+@static_keyboard
 def get_start_keyboard():
     """Стартовая клавиатура с входом и регистрацией"""
     return InlineKeyboardMarkup(row_width=2).add(
-        InlineKeyboardButton("🚪 Вход", callback_data="login"),
-        InlineKeyboardButton("📝 Регистрация", callback_data="register"),
-        InlineKeyboardButton("ℹ️ Помощь", callback_data="help"),
-        InlineKeyboardButton("📞 О нас", callback_data="about")
+        InlineKeyboardButton("🚪 Вход", callback_data=pack("login")),
+        InlineKeyboardButton("📝 Регистрация", callback_data=pack("register")),
+        InlineKeyboardButton("ℹ️ Помощь", callback_data=pack("help")),
+        InlineKeyboardButton("📞 О нас", callback_data=pack("about"))
     )
 
+@static_keyboard
 def get_main_menu():
     """Главное меню"""
     return ReplyKeyboardMarkup([
         ['📱 Отправить номер телефона']
     ], resize_keyboard=True)
 
+@static_keyboard
 def get_phone_keyboard():
     """Клавиатура для запроса номера телефона"""
     return ReplyKeyboardMarkup([
@@ -28,44 +97,54 @@ def get_phone_keyboard():
         ['🔙 Назад']
     ], resize_keyboard=True, one_time_keyboard=True)
 
+@static_keyboard
 def get_main_inline_keyboard():
     """Основная инлайн клавиатура после регистрации"""
     return InlineKeyboardMarkup(row_width=2).add(
-        InlineKeyboardButton("👤 Личный кабинет", callback_data="profile"),
-        InlineKeyboardButton("🏆 Турниры", callback_data="tournaments_main"),
-        InlineKeyboardButton("ℹ️ Помощь", callback_data="help"),
-        InlineKeyboardButton("📞 О нас", callback_data="about")
+        InlineKeyboardButton("👤 Личный кабинет", callback_data=pack("profile")),
+        InlineKeyboardButton("🏆 Турниры", callback_data=pack("tournaments_main")),
+        InlineKeyboardButton("ℹ️ Помощь", callback_data=pack("help")),
+        InlineKeyboardButton("📞 О нас", callback_data=pack("about"))
     )
 
+@static_keyboard
 def get_profile_inline_keyboard():
     """Инлайн клавиатура для личного кабинета"""
     return InlineKeyboardMarkup(row_width=2).add(
-        InlineKeyboardButton("✏️ Изменить логин", callback_data="change_username"),
-        InlineKeyboardButton("🔐 Изменить пароль", callback_data="change_password"),
-        InlineKeyboardButton("📊 Мой профиль", callback_data="my_profile"),
-        InlineKeyboardButton("🔙 Назад", callback_data="main_menu")
+        InlineKeyboardButton("✏️ Изменить логин", callback_data=pack("change_username")),
+        InlineKeyboardButton("🔐 Изменить пароль", callback_data=pack("change_password")),
+        InlineKeyboardButton("📊 Мой профиль", callback_data=pack("my_profile")),
+        InlineKeyboardButton("🔙 Назад", callback_data=pack("main_menu"))
     )
 
+@static_keyboard
 def get_tournaments_main_keyboard():
     """Главное меню турниров"""
     return InlineKeyboardMarkup(row_width=2).add(
-        InlineKeyboardButton("🏆 Мои турниры", callback_data="my_tournaments"),
-        InlineKeyboardButton("📋 Все турниры", callback_data="all_tournaments"),
-        InlineKeyboardButton("🔙 Назад", callback_data="main_menu")
+        InlineKeyboardButton("🏆 Мои турниры", callback_data=pack("my_tournaments")),
+        InlineKeyboardButton("📋 Все турниры", callback_data=pack("all_tournaments")),
+        InlineKeyboardButton("🔙 Назад", callback_data=pack("main_menu"))
     )
 
-def get_admin_match_detail_keyboard(match_id, tournament_id):
+@memoized_keyboard
+def get_admin_match_detail_keyboard(match_id, tournament_id, points_multiplier=1):
     """Клавиатура для конкретного матча в админке"""
     keyboard = InlineKeyboardMarkup(row_width=2)
     
+    # Переключение множителя очков за матч (x1 <-> x2)
+    next_multiplier = 2 if points_multiplier == 1 else 1
+    
     keyboard.add(
-        InlineKeyboardButton("📝 Внести счет", callback_data=f"enter_result_{match_id}"),
-        InlineKeyboardButton("🗑️ Удалить матч", callback_data=f"delete_match_{match_id}"),
-        InlineKeyboardButton("🔙 Назад к матчам", callback_data=f"tournament_matches_{tournament_id}")
+        InlineKeyboardButton("📝 Внести счет", callback_data=pack("enter_result", match_id)),
+        InlineKeyboardButton("🗑️ Удалить матч", callback_data=pack("delete_match", match_id)),
+        InlineKeyboardButton(f"✖️ Очки x{points_multiplier} → x{next_multiplier}",
+                             callback_data=pack("match_multiplier", match_id, next_multiplier)),
+        InlineKeyboardButton("🔙 Назад к матчам", callback_data=pack("tournament_matches", tournament_id))
     )
     
     return keyboard
 
+@memoized_keyboard
 def get_all_tournaments_keyboard(tournaments):
     """Клавиатура всех доступных турниров"""
     keyboard = InlineKeyboardMarkup(row_width=1)
@@ -73,18 +152,19 @@ def get_all_tournaments_keyboard(tournaments):
     # Добавляем кнопки для каждого турнира
     for tournament in tournaments:
         keyboard.add(InlineKeyboardButton(
-            f"🏆 {tournament[1]}", 
-            callback_data=f"all_tournament_{tournament[0]}"
+            f"🏆 {tournament.name}", 
+            callback_data=pack("all_tournament", tournament.id)
         ))
     
     # Кнопка обновления и назад
     keyboard.row(
-        InlineKeyboardButton("🔄 Обновить", callback_data="all_tournaments"),
-        InlineKeyboardButton("🔙 Назад", callback_data="tournaments_main")
+        InlineKeyboardButton("🔄 Обновить", callback_data=pack("all_tournaments")),
+        InlineKeyboardButton("🔙 Назад", callback_data=pack("tournaments_main"))
     )
     
     return keyboard
 
+@memoized_keyboard
 def get_my_tournaments_keyboard(tournaments):
     """Клавиатура турниров пользователя"""
     keyboard = InlineKeyboardMarkup(row_width=1)
@@ -92,97 +172,129 @@ def get_my_tournaments_keyboard(tournaments):
     # Добавляем кнопки для каждого турнира
     for tournament in tournaments:
         keyboard.add(InlineKeyboardButton(
-            f"🏆 {tournament[1]}", 
-            callback_data=f"my_tournament_detail_{tournament[0]}"
+            f"🏆 {tournament.name}", 
+            callback_data=pack("my_tournament_detail", tournament.id)
         ))
     
     # Кнопка назад
-    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data="tournaments_main"))
+    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data=pack("tournaments_main")))
     
     return keyboard
 
+@memoized_keyboard
 def get_tournament_detail_keyboard(tournament_id, page=0):
     """Клавиатура детальной информации о турнире"""
     return InlineKeyboardMarkup(row_width=2).add(
-        InlineKeyboardButton("📋 Мои ставки", callback_data=f"tournament_my_bets_{tournament_id}"),
-        InlineKeyboardButton("📊 Общая таблица", callback_data=f"tournament_leaderboard_{tournament_id}"),
-        InlineKeyboardButton("📖 Правила", callback_data=f"tournament_rules_{tournament_id}"),
-        InlineKeyboardButton("👥 Игроки турнира", callback_data=f"tournament_players_{tournament_id}_0"),
-        InlineKeyboardButton("🔙 Назад", callback_data="my_tournaments")
+        InlineKeyboardButton("📋 Мои ставки", callback_data=pack("tournament_my_bets", tournament_id)),
+        InlineKeyboardButton("📊 Общая таблица", callback_data=pack("tournament_leaderboard", tournament_id)),
+        InlineKeyboardButton("📖 Правила", callback_data=pack("tournament_rules", tournament_id)),
+        InlineKeyboardButton("👥 Игроки турнира", callback_data=pack("tournament_players", tournament_id, 0)),
+        InlineKeyboardButton("🔙 Назад", callback_data=pack("my_tournaments"))
     )
 
-def get_tournament_players_keyboard(tournament_id, page, total_pages, players_count):
-    """Клавиатура списка игроков турнира с пагинацией"""
+@memoized_keyboard
+def get_tournament_players_keyboard(tournament_id, page, total_pages, first_cursor, last_cursor, has_next):
+    """Клавиатура списка игроков турнира с пагинацией (по курсорам первого и последнего игрока страницы)"""
     keyboard = InlineKeyboardMarkup(row_width=3)
     
     # Кнопки пагинации (только если есть больше одной страницы)
     if total_pages > 1:
         pagination_buttons = []
         if page > 0:
-            pagination_buttons.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"tournament_players_{tournament_id}_{page-1}"))
+            pagination_buttons.append(InlineKeyboardButton("⬅️ Назад", callback_data=pack("tournament_players", tournament_id, page - 1, PageCursor(before=first_cursor))))
         
-        pagination_buttons.append(InlineKeyboardButton(f"{page+1}/{total_pages}", callback_data="no_action"))
+        pagination_buttons.append(InlineKeyboardButton(f"{page+1}/{total_pages}", callback_data=pack("no_action")))
         
-        if page < total_pages - 1:
-            pagination_buttons.append(InlineKeyboardButton("Вперед ➡️", callback_data=f"tournament_players_{tournament_id}_{page+1}"))
+        if has_next:
+            pagination_buttons.append(InlineKeyboardButton("Вперед ➡️", callback_data=pack("tournament_players", tournament_id, page + 1, PageCursor(after=last_cursor))))
         
         if pagination_buttons:
             keyboard.row(*pagination_buttons)
     
     # Кнопка назад к деталям турнира
-    keyboard.row(InlineKeyboardButton("🔙 Назад к турниру", callback_data=f"my_tournament_detail_{tournament_id}"))
+    keyboard.row(InlineKeyboardButton("🔙 Назад к турниру", callback_data=pack("my_tournament_detail", tournament_id)))
     
     return keyboard
 
+@memoized_keyboard
+def get_tournament_leaderboard_keyboard(tournament_id, page, total_pages, show_my_position=False):
+    """Клавиатура общей таблицы турнира с пагинацией"""
+    keyboard = InlineKeyboardMarkup(row_width=3)
+    
+    # Кнопки пагинации (только если есть больше одной страницы)
+    if total_pages > 1:
+        pagination_buttons = []
+        if page > 0:
+            pagination_buttons.append(InlineKeyboardButton("⬅️ Назад", callback_data=pack("tournament_leaderboard", tournament_id, page - 1)))
+        
+        pagination_buttons.append(InlineKeyboardButton(f"{page+1}/{total_pages}", callback_data=pack("no_action")))
+        
+        if page < total_pages - 1:
+            pagination_buttons.append(InlineKeyboardButton("Вперед ➡️", callback_data=pack("tournament_leaderboard", tournament_id, page + 1)))
+        
+        keyboard.row(*pagination_buttons)
+    
+    if show_my_position:
+        keyboard.row(InlineKeyboardButton("📍 Моя позиция", callback_data=pack("tournament_leaderboard", tournament_id, "me")))
+    
+    # Кнопка назад к деталям турнира
+    keyboard.row(InlineKeyboardButton("🔙 Назад к турниру", callback_data=pack("my_tournament_detail", tournament_id)))
+    
+    return keyboard
+
+@memoized_keyboard
 def get_player_detail_keyboard(tournament_id, page):
     """Клавиатура детальной информации об игроке"""
     return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("🔙 Назад к игрокам", callback_data=f"tournament_players_{tournament_id}_{page}")
+        InlineKeyboardButton("🔙 Назад к игрокам", callback_data=pack("tournament_players", tournament_id, page))
     )
 
+@memoized_keyboard
 def get_user_tournament_matches_keyboard(tournament_id, matches, back_to="tournaments_main"):
     """Клавиатура матчей турнира для пользователя"""
     keyboard = InlineKeyboardMarkup(row_width=1)
     
     # Добавляем кнопки для каждого матча
     for match in matches:
-        match_text = f"📅 {match[2]} {match[3]} - {match[4]} vs {match[5]}"
+        match_text = f"📅 {match.match_date} {match.match_time} - {match.team1} vs {match.team2}"
         # Обрезаем текст если слишком длинный
         if len(match_text) > 60:
             match_text = match_text[:57] + "..."
         keyboard.add(InlineKeyboardButton(
             match_text, 
-            callback_data=f"user_match_{match[0]}"
+            callback_data=pack("user_match", match.id)
         ))
     
     # Кнопка назад в зависимости от раздела
     if back_to == "all_tournaments":
-        keyboard.add(InlineKeyboardButton("🔙 Назад к турнирам", callback_data="all_tournaments"))
+        keyboard.add(InlineKeyboardButton("🔙 Назад к турнирам", callback_data=pack("all_tournaments")))
     else:
-        keyboard.add(InlineKeyboardButton("🔙 Назад к турнирам", callback_data="tournaments_main"))
+        keyboard.add(InlineKeyboardButton("🔙 Назад к турнирам", callback_data=pack("tournaments_main")))
     
     return keyboard
 
+@memoized_keyboard
 def get_available_matches_keyboard(matches):
     """Клавиатура доступных матчей для ставок"""
     keyboard = InlineKeyboardMarkup(row_width=1)
     
     # Добавляем кнопки для каждого матча
     for match in matches:
-        match_text = f"📅 {match[2]} {match[3]} - {match[4]} vs {match[5]}"
+        match_text = f"📅 {match.match_date} {match.match_time} - {match.team1} vs {match.team2}"
         # Обрезаем текст если слишком длинный
         if len(match_text) > 60:
             match_text = match_text[:57] + "..."
         keyboard.add(InlineKeyboardButton(
             match_text, 
-            callback_data=f"user_match_{match[0]}"
+            callback_data=pack("user_match", match.id)
         ))
     
     # Кнопка назад
-    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data="main_menu"))
+    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data=pack("main_menu")))
     
     return keyboard
 
+@memoized_keyboard
 def get_user_bets_tournaments_keyboard(tournaments):
     """Клавиатура турниров со ставками пользователя"""
     keyboard = InlineKeyboardMarkup(row_width=1)
@@ -190,137 +302,185 @@ def get_user_bets_tournaments_keyboard(tournaments):
     # Добавляем кнопки для каждого турнира
     for tournament in tournaments:
         keyboard.add(InlineKeyboardButton(
-            f"🏆 {tournament[1]}", 
-            callback_data=f"bets_tournament_{tournament[0]}"
+            f"🏆 {tournament.name}", 
+            callback_data=pack("bets_tournament", tournament.id)
         ))
     
     # Кнопка назад
-    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data="profile"))
+    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data=pack("profile")))
     
     return keyboard
 
+@memoized_keyboard
 def get_user_tournament_bets_keyboard(tournament_id, bets):
     """Клавиатура ставок пользователя в турнире"""
     keyboard = InlineKeyboardMarkup(row_width=1)
     
     # Кнопка назад
-    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data=f"my_tournament_detail_{tournament_id}"))
+    keyboard.add(InlineKeyboardButton("🔙 Назад", callback_data=pack("my_tournament_detail", tournament_id)))
     
     return keyboard
 
+@static_keyboard
 def get_admin_main_keyboard():
     """Основная клавиатура админа"""
     return InlineKeyboardMarkup(row_width=2).add(
-        InlineKeyboardButton("🏆 Турниры", callback_data="admin_tournaments"),
-        InlineKeyboardButton("👥 Все пользователи", callback_data="admin_users"),
-        InlineKeyboardButton("📊 Статистика", callback_data="admin_stats"),
-        InlineKeyboardButton("🔙 В главное меню", callback_data="main_menu")
+        InlineKeyboardButton("🏆 Турниры", callback_data=pack("admin_tournaments")),
+        InlineKeyboardButton("👥 Все пользователи", callback_data=pack("admin_users")),
+        InlineKeyboardButton("📊 Статистика", callback_data=pack("admin_stats")),
+        InlineKeyboardButton("🔙 В главное меню", callback_data=pack("main_menu"))
     )
 
+@memoized_keyboard
 def get_admin_tournaments_keyboard(tournaments):
     """Клавиатура турниров для админа"""
     keyboard = InlineKeyboardMarkup(row_width=1)
     
     # Добавляем кнопки для каждого турнира
     for tournament in tournaments:
-        status = "✅" if tournament[3] == 'active' else "❌"
+        status = "✅" if tournament.status == 'active' else "❌"
         keyboard.add(InlineKeyboardButton(
-            f"{status} {tournament[1]}", 
-            callback_data=f"tournament_{tournament[0]}"
+            f"{status} {tournament.name}", 
+            callback_data=pack("tournament", tournament.id)
         ))
     
     # Кнопки действий
     keyboard.row(
-        InlineKeyboardButton("➕ Добавить турнир", callback_data="add_tournament"),
-        InlineKeyboardButton("🔙 Назад в админку", callback_data="admin_main")
+        InlineKeyboardButton("➕ Добавить турнир", callback_data=pack("add_tournament")),
+        InlineKeyboardButton("🔙 Назад в админку", callback_data=pack("admin_main"))
     )
     
     return keyboard
 
+@memoized_keyboard
 def get_admin_tournament_detail_keyboard(tournament_id, tournament_status):
     """Клавиатура для конкретного турнира в админке"""
     status_text = "❌ Деактивировать" if tournament_status == 'active' else "✅ Активировать"
     status_data = "deactivate_tournament" if tournament_status == 'active' else "activate_tournament"
     
     return InlineKeyboardMarkup(row_width=2).add(
-        InlineKeyboardButton("⚽ Матчи турнира", callback_data=f"tournament_matches_{tournament_id}"),
-        InlineKeyboardButton("✏️ Редактировать", callback_data=f"edit_tournament_{tournament_id}"),
-        InlineKeyboardButton(status_text, callback_data=f"{status_data}_{tournament_id}"),
-        InlineKeyboardButton("🗑️ Удалить турнир", callback_data=f"delete_tournament_{tournament_id}"),
-        InlineKeyboardButton("🔙 Назад к турнирам", callback_data="admin_tournaments")
+        InlineKeyboardButton("⚽ Матчи турнира", callback_data=pack("tournament_matches", tournament_id)),
+        InlineKeyboardButton("✏️ Редактировать", callback_data=pack("edit_tournament", tournament_id)),
+        InlineKeyboardButton(status_text, callback_data=pack(status_data, tournament_id)),
+        InlineKeyboardButton("🗑️ Удалить турнир", callback_data=pack("delete_tournament", tournament_id)),
+        InlineKeyboardButton("⚙️ Правила подсчета", callback_data=pack("edit_rules", tournament_id)),
+        InlineKeyboardButton("🔄 Пересчитать очки", callback_data=pack("rescore_tournament", tournament_id)),
+        InlineKeyboardButton("🔙 Назад к турнирам", callback_data=pack("admin_tournaments"))
     )
 
+@memoized_keyboard
 def get_admin_tournament_matches_keyboard(tournament_id, matches):
     """Клавиатура матчей турнира для админа"""
     keyboard = InlineKeyboardMarkup(row_width=1)
     
     # Добавляем кнопки для каждого матча
     for match in matches:
-        match_text = f"📅 {match[2]} {match[3]} - {match[4]} vs {match[5]}"
+        match_text = f"📅 {match.match_date} {match.match_time} - {match.team1} vs {match.team2}"
         # Обрезаем текст если слишком длинный
         if len(match_text) > 60:
             match_text = match_text[:57] + "..."
         keyboard.add(InlineKeyboardButton(
             match_text, 
-            callback_data=f"admin_match_{match[0]}"
+            callback_data=pack("admin_match", match.id)
         ))
     
     # Кнопки действий
     keyboard.row(
-        InlineKeyboardButton("➕ Добавить матч", callback_data=f"add_match_{tournament_id}"),
-        InlineKeyboardButton("🔙 Назад к турниру", callback_data=f"tournament_{tournament_id}")
+        InlineKeyboardButton("➕ Добавить матч", callback_data=pack("add_match", tournament_id)),
+        InlineKeyboardButton("🔙 Назад к турниру", callback_data=pack("tournament", tournament_id))
     )
     
     return keyboard
 
-def get_admin_users_keyboard():
-    """Клавиатура управления пользователями"""
-    return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("🔙 Назад в админку", callback_data="admin_main")
+@memoized_keyboard
+def get_admin_users_keyboard(page=0, first_cursor=None, last_cursor=None, has_next=False, search=False):
+    """Клавиатура списка пользователей или результатов поиска (пагинация по курсорам)"""
+    keyboard = InlineKeyboardMarkup(row_width=3)
+    prefix = "admin_search" if search else "admin_users"
+    
+    pagination_buttons = []
+    if page > 0:
+        pagination_buttons.append(InlineKeyboardButton("⬅️ Назад", callback_data=pack(prefix, page - 1, PageCursor(before=first_cursor))))
+    if has_next:
+        pagination_buttons.append(InlineKeyboardButton("Вперед ➡️", callback_data=pack(prefix, page + 1, PageCursor(after=last_cursor))))
+    if pagination_buttons:
+        keyboard.row(*pagination_buttons)
+    
+    keyboard.row(InlineKeyboardButton("🔍 Поиск пользователя", callback_data=pack("admin_user_search")))
+    if search:
+        keyboard.row(InlineKeyboardButton("👥 Все пользователи", callback_data=pack("admin_users")))
+    keyboard.row(InlineKeyboardButton("🔙 Назад в админку", callback_data=pack("admin_main")))
+    
+    return keyboard
+
+@memoized_keyboard
+def get_user_bet_keyboard(match_id, tournament_id):
+    """Клавиатура для матча, на который уже сделана ставка"""
+    keyboard = InlineKeyboardMarkup(row_width=1)
+    keyboard.add(
+        InlineKeyboardButton("✏️ Изменить прогноз", callback_data=pack("edit_bet", match_id)),
+        InlineKeyboardButton("🔙 Назад к турниру", callback_data=pack("all_tournament", tournament_id))
     )
+    return keyboard
 
-def get_back_keyboard(back_data="main_menu", text="🔙 Назад"):
+@memoized_keyboard
+def get_back_keyboard(back_data=pack("main_menu"), text="🔙 Назад"):
     """Универсальная клавиатура с кнопкой Назад"""
     return InlineKeyboardMarkup().add(
         InlineKeyboardButton(text, callback_data=back_data)
     )    
 
+@static_keyboard
 def get_cancel_keyboard():
     """Клавиатура для отмены действия"""
     return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("❌ Отмена", callback_data="admin_main")
+        InlineKeyboardButton("❌ Отмена", callback_data=pack("admin_main"))
     )
 
+@static_keyboard
 def get_cancel_registration_keyboard():
     """Клавиатура для отмены регистрации"""
     return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("❌ Отмена", callback_data="start")
+        InlineKeyboardButton("❌ Отмена", callback_data=pack("start"))
     )
 
+@static_keyboard
 def get_cancel_login_keyboard():
     """Клавиатура для отмены входа"""
     return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("❌ Отмена", callback_data="start")
+        InlineKeyboardButton("❌ Отмена", callback_data=pack("start"))
     )
 
+@memoized_keyboard
 def get_cancel_to_tournament_keyboard(tournament_id):
     """Клавиатура для отмены действия с возвратом к турниру"""
     return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("❌ Отмена", callback_data=f"tournament_{tournament_id}")
+        InlineKeyboardButton("❌ Отмена", callback_data=pack("tournament", tournament_id))
     )
 
+@memoized_keyboard
 def get_cancel_to_matches_keyboard(tournament_id):
     """Клавиатура для отмены действия с возвратом к матчам"""
     return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("❌ Отмена", callback_data=f"tournament_matches_{tournament_id}")
+        InlineKeyboardButton("❌ Отмена", callback_data=pack("tournament_matches", tournament_id))
     )
 
+@static_keyboard
 def remove_keyboard():
     """Убрать клавиатуру"""
     return ReplyKeyboardRemove()
 
+@static_keyboard
+def get_login_not_found_keyboard():
+    """Клавиатура, если пользователь с номером телефона не найден"""
+    return InlineKeyboardMarkup().add(
+        InlineKeyboardButton("📝 Регистрация", callback_data=pack("register")),
+        InlineKeyboardButton("🔄 Попробовать другой номер", callback_data=pack("login"))
+    )
+
+@static_keyboard
 def get_no_action_keyboard():
     """Клавиатура для кнопок без действия"""
     return InlineKeyboardMarkup().add(
-        InlineKeyboardButton("⏳ Функция в разработке", callback_data="no_action")
+        InlineKeyboardButton("⏳ Функция в разработке", callback_data=pack("no_action"))
     )
\ No newline at end of file
@@ -0,0 +1,23 @@
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.types import Message, CallbackQuery
+from database.async_handler import AsyncDatabaseHandler
+from utils.match_index import MatchIndex
+
+class DatabaseMiddleware(BaseMiddleware):
+    """
+    Передает общий обработчик базы данных в хендлеры через аргумент db,
+    а индекс матчей - через аргумент match_index
+    """
+
+    def __init__(self, db: AsyncDatabaseHandler, match_index: MatchIndex = None):
+        super().__init__()
+        self.db = db
+        self.match_index = match_index or MatchIndex(db)
+
+    async def on_pre_process_message(self, message: Message, data: dict):
+        data['db'] = self.db
+        data['match_index'] = self.match_index
+
+    async def on_pre_process_callback_query(self, callback: CallbackQuery, data: dict):
+        data['db'] = self.db
+        data['match_index'] = self.match_index
@@ -21,6 +21,8 @@ class AdminStates(StatesGroup):
     waiting_for_team1 = State()
     waiting_for_team2 = State()
     waiting_for_match_result = State()
+    waiting_for_scoring_rules = State()
+    waiting_for_user_search = State()
 
 class UserBetStates(StatesGroup):
     """Состояния для ставок пользователя"""
@@ -0,0 +1,43 @@
+from typing import NamedTuple, Optional
+
+# Формат callback_data: {версия}:{действие}[:{параметр}...]
+# Версия меняется при несовместимом изменении параметров действий
+CALLBACK_VERSION = '1'
+SEPARATOR = ':'
+# Ограничение Telegram на длину callback_data
+MAX_CALLBACK_DATA_BYTES = 64
+
+class PageCursor(NamedTuple):
+    """Курсор страницы: id последней показанной строки (вперед) или первой (назад)"""
+    after: Optional[int] = None
+    before: Optional[int] = None
+
+    def __str__(self):
+        if self.before is not None:
+            return f"b{self.before}"
+        return f"a{self.after}"
+
+    @classmethod
+    def parse(cls, value: str) -> 'PageCursor':
+        """Курсор из параметра вида a{id} или b{id}"""
+        direction, cursor = value[:1], int(value[1:])
+        if direction == 'a':
+            return cls(after=cursor)
+        if direction == 'b':
+            return cls(before=cursor)
+        raise ValueError(f"Unknown cursor direction: {value}")
+
+def pack(action: str, *params) -> str:
+    """
+    callback_data для кнопки: действие и параметры.
+
+    None в параметрах записывается пустой строкой (параметр не передан),
+    None в конце отбрасываются.
+    """
+    params = list(params)
+    while params and params[-1] is None:
+        params.pop()
+    data = SEPARATOR.join([CALLBACK_VERSION, action] + ['' if param is None else str(param) for param in params])
+    if len(data.encode()) > MAX_CALLBACK_DATA_BYTES:
+        raise ValueError(f"callback_data is longer than {MAX_CALLBACK_DATA_BYTES} bytes: {data}")
+    return data
@@ -0,0 +1,128 @@
+import inspect
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from aiogram import Dispatcher
+from aiogram.dispatcher.filters.state import State, StatesGroup
+from aiogram.types import CallbackQuery
+from utils.callback_data import CALLBACK_VERSION, SEPARATOR
+
+class Route(NamedTuple):
+    """Обработчик действия"""
+    handler: Callable
+    # Имена и типы параметров в порядке их записи в callback_data
+    params: Tuple[Tuple[str, Callable], ...]
+    # Состояния FSM, в которых срабатывает обработчик (None - в любом)
+    states: Optional[FrozenSet]
+    # Аргументы, которые принимает обработчик (None - любые, есть **kwargs)
+    arg_names: Optional[FrozenSet[str]]
+
+def state_names(state) -> Optional[FrozenSet]:
+    """Имена состояний FSM, как в фильтре state= aiogram ('*' - любое, None - без состояния)"""
+    if state == '*':
+        return None
+    if not isinstance(state, (list, set, tuple, frozenset)):
+        state = [state]
+    names = set()
+    for item in state:
+        if isinstance(item, State):
+            names.add(item.state)
+        elif inspect.isclass(item) and issubclass(item, StatesGroup):
+            names.update(item.all_states_names)
+        else:
+            names.add(item)
+    return frozenset(names)
+
+class CallbackRouter:
+    """
+    Маршрутизатор колбэков: callback_data разбирается один раз на действие и
+    типизированные параметры (utils.callback_data.pack), обработчик находится
+    по действию в словаре.
+
+    В aiogram регистрируется один обработчик dispatch вместо фильтра на
+    каждый обработчик. Обработчики одного действия с разными состояниями FSM
+    проверяются в порядке регистрации.
+
+    callback_data кнопок из сообщений, отправленных до введения формата
+    ({действие}_{параметр}_...), разбираются по самому длинному известному
+    действию.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, List[Route]] = defaultdict(list)
+        self._max_action_words = 1
+
+    def register(self, handler: Callable, action: str, state=None, **params: Callable):
+        """
+        Регистрация обработчика действия.
+
+        params - имена аргументов обработчика и функции разбора значений
+        (int, str, PageCursor.parse...) в порядке записи в callback_data.
+        Непереданные параметры берутся из значений по умолчанию обработчика.
+        """
+        signature = inspect.signature(handler)
+        if any(param.kind == param.VAR_KEYWORD for param in signature.parameters.values()):
+            arg_names = None
+        else:
+            arg_names = frozenset(signature.parameters)
+        self._routes[action].append(Route(handler, tuple(params.items()), state_names(state), arg_names))
+        self._max_action_words = max(self._max_action_words, action.count('_') + 1)
+
+    def parse(self, data: str) -> Optional[Tuple[str, List[str]]]:
+        """Действие и необработанные параметры callback_data (None - действие неизвестно)"""
+        version, _, rest = data.partition(SEPARATOR)
+        if version == CALLBACK_VERSION and rest:
+            action, *params = rest.split(SEPARATOR)
+            return (action, params) if action in self._routes else None
+
+        # Прежний формат: самое длинное известное действие из начальных слов
+        words = data.split('_')
+        for length in range(min(len(words), self._max_action_words), 0, -1):
+            action = '_'.join(words[:length])
+            if action in self._routes:
+                return action, words[length:]
+        return None
+
+    async def dispatch(self, callback: CallbackQuery, **data):
+        """Обработчик всех колбэков: вызов обработчика действия"""
+        parsed = self.parse(callback.data or '')
+        if parsed is None:
+            return
+        action, raw_params = parsed
+
+        current_state = None
+        state_loaded = False
+        for route in self._routes[action]:
+            if route.states is not None:
+                if not state_loaded:
+                    current_state = await data['state'].get_state()
+                    state_loaded = True
+                if current_state not in route.states:
+                    continue
+
+            try:
+                if len(raw_params) > len(route.params):
+                    raise ValueError(f"too many parameters for '{action}'")
+                params = {
+                    name: convert(value)
+                    for (name, convert), value in zip(route.params, raw_params) if value != ''
+                }
+            except (ValueError, IndexError) as e:
+                logging.warning(f"Некорректные данные кнопки '{callback.data}': {e}")
+                await callback.answer("⚠️ Кнопка устарела. Откройте меню заново.", show_alert=True)
+                return
+
+            data['action'] = action
+            if route.arg_names is None:
+                kwargs = data
+            else:
+                kwargs = {name: value for name, value in data.items() if name in route.arg_names}
+            return await route.handler(callback, **kwargs, **params)
+
+def get_callback_router(dp: Dispatcher) -> CallbackRouter:
+    """Маршрутизатор колбэков диспетчера (создается и регистрируется при первом обращении)"""
+    router = dp.get('callback_router')
+    if router is None:
+        router = dp['callback_router'] = CallbackRouter()
+        dp.register_callback_query_handler(router.dispatch, state='*')
+    return router
@@ -1,27 +1,74 @@
 import asyncio
+import heapq
 import logging
-from database.db_handler import DatabaseHandler
-
-async def check_expired_matches():
-    """Проверка истекших матчей и обновление их статуса"""
-    try:
-        db = DatabaseHandler('users.db')
-        expired_matches = db.get_expired_matches()
-        
-        for match in expired_matches:
-            # Обновляем статус матча на 'completed'
-            if db.update_match_status(match[0], 'completed'):
-                logging.info(f"Матч {match[0]} ({match[4]} vs {match[5]}) отмечен как завершенный")
-        
-        if expired_matches:
-            logging.info(f"Обновлено статусов: {len(expired_matches)} матчей")
-        
-    except Exception as e:
-        logging.error(f"Ошибка при проверке истекших матчей: {e}")
-
-async def start_match_checker():
-    """Запуск периодической проверки матчей"""
-    while True:
-        await check_expired_matches()
-        # Проверяем каждые 5 минут
-        await asyncio.sleep(300)  # 300 секунд = 5 минут
\ No newline at end of file
+import time
+from database.async_handler import AsyncDatabaseHandler
+
+class MatchScheduler:
+    """
+    Перевод матчей в статус 'completed' в момент их начала.
+
+    Ближайшие начала матчей хранятся в куче; планировщик спит ровно до
+    ближайшего из них и одним запросом обновляет все наступившие матчи.
+    При изменении матчей администратором расписание перечитывается.
+    """
+
+    def __init__(self, db: AsyncDatabaseHandler):
+        self.db = db
+        self._kickoffs = []
+        self._wakeup = asyncio.Event()
+        self._reload = True
+
+    def reschedule(self, *args, **kwargs):
+        """Перечитать расписание матчей (после добавления, изменения или удаления)"""
+        self._reload = True
+        self._wakeup.set()
+
+    async def _load(self):
+        """Загрузка расписания из базы"""
+        self._kickoffs = [tuple(row) for row in await self.db.get_upcoming_kickoffs()]
+        heapq.heapify(self._kickoffs)
+
+    async def _complete_due_matches(self):
+        """Обновление статуса всех начавшихся матчей"""
+        now = time.time()
+        if not self._kickoffs or self._kickoffs[0][0] > now:
+            return
+
+        completed = await self.db.complete_due_matches(int(now))
+
+        # Наступившие матчи снимаются с расписания только после обновления в базе
+        while self._kickoffs and self._kickoffs[0][0] <= now:
+            heapq.heappop(self._kickoffs)
+
+        for match_id, team1, team2 in completed:
+            logging.info(f"Матч {match_id} ({team1} vs {team2}) отмечен как завершенный")
+
+        if completed:
+            logging.info(f"Обновлено статусов: {len(completed)} матчей")
+
+    async def run(self):
+        """Основной цикл планировщика"""
+        while True:
+            try:
+                self._wakeup.clear()
+                if self._reload:
+                    self._reload = False
+                    await self._load()
+                await self._complete_due_matches()
+            except Exception as e:
+                logging.error(f"Ошибка при проверке истекших матчей: {e}")
+                # Расписание могло остаться пустым или устаревшим: перечитываем при повторе
+                self._reload = True
+                await asyncio.sleep(1)
+                continue
+
+            # Спим до начала ближайшего матча или до изменения расписания
+            timeout = None
+            if self._kickoffs:
+                timeout = max(0.0, self._kickoffs[0][0] - time.time())
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,91 @@
+import time
+from bisect import bisect_right
+from typing import FrozenSet, List, Optional
+from database.async_handler import AsyncDatabaseHandler
+from database.cache import QueryCache
+from database.models import Match
+
+class TournamentMatches:
+    """Матчи турнира, упорядоченные по времени начала"""
+
+    def __init__(self, matches: List[Match]):
+        # Матчи без времени начала стоят в конце: они не истекают, но и ставки
+        # на них не принимаются (add_user_bet требует kickoff_ts > now)
+        self.matches = sorted(matches, key=lambda match: (match.kickoff_ts is None, match.kickoff_ts or 0))
+        self.kickoffs = [match.kickoff_ts for match in self.matches if match.kickoff_ts is not None]
+
+    def split(self, now_ts: int) -> int:
+        """Индекс первого еще не начавшегося матча"""
+        return bisect_right(self.kickoffs, now_ts)
+
+class MatchIndex:
+    """
+    Индекс матчей в памяти для экранов выбора матча.
+
+    Для каждого турнира хранится список матчей по времени начала (поиск
+    границы начавшихся матчей - бинарный), для каждого пользователя -
+    множество id матчей, на которые он сделал ставку. Доступные и истекшие
+    матчи без ставки вычисляются без обращения к базе.
+
+    Индекс подписывается на изменения в AsyncDatabaseHandler: ставка
+    сбрасывает множество пользователя, изменение матчей администратором -
+    весь индекс. Данные перечитываются при следующем обращении. Число
+    турниров и пользователей в индексе ограничено (LRU, QueryCache).
+    """
+
+    def __init__(self, db: AsyncDatabaseHandler, max_tournaments: int = 256, max_users: int = 10000):
+        self.db = db
+        self._tournaments = QueryCache(max_tournaments)
+        self._bets = QueryCache(max_users)
+        db.subscribe('matches', self.invalidate)
+        db.subscribe('bets', self.invalidate_user)
+
+    def invalidate(self, *args, **kwargs):
+        """Сброс всего индекса (матчи добавлены, изменены или удалены)"""
+        self._tournaments.invalidate()
+        self._bets.invalidate()
+
+    def invalidate_user(self, user_id: int, *args, **kwargs):
+        """Сброс ставок пользователя (после записи ставки)"""
+        self._bets.discard(user_id)
+
+    async def _tournament(self, tournament_id: int) -> TournamentMatches:
+        found, tournament = self._tournaments.get(tournament_id)
+        if not found:
+            version = self._tournaments.version
+            tournament = TournamentMatches(await self.db.get_tournament_matches(tournament_id))
+            self._tournaments.put(tournament_id, tournament, version)
+        return tournament
+
+    async def _user_bets(self, user_id: int) -> FrozenSet[int]:
+        found, bets = self._bets.get(user_id)
+        if not found:
+            version = self._bets.version
+            bets = frozenset(await self.db.get_user_bet_match_ids(user_id))
+            self._bets.put(user_id, bets, version)
+        return bets
+
+    def stats(self) -> dict:
+        """Счетчики индекса"""
+        return {'tournaments': self._tournaments.stats(), 'bets': self._bets.stats()}
+
+    async def get_tournament_matches(self, tournament_id: int) -> List[Match]:
+        """Все матчи турнира по времени начала"""
+        return (await self._tournament(tournament_id)).matches
+
+    async def get_available_matches(self, tournament_id: int, user_id: int, now_ts: Optional[int] = None) -> List[Match]:
+        """Не начавшиеся матчи турнира без ставки пользователя (матчи без времени начала не входят)"""
+        if now_ts is None:
+            now_ts = int(time.time())
+        tournament = await self._tournament(tournament_id)
+        bets = await self._user_bets(user_id)
+        upcoming = tournament.matches[tournament.split(now_ts):len(tournament.kickoffs)]
+        return [match for match in upcoming if match.id not in bets]
+
+    async def has_expired_without_bet(self, tournament_id: int, user_id: int, now_ts: Optional[int] = None) -> bool:
+        """Есть ли начавшиеся матчи турнира, на которые пользователь не сделал ставку"""
+        if now_ts is None:
+            now_ts = int(time.time())
+        tournament = await self._tournament(tournament_id)
+        bets = await self._user_bets(user_id)
+        return any(match.id not in bets for match in tournament.matches[:tournament.split(now_ts)])
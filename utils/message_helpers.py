@@ -1,12 +1,91 @@
-from aiogram.types import Message, CallbackQuery
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+from aiogram.types import CallbackQuery
 from aiogram.utils.exceptions import MessageNotModified
 
-async def safe_edit_message(callback: CallbackQuery, text: str, reply_markup=None):
+# Число сообщений, содержимое которых запоминается
+EDIT_CACHE_SIZE = 10000
+
+class EditCache:
     """
-    Безопасное редактирование сообщения с обработкой ошибки MessageNotModified
+    Хэши текста и клавиатуры, последними отправленных в сообщения бота (LRU).
+
+    Изменение сообщения тем же содержимым не отправляется в Bot API. Кэш
+    верен, пока все изменения сообщений идут через safe_edit_message и
+    safe_edit_reply_markup.
     """
+
+    def __init__(self, max_size: int = EDIT_CACHE_SIZE):
+        self.max_size = max_size
+        # Изменения без запроса к Bot API / отправленные / отклоненные как не изменившие сообщение
+        self.suppressed = 0
+        self.sent = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Tuple[int, int]]:
+        content = self._entries.get(key)
+        if content is not None:
+            self._entries.move_to_end(key)
+        return content
+
+    def put(self, key: Hashable, content: Tuple[int, int]):
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def forget(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'suppressed': self.suppressed,
+            'sent': self.sent,
+            'not_modified': self.not_modified,
+        }
+
+edit_cache = EditCache()
+
+def _message_key(callback: CallbackQuery) -> Tuple[int, int]:
+    return callback.message.chat.id, callback.message.message_id
+
+def _markup_json(reply_markup) -> Optional[str]:
+    """JSON клавиатуры для Bot API (у готовых клавиатур вычислен заранее)"""
+    return reply_markup.as_json() if reply_markup is not None else None
+
+async def _edit(callback: CallbackQuery, content: Tuple[int, int], edit):
+    """Изменение сообщения, если его содержимое отличается от отправленного ранее"""
+    key = _message_key(callback)
+    if edit_cache.get(key) == content:
+        edit_cache.suppressed += 1
+        return
+
     try:
-        await callback.message.edit_text(text, reply_markup=reply_markup)
+        await edit()
+        edit_cache.sent += 1
     except MessageNotModified:
-        # Игнорируем ошибку, если сообщение не изменилось
-        pass
\ No newline at end of file
+        edit_cache.not_modified += 1
+    except Exception:
+        # Неизвестно, изменилось ли сообщение
+        edit_cache.forget(key)
+        raise
+    edit_cache.put(key, content)
+
+async def safe_edit_message(callback: CallbackQuery, text: str, reply_markup=None, parse_mode: Optional[str] = 'Markdown'):
+    """
+    Безопасное редактирование сообщения: без запроса к Bot API, если текст и
+    клавиатура не изменились, и с обработкой ошибки MessageNotModified
+    """
+    markup = _markup_json(reply_markup)
+    content = (hash((text, parse_mode)), hash(markup))
+    await _edit(callback, content, lambda: callback.message.edit_text(text, reply_markup=markup, parse_mode=parse_mode))
+
+async def safe_edit_reply_markup(callback: CallbackQuery, reply_markup=None):
+    """Безопасное изменение клавиатуры сообщения (текст остается прежним)"""
+    markup = _markup_json(reply_markup)
+    previous = edit_cache.get(_message_key(callback))
+    # Текст сообщения известен, только если его отправляли через safe_edit_message
+    content = (previous[0] if previous else None, hash(markup))
+    await _edit(callback, content, lambda: callback.message.edit_reply_markup(markup))
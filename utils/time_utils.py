@@ -50,4 +50,13 @@ def parse_user_time(time_str: str):
         dt = datetime.combine(today, dt.time())
         return moscow_tz.localize(dt)
     except ValueError:
-        return None
\ No newline at end of file
+        return None
+
+def get_kickoff_timestamp(match_date: str, match_time: str):
+    """Время начала матча (ДД.ММ.ГГГГ ЧЧ:ММ по Москве) в секундах Unix"""
+    try:
+        moscow_tz = pytz.timezone('Europe/Moscow')
+        dt = datetime.strptime(f"{match_date} {match_time}", '%d.%m.%Y %H:%M')
+        return int(moscow_tz.localize(dt).timestamp())
+    except ValueError:
+        return None